@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Concept Matcher Module
+
+This module reports which of a video's key concepts a summary covers. Each
+concept has a name and optional synonyms ("Calvin cycle", "light-independent
+reactions"). All of a video's phrasings are compiled once into an Aho-Corasick
+automaton over words, and a submission is then scanned in one pass over its
+words, however many concepts the video has.
+
+Words are compared by a light lemma (plural and -ed/-ing endings stripped), so
+"divide", "divides", "divided" and "dividing" match each other, as do "gas" and
+"gases". Derived words are not reduced: "reaction" matches "reactions" but not
+"reacting". Hyphens and punctuation separate words, so "light-dependent"
+matches "light dependent".
+
+Usage:
+    matcher = ConceptMatcher(['chloroplast', {'name': 'Calvin cycle', 'synonyms': ['dark reactions']}])
+    matcher.coverage(user_text)
+"""
+
+import logging
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Set, Union
+
+from lexical_scoring import STOP_WORDS
+
+logger = logging.getLogger(__name__)
+
+TERM_PATTERN = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=65536)
+def lemma(word: str) -> str:
+    """
+    Reduce a lowercase word to a light lemma by stripping common inflections.
+
+    The same reduction is applied to concepts and to submissions, so it only
+    has to map the forms of a word together, not produce a dictionary form.
+
+    Args:
+        word (str): Lowercase word
+
+    Returns:
+        str: Lemma of the word
+    """
+    if len(word) <= 3:
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith(('sses', 'ches', 'shes', 'xes', 'zes')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    if word.endswith('ing') and len(word) > 5:
+        word = word[:-3]
+    elif word.endswith('ed') and len(word) > 4:
+        word = word[:-2]
+    # "produce", "produced" and "producing" all end up as "produc", "gases" as "gas"
+    if word.endswith('e') and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def term_sequence(text: str) -> List[str]:
+    """
+    Split text into the lemmas of its words, in order.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        List[str]: Lemmas
+    """
+    return [lemma(word) for word in TERM_PATTERN.findall((text or '').lower())]
+
+
+def normalize_concepts(concepts: Sequence[Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Normalize concepts given as names or as ``{"name", "synonyms"}`` objects.
+
+    Args:
+        concepts (Sequence[Union[str, Dict[str, Any]]]): Concepts
+
+    Returns:
+        List[Dict[str, Any]]: Concepts with ``name`` and ``synonyms``, duplicates dropped
+
+    Raises:
+        ValueError: If a concept has no name
+    """
+    normalized = []
+    seen = set()
+    for i, concept in enumerate(concepts):
+        if isinstance(concept, str):
+            concept = {"name": concept}
+        if not isinstance(concept, dict) or not str(concept.get('name') or '').strip():
+            raise ValueError(f"Concept {i} needs a name")
+        name = str(concept['name']).strip()
+        if name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        synonyms = [str(synonym).strip() for synonym in concept.get('synonyms') or [] if str(synonym).strip()]
+        normalized.append({"name": name, "synonyms": synonyms})
+    return normalized
+
+
+class ConceptMatcher:
+    """
+    Aho-Corasick automaton over word lemmas for a set of concepts and their synonyms.
+    """
+
+    def __init__(self, concepts: Sequence[Union[str, Dict[str, Any]]]):
+        """
+        Compile the concepts.
+
+        Args:
+            concepts (Sequence[Union[str, Dict[str, Any]]]): Concept names or ``{"name", "synonyms"}`` objects
+        """
+        self.concepts = normalize_concepts(concepts)
+        # Trie over lemmas: transitions, failure links and the concepts each state completes
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Set[int]] = [set()]
+
+        for index, concept in enumerate(self.concepts):
+            for phrase in [concept['name']] + concept['synonyms']:
+                words = TERM_PATTERN.findall(phrase.lower())
+                # "the Calvin cycle" should match "Calvin cycle"
+                while words and words[0] in STOP_WORDS:
+                    words.pop(0)
+                while words and words[-1] in STOP_WORDS:
+                    words.pop()
+                if words:
+                    self._insert([lemma(word) for word in words], index)
+        self._link()
+
+    def _insert(self, terms: List[str], index: int) -> None:
+        state = 0
+        for term in terms:
+            following = self._goto[state].get(term)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][term] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(set())
+            state = following
+        self._outputs[state].add(index)
+
+    def _link(self) -> None:
+        # Breadth-first, so each state's failure target is already linked
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for term, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and term not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(term, 0)
+                self._fail[following] = target
+                # A phrase that ends here also completes every phrase that is its suffix
+                self._outputs[following] |= self._outputs[self._fail[following]]
+
+    def scan(self, text: str) -> Set[int]:
+        """
+        Find the concepts a text mentions, in one pass over its words.
+
+        Args:
+            text (str): Text to scan
+
+        Returns:
+            Set[int]: Indices of the mentioned concepts in ``concepts``
+        """
+        found: Set[int] = set()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for term in term_sequence(text):
+            while state and term not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(term, 0)
+            if outputs[state]:
+                found |= outputs[state]
+                if len(found) == len(self.concepts):
+                    break
+        return found
+
+    def coverage(self, text: str) -> Dict[str, Any]:
+        """
+        Report which concepts a text covers and which it misses.
+
+        Args:
+            text (str): Text to scan
+
+        Returns:
+            Dict[str, Any]: ``covered`` and ``missing`` concept names, in concept order,
+                and the covered fraction
+        """
+        found = self.scan(text)
+        covered = [concept['name'] for i, concept in enumerate(self.concepts) if i in found]
+        missing = [concept['name'] for i, concept in enumerate(self.concepts) if i not in found]
+        return {
+            "covered": covered,
+            "missing": missing,
+            "coverage": round(len(covered) / len(self.concepts), 3) if self.concepts else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self.concepts)
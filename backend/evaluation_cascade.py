@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluation Cascade Module
+
+This module evaluates a summary in two tiers. The lexical tier (word overlap,
+microseconds) always runs first. The transformer tier, the AI service's
+semantic similarity, runs only when it is worth its cost:
+
+    - the lexical score falls in the ambiguous band, where word overlap cannot
+      tell a paraphrase from an off-topic answer, or
+    - the request's time budget is large enough to upgrade every request
+
+and only when it can still answer in time. The remaining budget travels to the
+AI service in the ``X-Request-Deadline-Ms`` header, so its admission
+controller can shed the request early instead of answering too late. When the
+service says it is saturated (429/503), the cascade answers from the lexical
+tier and skips the transformer tier until the service's ``Retry-After`` has
+passed.
+
+Usage:
+    cascade = EvaluationCascade(lexical_scorer.score, TransformerTier('http://localhost:5001'))
+    result = cascade.evaluate(user_text, reference_text, deadline_ms=800)
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('lexical', 'transformer')
+
+
+class TierUnavailable(Exception):
+    """The transformer tier could not answer this request."""
+
+    def __init__(self, reason: str, retry_after: float = 0.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TransformerTier:
+    """
+    Client for the AI service's similarity endpoint.
+    """
+
+    def __init__(self, base_url: str, unavailable_backoff: float = 5.0):
+        """
+        Initialize the client.
+
+        Args:
+            base_url (str): AI service URL, e.g. ``http://localhost:5001``
+            unavailable_backoff (float): Seconds to skip the tier after a connection failure
+        """
+        self.url = f"{base_url.rstrip('/')}/similarity-score"
+        self.unavailable_backoff = unavailable_backoff
+        # requests sessions are not thread-safe; keep one pooled connection per thread
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def score(self, user_text: str, reference_text: str, budget_ms: float) -> Dict[str, Any]:
+        """
+        Score a pair with the transformer model within a time budget.
+
+        Args:
+            user_text (str): Submission text
+            reference_text (str): Reference text
+            budget_ms (float): Time left for this call, sent as ``X-Request-Deadline-Ms``
+
+        Returns:
+            Dict[str, Any]: The service's ``similarity_score``, ``performance_level`` and ``feedback_message``
+
+        Raises:
+            TierUnavailable: If the service is saturated, unreachable, too slow or failing
+        """
+        try:
+            response = self._session().post(
+                self.url,
+                json={"user_text": user_text, "reference_text": reference_text},
+                headers={"X-Request-Deadline-Ms": str(int(budget_ms))},
+                timeout=budget_ms / 1000
+            )
+        except requests.Timeout:
+            raise TierUnavailable('timeout')
+        except requests.RequestException as e:
+            logger.warning(f"AI service unreachable: {str(e)}")
+            raise TierUnavailable('unavailable', self.unavailable_backoff)
+
+        if response.status_code in (429, 503):
+            try:
+                retry_after = float(response.headers.get('Retry-After', 1))
+            except ValueError:
+                retry_after = 1.0
+            raise TierUnavailable('saturated', retry_after)
+        if response.status_code != 200:
+            logger.warning(f"AI service returned {response.status_code}: {response.text[:200]}")
+            raise TierUnavailable('error')
+        return response.json()
+
+
+class EvaluationCascade:
+    """
+    Lexical-first evaluation that escalates to the transformer tier when needed and affordable.
+    """
+
+    def __init__(self, lexical_score: Callable[[str, str], float], transformer: Optional[TransformerTier],
+                 ambiguous_band: Tuple[float, float] = (0.03, 0.4), default_deadline_ms: float = 2000.0,
+                 upgrade_budget_ms: float = 5000.0, expected_latency_ms: float = 300.0):
+        """
+        Initialize the cascade.
+
+        Args:
+            lexical_score (Callable[[str, str], float]): Scores (user_text, reference_text) by word overlap
+            transformer (Optional[TransformerTier]): Transformer tier, or None to answer lexically only
+            ambiguous_band (Tuple[float, float]): Lexical scores in [low, high) are escalated
+            default_deadline_ms (float): Time budget of requests that do not send one
+            upgrade_budget_ms (float): Budgets at least this large escalate every request
+            expected_latency_ms (float): Initial estimate of a transformer call, refined as calls complete
+        """
+        self.lexical_score = lexical_score
+        self.transformer = transformer
+        self.ambiguous_band = ambiguous_band
+        self.default_deadline_ms = default_deadline_ms
+        self.upgrade_budget_ms = upgrade_budget_ms
+        self._lock = threading.Lock()
+        self._latency_ms = expected_latency_ms
+        self._backoff_until = 0.0
+        self._tier_counts = {tier: 0 for tier in TIERS}
+        # Why requests were answered lexically
+        self._lexical_reasons: Dict[str, int] = {}
+
+    def _record(self, tier: str, reason: Optional[str] = None, latency_ms: Optional[float] = None,
+                retry_after: float = 0.0) -> None:
+        with self._lock:
+            self._tier_counts[tier] += 1
+            if reason is not None:
+                self._lexical_reasons[reason] = self._lexical_reasons.get(reason, 0) + 1
+            if latency_ms is not None:
+                # Exponentially weighted so the estimate follows load changes
+                self._latency_ms = 0.8 * self._latency_ms + 0.2 * latency_ms
+            if retry_after:
+                self._backoff_until = max(self._backoff_until, time.monotonic() + retry_after)
+
+    def _skip_reason(self, lexical_score: float, remaining_ms: float) -> Optional[str]:
+        low, high = self.ambiguous_band
+        if self.transformer is None:
+            return 'disabled'
+        if not low <= lexical_score < high and remaining_ms < self.upgrade_budget_ms:
+            return 'confident'
+        with self._lock:
+            if time.monotonic() < self._backoff_until:
+                return 'backoff'
+            if remaining_ms < self._latency_ms:
+                return 'deadline'
+        return None
+
+    def evaluate(self, user_text: str, reference_text: str, deadline_ms: Optional[float] = None,
+                 lexical_score: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Score a submission, escalating to the transformer tier when needed and affordable.
+
+        Args:
+            user_text (str): Submission text
+            reference_text (str): Reference text
+            deadline_ms (Optional[float]): Time budget left for the request
+            lexical_score (Optional[float]): Lexical score the caller already computed
+
+        Returns:
+            Dict[str, Any]: ``tier`` that answered, its ``similarity_score``, the ``lexical_score``,
+                the transformer ``result`` (or None) and the ``reason`` a lexical answer was used
+        """
+        started = time.monotonic()
+        budget_ms = deadline_ms if deadline_ms is not None else self.default_deadline_ms
+        if lexical_score is None:
+            lexical_score = self.lexical_score(user_text, reference_text)
+        remaining_ms = budget_ms - (time.monotonic() - started) * 1000
+
+        reason = self._skip_reason(lexical_score, remaining_ms)
+        if reason is None:
+            call_started = time.monotonic()
+            try:
+                result = self.transformer.score(user_text, reference_text, remaining_ms)
+                self._record('transformer', latency_ms=(time.monotonic() - call_started) * 1000)
+                return {
+                    "tier": 'transformer',
+                    "similarity_score": float(result['similarity_score']),
+                    "lexical_score": lexical_score,
+                    "result": result,
+                    "reason": None
+                }
+            except TierUnavailable as e:
+                logger.info(f"Answering from the lexical tier: transformer tier {e.reason}")
+                reason = e.reason
+                # A timeout still tells how slow the service has become
+                latency_ms = (time.monotonic() - call_started) * 1000 if e.reason == 'timeout' else None
+                self._record('lexical', reason, latency_ms=latency_ms, retry_after=e.retry_after)
+        else:
+            self._record('lexical', reason)
+
+        return {
+            "tier": 'lexical',
+            "similarity_score": lexical_score,
+            "lexical_score": lexical_score,
+            "result": None,
+            "reason": reason
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cascade statistics.
+
+        Returns:
+            Dict[str, Any]: Requests per tier and their fraction, reasons for lexical answers,
+                the transformer latency estimate and seconds left of a backoff
+        """
+        with self._lock:
+            total = sum(self._tier_counts.values())
+            return {
+                "requests": total,
+                "tiers": {
+                    tier: {"count": count, "fraction": round(count / total, 4) if total else 0.0}
+                    for tier, count in self._tier_counts.items()
+                },
+                "lexical_reasons": dict(self._lexical_reasons),
+                "ambiguous_band": list(self.ambiguous_band),
+                "expected_transformer_latency_ms": round(self._latency_ms, 1),
+                "backoff_seconds": round(max(0.0, self._backoff_until - time.monotonic()), 1)
+            }
@@ -4,8 +4,15 @@ Video Summary Evaluator - Flask Backend with Manual CORS Headers
 Clean, simple Flask server for video summary evaluation
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, url_for
+import hashlib
 import logging
+import os
+
+from evaluation_cascade import EvaluationCascade, TransformerTier
+from lexical_scoring import METRICS, LexicalScorer
+from result_cache import make_key, open_result_cache
+from video_catalog import VideoCatalog
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -18,7 +25,8 @@ app = Flask(__name__)
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Request-Deadline-Ms, If-None-Match'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag, X-Total-Count, Link, X-Cache'
     response.headers['Access-Control-Max-Age'] = '86400'
     return response
 
@@ -30,31 +38,183 @@ def handle_preflight():
         response.status_code = 200
         return response
 
-# Video data
+# Video data, seeded into an empty catalog
 VIDEO = {
     "id": 1,
     "title": "Photosynthesis Explained",
     "youtube_id": "Y5dRycQMHk0",
     "summary": "Photosynthesis is a vital biological process where plants, algae, and certain bacteria convert light energy, typically from the sun, into chemical energy stored in glucose molecules. This process occurs primarily in the chloroplasts of plant cells, specifically in structures called thylakoids. The process involves two main stages: the light-dependent reactions (photo reactions) and the light-independent reactions (Calvin cycle). During the light reactions, chlorophyll absorbs sunlight and splits water molecules, releasing oxygen as a byproduct and generating ATP and NADPH. In the Calvin cycle, carbon dioxide from the atmosphere is fixed into organic molecules using the energy from ATP and NADPH. The overall equation for photosynthesis is: 6CO2 + 6H2O + light energy → C6H12O6 + 6O2. This process is crucial for life on Earth as it produces oxygen for respiration and forms the base of most food chains by converting inorganic carbon into organic compounds that serve as food for other organisms.",
-    "category": "Biology"
+    "category": "Biology",
+    "key_concepts": [
+        {"name": "chloroplasts", "synonyms": ["thylakoids"]},
+        {"name": "light-dependent reactions", "synonyms": ["light reactions", "photo reactions"]},
+        {"name": "Calvin cycle", "synonyms": ["light-independent reactions", "dark reactions"]},
+        {"name": "chlorophyll"},
+        {"name": "ATP", "synonyms": ["adenosine triphosphate"]},
+        {"name": "NADPH"},
+        {"name": "glucose", "synonyms": ["sugar", "C6H12O6"]},
+        {"name": "oxygen", "synonyms": ["O2"]},
+        {"name": "carbon dioxide", "synonyms": ["CO2"]},
+        {"name": "light energy", "synonyms": ["sunlight", "solar energy"]},
+        {"name": "food chains", "synonyms": ["food webs"]}
+    ]
+}
+
+# Reference vocabularies are tokenized once and cached; 'compat' keeps the original scores
+lexical_scorer = LexicalScorer(mode=os.getenv('LEXICAL_TOKENIZER', 'compat'))
+
+# Performance levels from the highest threshold down
+PERFORMANCE_LEVELS = [
+    (0.6, "Excellent", "🌟 Excellent! Your summary captures the key concepts very well."),
+    (0.4, "Good", "👍 Good work! Your summary covers most important points."),
+    (0.2, "Fair", "📝 Fair attempt. Try to include more key concepts."),
+    (0.0, "Poor", "📚 Your summary needs improvement. Focus on main ideas."),
+]
+MAX_BATCH_SUBMISSIONS = int(os.getenv('MAX_BATCH_SUBMISSIONS', '10000'))
+
+# Video catalog with word sets and key concepts precomputed at ingest
+catalog = VideoCatalog(os.getenv('VIDEO_CATALOG_DB', 'video_catalog.db'), tokenizer_mode=lexical_scorer.mode)
+if catalog.count() == 0:
+    catalog.ingest([VIDEO])
+MAX_PAGE_SIZE = 100
+
+# Escalate ambiguous lexical scores to the AI service's transformer model when AI_SERVICE_URL is set
+evaluation_cascade = None
+if os.getenv('AI_SERVICE_URL'):
+    evaluation_cascade = EvaluationCascade(
+        lexical_scorer.score,
+        TransformerTier(os.getenv('AI_SERVICE_URL')),
+        ambiguous_band=(float(os.getenv('CASCADE_AMBIGUOUS_LOW', '0.03')),
+                        float(os.getenv('CASCADE_AMBIGUOUS_HIGH', '0.4'))),
+        default_deadline_ms=float(os.getenv('CASCADE_DEFAULT_DEADLINE_MS', '2000')),
+        upgrade_budget_ms=float(os.getenv('CASCADE_UPGRADE_BUDGET_MS', '5000'))
+    )
+
+# Evaluation results, keyed by submission, reference (or video version) and scorer
+result_cache = open_result_cache(
+    os.getenv('RESULT_CACHE_URL', 'memory'),
+    ttl=float(os.getenv('RESULT_CACHE_TTL', '3600')),
+    max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '10000')),
+    max_bytes=int(os.getenv('RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+)
+SCORER_CONFIG = {
+    "tokenizer": lexical_scorer.mode,
+    "ai_service": os.getenv('AI_SERVICE_URL'),
+    "ambiguous_band": list(evaluation_cascade.ambiguous_band) if evaluation_cascade is not None else None
 }
 
 def simple_evaluate(user_text, reference_text):
     """Simple word-based similarity evaluation"""
-    # Filter out short words and common words
-    stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those', 'a', 'an'}
-    
-    user_words = set(word.lower() for word in user_text.split() if len(word) > 2 and word.lower() not in stop_words)
-    ref_words = set(word.lower() for word in reference_text.split() if len(word) > 2 and word.lower() not in stop_words)
+    return lexical_scorer.score(user_text, reference_text)
+
+def grade_score(similarity_score):
+    """Get the performance level and feedback message for a score"""
+    for threshold, level, feedback in PERFORMANCE_LEVELS:
+        if similarity_score >= threshold:
+            return level, feedback
+    return PERFORMANCE_LEVELS[-1][1], PERFORMANCE_LEVELS[-1][2]
+
+def recommendations_for(similarity_score, video, concept_coverage):
+    """Suggest the video's key concepts that the summary leaves out"""
+    if similarity_score >= 0.6:
+        topic = video['title'] if video else "the video"
+        return [f"Excellent work! You have a strong understanding of {topic}"]
+    missing = concept_coverage['missing'] if concept_coverage else []
+    recommendations = []
+    if missing:
+        recommendations.append(f"Focus on key concepts like {', '.join(missing[:3])}")
+    if len(missing) > 3:
+        recommendations.append(f"Include important terms like {', '.join(missing[3:6])}")
+    recommendations.append("Explain why the main ideas of the video matter and how they connect")
+    return recommendations
+
+def find_video(video_id):
+    """Look up a video with its precomputed features, or None if it is not in the catalog"""
+    try:
+        return catalog.get(int(video_id), features=True)
+    except (TypeError, ValueError):
+        return None
+
+def not_modified(etag):
+    """Answer a conditional GET whose cached copy is still current"""
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+def request_deadline_ms():
+    """Read the request's time budget from the X-Request-Deadline-Ms header, if set"""
+    try:
+        return float(request.headers['X-Request-Deadline-Ms'])
+    except (KeyError, ValueError):
+        return None
+
+def build_evaluation(user_text, reference_text, video, deadline_ms):
+    """Score a summary and assemble its evaluation"""
+    # The catalog's word set spares tokenizing the reference again
+    reference_words = video['tokens'] if video and reference_text == video['summary'] else None
+    similarity_score = lexical_scorer.score(user_text, reference_text, reference_words=reference_words)
+
+    # Escalate to the transformer tier when the cascade is enabled
+    cascade_result = None
+    if evaluation_cascade is not None:
+        cascade_result = evaluation_cascade.evaluate(user_text, reference_text, deadline_ms,
+                                                     lexical_score=similarity_score)
+        similarity_score = cascade_result['similarity_score']
     
-    if not user_words or not ref_words:
-        return 0.0
+    # Determine performance level and feedback
+    if cascade_result is not None and cascade_result['tier'] == 'transformer':
+        # Semantic scores run higher than word overlap, so use the model's own levels
+        performance_level = cascade_result['result']['performance_level']
+        feedback = cascade_result['result']['feedback_message']
+    else:
+        performance_level, feedback = grade_score(similarity_score)
     
-    intersection = user_words.intersection(ref_words)
-    union = user_words.union(ref_words)
+    # One pass over the summary finds which of the video's key concepts it covers
+    concept_coverage = catalog.concept_matcher(video).coverage(user_text) if video else None
+
+    # Calculate metrics
+    user_word_count = len(user_text.split())
+    ref_word_count = len(reference_text.split())
+    length_ratio = user_word_count / ref_word_count if ref_word_count > 0 else 0
     
-    similarity = len(intersection) / len(union) if union else 0.0
-    return similarity
+    # Build response
+    evaluation_result = {
+        "similarity_score": round(similarity_score, 3),
+        "performance_level": performance_level,
+        "feedback_message": feedback,
+        "score_percentage": round(similarity_score * 100, 1),
+        "video_title": video['title'] if video else None,
+        "video_category": video['category'] if video else None,
+        "length_analysis": {
+            "user_word_count": user_word_count,
+            "reference_word_count": ref_word_count,
+            "length_ratio": round(length_ratio, 2),
+            "length_feedback": (
+                "Your summary length is appropriate." if 0.3 <= length_ratio <= 2.0 else 
+                "Your summary is quite brief. Consider adding more details." if length_ratio < 0.3 else
+                "Your summary is quite detailed. Try to focus on key points."
+            )
+        },
+        "detailed_metrics": {
+            "semantic_similarity": round(similarity_score, 3),
+            "comprehensiveness_score": round(similarity_score * 100, 1),
+            "understanding_quality": performance_level
+        },
+        "concept_coverage": concept_coverage,
+        "recommendations": recommendations_for(similarity_score, video, concept_coverage)
+    }
+    if cascade_result is not None:
+        evaluation_result["evaluation_tier"] = {
+            "tier": cascade_result['tier'],
+            "lexical_score": round(cascade_result['lexical_score'], 3),
+            "reason": cascade_result['reason']
+        }
+    return evaluation_result
+
+def is_cacheable(evaluation_result):
+    """Cache answers that do not depend on load: a transformer score or a confident lexical one"""
+    tier = evaluation_result.get('evaluation_tier')
+    return tier is None or tier['tier'] == 'transformer' or tier['reason'] in ('confident', 'disabled')
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -67,21 +227,68 @@ def health_check():
         "flask": "working"
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Scoring cache and evaluation tier statistics"""
+    return jsonify({
+        "lexical": lexical_scorer.stats(),
+        "cascade": evaluation_cascade.stats() if evaluation_cascade is not None else None,
+        "result_cache": result_cache.stats() if result_cache is not None else None
+    })
+
 @app.route('/api/videos', methods=['GET'])
 def get_videos():
-    """Get all videos"""
+    """List videos, paginated and optionally filtered by category or title"""
     logger.info("Videos requested")
-    return jsonify([VIDEO])
+
+    category = request.args.get('category') or None
+    query = request.args.get('q') or None
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(MAX_PAGE_SIZE, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers"}), 400
+
+    # The catalog version changes on every write, so it and the query identify the listing
+    listing = f"{category}|{query}|{page}|{per_page}"
+    etag = f"{catalog.version()}-{hashlib.sha1(listing.encode('utf-8')).hexdigest()[:16]}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    videos, total = catalog.list(category=category, query=query, page=page, per_page=per_page)
+    response = jsonify(videos)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Total-Count'] = str(total)
+    links = []
+    base_args = {key: value for key, value in (('category', category), ('q', query)) if value}
+    if page * per_page < total:
+        links.append(f'<{url_for("get_videos", page=page + 1, per_page=per_page, **base_args)}>; rel="next"')
+    if page > 1:
+        links.append(f'<{url_for("get_videos", page=page - 1, per_page=per_page, **base_args)}>; rel="prev"')
+    if links:
+        response.headers['Link'] = ', '.join(links)
+    return response
 
 @app.route('/api/videos/<int:video_id>', methods=['GET'])
 def get_video(video_id):
     """Get specific video"""
     logger.info(f"Video {video_id} requested")
-    
-    if video_id == 1:
-        return jsonify(VIDEO)
-    else:
+
+    version = catalog.get_version(video_id)
+    if version is None:
+        return jsonify({"error": "Video not found"}), 404
+    etag = f"{video_id}-{version}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    video = catalog.get(video_id)
+    if video is None:
         return jsonify({"error": "Video not found"}), 404
+    response = jsonify(video)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/evaluate', methods=['POST'])
 def evaluate_summary():
@@ -108,79 +315,106 @@ def evaluate_summary():
         if not video_id:
             return jsonify({"error": "Video ID is required"}), 400
 
-        # Use custom reference summary if provided, otherwise use default
+        video = find_video(video_id)
+
+        # Use custom reference summary if provided, otherwise use the catalog's
         if reference_summary:
             reference_text = reference_summary
             logger.info("Using custom reference summary")
         else:
-            if video_id != 1:
+            if video is None:
                 return jsonify({"error": "Video not found"}), 404
-            reference_text = VIDEO['summary']
-            logger.info("Using default reference summary")
+            reference_text = video['summary']
+            logger.info("Using catalog reference summary")
 
-        # Evaluate similarity
-        similarity_score = simple_evaluate(user_text, reference_text)
-        
-        # Determine performance level and feedback
-        if similarity_score >= 0.6:
-            performance_level = "Excellent"
-            feedback = "🌟 Excellent! Your summary captures the key concepts very well."
-        elif similarity_score >= 0.4:
-            performance_level = "Good"
-            feedback = "👍 Good work! Your summary covers most important points."
-        elif similarity_score >= 0.2:
-            performance_level = "Fair"
-            feedback = "📝 Fair attempt. Try to include more key concepts."
+        deadline_ms = request_deadline_ms()
+        if result_cache is None:
+            evaluation_result, cache_status = build_evaluation(user_text, reference_text, video, deadline_ms), None
         else:
-            performance_level = "Poor"
-            feedback = "📚 Your summary needs improvement. Focus on main ideas."
-        
-        # Calculate metrics
-        user_word_count = len(user_text.split())
-        ref_word_count = len(reference_text.split())
-        length_ratio = user_word_count / ref_word_count if ref_word_count > 0 else 0
-        
-        # Build response
-        evaluation_result = {
-            "similarity_score": round(similarity_score, 3),
-            "performance_level": performance_level,
-            "feedback_message": feedback,
-            "score_percentage": round(similarity_score * 100, 1),
-            "video_title": VIDEO['title'],
-            "video_category": VIDEO['category'],
-            "length_analysis": {
-                "user_word_count": user_word_count,
-                "reference_word_count": ref_word_count,
-                "length_ratio": round(length_ratio, 2),
-                "length_feedback": (
-                    "Your summary length is appropriate." if 0.3 <= length_ratio <= 2.0 else 
-                    "Your summary is quite brief. Consider adding more details." if length_ratio < 0.3 else
-                    "Your summary is quite detailed. Try to focus on key points."
-                )
-            },
-            "detailed_metrics": {
-                "semantic_similarity": round(similarity_score, 3),
-                "comprehensiveness_score": round(similarity_score * 100, 1),
-                "understanding_quality": performance_level
-            },
-            "recommendations": (
-                [
-                    "Focus on key photosynthesis concepts like light reactions and Calvin cycle",
-                    "Include important terms like chloroplasts, ATP, and NADPH",
-                    "Explain the overall importance of photosynthesis for life on Earth"
-                ] if similarity_score < 0.6 else [
-                    "Excellent work! You have a strong understanding of photosynthesis"
-                ]
+            # The catalog row version changes whenever the video's summary or concepts do
+            cache_key = make_key(
+                'api/evaluate', user_text,
+                [video['id'], video['version']] if video else None,
+                None if video and reference_text == video['summary'] else reference_text,
+                SCORER_CONFIG,
+                # A budget this large escalates every request, so it can get a different answer
+                evaluation_cascade is not None and
+                (deadline_ms if deadline_ms is not None else evaluation_cascade.default_deadline_ms)
+                >= evaluation_cascade.upgrade_budget_ms
             )
-        }
-        
-        logger.info(f"Evaluation complete: {similarity_score:.3f} ({performance_level})")
-        return jsonify(evaluation_result)
+            evaluation_result, cache_status = result_cache.get_or_compute(
+                cache_key, lambda: build_evaluation(user_text, reference_text, video, deadline_ms), is_cacheable
+            )
+        similarity_score = evaluation_result['similarity_score']
+        performance_level = evaluation_result['performance_level']
+
+        logger.info(f"Evaluation complete: {similarity_score:.3f} ({performance_level}, cache {cache_status})")
+        response = jsonify(evaluation_result)
+        if cache_status is not None:
+            response.headers['X-Cache'] = cache_status
+        return response
         
     except Exception as e:
         logger.error(f"Error in evaluation: {str(e)}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+@app.route('/api/evaluate/batch', methods=['POST'])
+def evaluate_batch():
+    """Score many user summaries against one reference summary"""
+    logger.info("Batch evaluation requested")
+
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        user_texts = data.get('user_texts')
+        video_id = data.get('video_id')
+        reference_summary = (data.get('reference_summary') or '').strip()
+        metric = data.get('metric', 'jaccard')
+        include_concepts = bool(data.get('include_concepts', False))
+
+        if not isinstance(user_texts, list) or not all(isinstance(text, str) for text in user_texts):
+            return jsonify({"error": "user_texts must be a list of strings"}), 400
+        if len(user_texts) > MAX_BATCH_SUBMISSIONS:
+            return jsonify({"error": f"At most {MAX_BATCH_SUBMISSIONS} submissions per batch"}), 413
+        if metric not in METRICS:
+            return jsonify({"error": f"metric must be one of: {', '.join(METRICS)}"}), 400
+
+        video = find_video(video_id)
+        if reference_summary:
+            reference_text = reference_summary
+        elif video is not None:
+            reference_text = video['summary']
+        else:
+            return jsonify({"error": "Video not found"}), 404
+
+        reference_words = video['tokens'] if video and reference_text == video['summary'] else None
+        scores = lexical_scorer.score_batch(user_texts, reference_text, metric, reference_words=reference_words)
+        matcher = catalog.concept_matcher(video) if include_concepts and video else None
+        results = []
+        for user_text, similarity_score in zip(user_texts, scores.tolist()):
+            level, _ = grade_score(similarity_score)
+            result = {
+                "similarity_score": round(similarity_score, 3),
+                "performance_level": level
+            }
+            if matcher is not None:
+                result["concept_coverage"] = matcher.coverage(user_text)
+            results.append(result)
+
+        logger.info(f"Batch evaluation complete: {len(results)} submissions")
+        return jsonify({
+            "metric": metric,
+            "count": len(results),
+            "mean_score": round(float(scores.mean()), 3) if len(results) else 0.0,
+            "results": results
+        })
+
+    except Exception as e:
+        logger.error(f"Error in batch evaluation: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
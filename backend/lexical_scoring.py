@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Lexical Scoring Module
+
+This module scores summaries against a reference by word overlap. Each
+reference is tokenized once into a vocabulary that is kept in a small LRU
+cache, so repeated evaluations against the same video only tokenize the
+submission. Batches of submissions are scored together: their word sets form
+a sparse binary incidence matrix, and intersecting it with the reference
+vocabulary is one vectorized count per row.
+
+Two tokenizers are available:
+    compat    whitespace split, as the original ``simple_evaluate`` did; scores
+              are identical to it (punctuation stays attached to words)
+    words     compiled regex over letters and digits, so "energy," and
+              "Energy" are the same word
+
+Usage:
+    scorer = LexicalScorer()
+    scorer.score(user_text, reference_text)
+    scorer.score_batch(user_texts, reference_text, metric='jaccard')
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STOP_WORDS: FrozenSet[str] = frozenset({
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were',
+    'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might',
+    'can', 'this', 'that', 'these', 'those', 'a', 'an'
+})
+# Words shorter than this are ignored
+MIN_WORD_LENGTH = 3
+# Runs of letters and digits, keeping inner apostrophes and hyphens ("don't", "light-dependent")
+WORD_PATTERN = re.compile(r"[^\W_]+(?:['’-][^\W_]+)*")
+TOKENIZER_MODES = ('compat', 'words')
+METRICS = ('jaccard', 'overlap')
+
+
+def scored_words(text: str, mode: str = 'compat') -> List[str]:
+    """
+    Get the scored words of a text in order, repeats included.
+
+    Args:
+        text (str): Text to tokenize
+        mode (str): ``compat`` (whitespace split) or ``words`` (punctuation-aware)
+
+    Returns:
+        List[str]: Lowercased words that are long enough and not stop words
+    """
+    if mode == 'compat':
+        # The length check runs on the raw word, punctuation included, as it always did
+        return [
+            lowered for word in (text or '').split()
+            if len(word) >= MIN_WORD_LENGTH and (lowered := word.lower()) not in STOP_WORDS
+        ]
+    if mode == 'words':
+        return [
+            word.replace('’', "'") for word in WORD_PATTERN.findall((text or '').lower())
+            if len(word) >= MIN_WORD_LENGTH and word not in STOP_WORDS
+        ]
+    raise ValueError(f"Unknown tokenizer mode: {mode}. Choose from {', '.join(TOKENIZER_MODES)}")
+
+
+def tokenize(text: str, mode: str = 'compat') -> FrozenSet[str]:
+    """
+    Get the set of scored words of a text.
+
+    Args:
+        text (str): Text to tokenize
+        mode (str): ``compat`` (whitespace split) or ``words`` (punctuation-aware)
+
+    Returns:
+        FrozenSet[str]: Lowercased words that are long enough and not stop words
+    """
+    return frozenset(scored_words(text, mode))
+
+
+def _similarity(intersection: np.ndarray, user_sizes: np.ndarray, reference_size: int, metric: str) -> np.ndarray:
+    if metric == 'jaccard':
+        denominator = user_sizes + reference_size - intersection
+    elif metric == 'overlap':
+        denominator = np.minimum(user_sizes, reference_size)
+    else:
+        raise ValueError(f"Unknown metric: {metric}. Choose from {', '.join(METRICS)}")
+    # An empty word set on either side scores 0.0
+    if reference_size == 0:
+        return np.zeros(len(user_sizes), dtype=np.float64)
+    scores = np.zeros(len(user_sizes), dtype=np.float64)
+    np.divide(intersection, denominator, out=scores, where=user_sizes > 0)
+    return scores
+
+
+class LexicalScorer:
+    """
+    Word-overlap scorer with cached reference vocabularies and batch scoring.
+    """
+
+    def __init__(self, mode: str = 'compat', max_cached_references: int = 256):
+        """
+        Initialize the scorer.
+
+        Args:
+            mode (str): Tokenizer mode, ``compat`` or ``words``
+            max_cached_references (int): Number of reference vocabularies kept in memory
+        """
+        if mode not in TOKENIZER_MODES:
+            raise ValueError(f"Unknown tokenizer mode: {mode}. Choose from {', '.join(TOKENIZER_MODES)}")
+        self.mode = mode
+        self.max_cached_references = max(1, int(max_cached_references))
+        self._lock = threading.Lock()
+        # reference text -> word -> column index
+        self._vocabularies: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def tokenize(self, text: str) -> FrozenSet[str]:
+        """
+        Get the set of scored words of a text with this scorer's tokenizer.
+
+        Args:
+            text (str): Text to tokenize
+
+        Returns:
+            FrozenSet[str]: Scored words
+        """
+        return tokenize(text, self.mode)
+
+    def reference_vocabulary(self, reference: str, reference_words: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Get the vocabulary of a reference, tokenizing it only on first use.
+
+        Args:
+            reference (str): Reference text
+            reference_words (Optional[Iterable[str]]): Precomputed word set of the reference
+                (from this scorer's tokenizer), used instead of tokenizing it
+
+        Returns:
+            Dict[str, int]: Column index of each reference word
+        """
+        with self._lock:
+            vocabulary = self._vocabularies.get(reference)
+            if vocabulary is not None:
+                self._vocabularies.move_to_end(reference)
+                self._hits += 1
+                return vocabulary
+
+        if reference_words is None:
+            reference_words = self.tokenize(reference)
+        vocabulary = {word: column for column, word in enumerate(sorted(set(reference_words)))}
+        with self._lock:
+            self._misses += 1
+            self._vocabularies[reference] = vocabulary
+            self._vocabularies.move_to_end(reference)
+            while len(self._vocabularies) > self.max_cached_references:
+                self._vocabularies.popitem(last=False)
+        return vocabulary
+
+    def score(self, user_text: str, reference: str, metric: str = 'jaccard',
+              reference_words: Optional[Iterable[str]] = None) -> float:
+        """
+        Score one submission against a reference.
+
+        Args:
+            user_text (str): Submission text
+            reference (str): Reference text
+            metric (str): ``jaccard`` (shared over all words) or ``overlap`` (shared over the smaller set)
+            reference_words (Optional[Iterable[str]]): Precomputed word set of the reference
+
+        Returns:
+            float: Similarity between 0.0 and 1.0
+        """
+        vocabulary = self.reference_vocabulary(reference, reference_words)
+        words = self.tokenize(user_text)
+        intersection = sum(1 for word in words if word in vocabulary)
+        return float(_similarity(np.array([intersection]), np.array([len(words)]), len(vocabulary), metric)[0])
+
+    def score_batch(self, user_texts: Sequence[str], reference: str, metric: str = 'jaccard',
+                    reference_words: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Score many submissions against one reference.
+
+        The submissions' word sets are laid out as a sparse binary matrix in
+        coordinate form (the row and reference column of each word, -1 for words
+        the reference does not contain). Intersection sizes are then the number
+        of matched entries per row, counted in one pass.
+
+        Args:
+            user_texts (Sequence[str]): Submission texts
+            reference (str): Reference text
+            metric (str): ``jaccard`` or ``overlap``
+            reference_words (Optional[Iterable[str]]): Precomputed word set of the reference
+
+        Returns:
+            np.ndarray: One similarity per submission, in order
+        """
+        vocabulary = self.reference_vocabulary(reference, reference_words)
+        word_sets = [self.tokenize(text) for text in user_texts]
+        user_sizes = np.fromiter((len(words) for words in word_sets), dtype=np.int64, count=len(word_sets))
+
+        columns = np.fromiter(
+            (vocabulary.get(word, -1) for words in word_sets for word in words),
+            dtype=np.int64, count=int(user_sizes.sum())
+        )
+        rows = np.repeat(np.arange(len(word_sets)), user_sizes)
+        matched = columns >= 0
+        intersection = np.bincount(rows[matched], minlength=len(word_sets))
+        return _similarity(intersection, user_sizes, len(vocabulary), metric)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get reference cache statistics.
+
+        Returns:
+            Dict[str, Any]: Tokenizer mode, cached references, hits and misses
+        """
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "cached_references": len(self._vocabularies),
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Admission Control Module
+
+This module bounds how much inference work the service takes on at once. A
+request is admitted when fewer than ``max_in_flight`` requests are being served,
+waits in a bounded queue otherwise, and is shed immediately when the queue is
+full (429) or when its deadline cannot be met given the current backlog (503).
+Shed requests carry a ``Retry-After`` estimate of how long the backlog takes to
+drain. Queue wait, service time and rejections are tracked per endpoint.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest observation in the service time estimate
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being admitted."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"Request rejected: {reason}")
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _EndpointStats:
+    """Counters and recent latency samples for one endpoint."""
+
+    def __init__(self, sample_size: int):
+        self.admitted = 0
+        self.completed = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "deadline": 0}
+        self.queue_wait: Deque[float] = deque(maxlen=sample_size)
+        self.service_time: Deque[float] = deque(maxlen=sample_size)
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Dict[str, Optional[float]]:
+        if not samples:
+            return {"mean": None, "p50": None, "p95": None, "max": None}
+        values = np.array(samples) * 1000
+        return {
+            "mean": round(float(values.mean()), 3),
+            "p50": round(float(np.percentile(values, 50)), 3),
+            "p95": round(float(np.percentile(values, 95)), 3),
+            "max": round(float(values.max()), 3)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "rejected": dict(self.rejected),
+            "queue_wait_ms": self._summary(self.queue_wait),
+            "service_time_ms": self._summary(self.service_time)
+        }
+
+
+class AdmissionController:
+    """
+    Bounded in-flight limit and wait queue in front of the evaluator, with deadline-based load shedding.
+    """
+
+    def __init__(self, max_in_flight: int = 32, max_queue: int = 128, default_deadline_ms: float = 5000.0,
+                 sample_size: int = 1024):
+        """
+        Initialize the controller.
+
+        Args:
+            max_in_flight (int): Maximum number of requests served concurrently
+            max_queue (int): Maximum number of requests waiting for a slot
+            default_deadline_ms (float): Deadline for requests that do not set one
+            sample_size (int): Number of recent latency samples kept per endpoint
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_queue = max(0, int(max_queue))
+        self.default_deadline_ms = float(default_deadline_ms)
+        self.sample_size = sample_size
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._queued = 0
+        self._service_estimate = 0.0
+        self._endpoints: Dict[str, _EndpointStats] = {}
+
+    def _endpoint(self, endpoint: str) -> _EndpointStats:
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = _EndpointStats(self.sample_size)
+        return self._endpoints[endpoint]
+
+    def _drain_seconds(self, backlog: int) -> float:
+        """Estimate how long ``backlog`` requests take to clear the in-flight slots."""
+        return backlog / self.max_in_flight * self._service_estimate
+
+    def _reject(self, stats: _EndpointStats, reason: str, status_code: int) -> AdmissionRejected:
+        stats.rejected[reason] += 1
+        retry_after = max(1, math.ceil(self._drain_seconds(self._queued + self._in_flight)))
+        return AdmissionRejected(reason, status_code, retry_after)
+
+    def acquire(self, endpoint: str, deadline_ms: Optional[float] = None) -> float:
+        """
+        Wait for an in-flight slot.
+
+        Args:
+            endpoint (str): Endpoint name used for statistics
+            deadline_ms (Optional[float]): Time budget of the request (default: ``default_deadline_ms``)
+
+        Returns:
+            float: Seconds spent waiting in the queue
+
+        Raises:
+            AdmissionRejected: With status 429 if the queue is full, or 503 if the
+                deadline cannot be met
+        """
+        started = time.monotonic()
+        deadline = started + (self.default_deadline_ms if deadline_ms is None else deadline_ms) / 1000.0
+
+        with self._condition:
+            stats = self._endpoint(endpoint)
+            if self._in_flight >= self.max_in_flight or self._queued > 0:
+                if self._queued >= self.max_queue:
+                    raise self._reject(stats, "queue_full", 429)
+                # Shed now rather than after waiting if the backlog already rules out the deadline
+                if started + self._drain_seconds(self._queued + 1) + self._service_estimate > deadline:
+                    raise self._reject(stats, "deadline", 503)
+
+                self._queued += 1
+                try:
+                    while self._in_flight >= self.max_in_flight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._reject(stats, "deadline", 503)
+                        self._condition.wait(remaining)
+                finally:
+                    self._queued -= 1
+
+            self._in_flight += 1
+            queue_wait = time.monotonic() - started
+            stats.admitted += 1
+            stats.queue_wait.append(queue_wait)
+            return queue_wait
+
+    def release(self, endpoint: str, service_seconds: float) -> None:
+        """
+        Free an in-flight slot and record the request's service time.
+
+        Args:
+            endpoint (str): Endpoint name used for statistics
+            service_seconds (float): Time the request spent being served
+        """
+        with self._condition:
+            self._in_flight -= 1
+            stats = self._endpoint(endpoint)
+            stats.completed += 1
+            stats.service_time.append(service_seconds)
+            if self._service_estimate:
+                self._service_estimate += SERVICE_TIME_SMOOTHING * (service_seconds - self._service_estimate)
+            else:
+                self._service_estimate = service_seconds
+            self._condition.notify()
+
+    def run(self, endpoint: str, fn: Callable[[], Any], deadline_ms: Optional[float] = None) -> Any:
+        """
+        Run ``fn`` once an in-flight slot is available.
+
+        Args:
+            endpoint (str): Endpoint name used for statistics
+            fn (Callable[[], Any]): Work to run
+            deadline_ms (Optional[float]): Time budget of the request (default: ``default_deadline_ms``)
+
+        Returns:
+            Any: The result of ``fn``
+
+        Raises:
+            AdmissionRejected: If the request is shed
+        """
+        self.acquire(endpoint, deadline_ms)
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.release(endpoint, time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get admission statistics.
+
+        Returns:
+            Dict[str, Any]: Limits, current load, service time estimate and per-endpoint
+                admissions, rejections, queue wait and service time in milliseconds
+        """
+        with self._condition:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "default_deadline_ms": self.default_deadline_ms,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "service_time_estimate_ms": round(self._service_estimate * 1000, 3),
+                "endpoints": {name: stats.to_dict() for name, stats in sorted(self._endpoints.items())}
+            }
@@ -1,9 +1,32 @@
-from flask import Flask, request, jsonify
+import time
+
+# Measure how long it takes before Flask can bind (heavy imports are deferred)
+APP_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, Request, Response, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 from summary_evaluation import SummaryEvaluator
+from length_bucketing import DEFAULT_LENGTH_BUCKETS, parse_length_buckets
+from request_coalescer import RequestCoalescer
+from reference_store import ReferenceEmbeddingStore
+from segment_index import SegmentIndex
+from text_segmentation import parse_segments
+from model_loader import HEAVY_MODULES, ModelLoader
+from model_artifacts import ArtifactError, enable_offline_mode, load_artifact_path, resolve_artifact
+from admission_control import AdmissionController, AdmissionRejected
+from job_queue import open_broker
+from video_jobs import VideoJobError, VideoJobManager
+from artifact_store import ArtifactStore
+from upload_storage import UploadRejected, UploadStorage
+from result_cache import make_key, open_result_cache
+from functools import wraps
+import json
 import logging
+import uuid
+
+import numpy as np
 
 # Load environment variables
 load_dotenv()
@@ -16,46 +39,446 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize the summary evaluator
-summary_evaluator = SummaryEvaluator()
+MODEL_NAME = os.getenv('MODEL_NAME', 'all-MiniLM-L6-v2')
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch')
+MODEL_ARTIFACT_DIR = os.getenv('MODEL_ARTIFACT_DIR')
+
+# Load from the local model artifact only, never from the network
+if MODEL_ARTIFACT_DIR:
+    enable_offline_mode()
+
+# Open the precomputed reference embedding store if one is configured
+reference_store = None
+if os.getenv('REFERENCE_STORE_DIR'):
+    reference_store = ReferenceEmbeddingStore(os.getenv('REFERENCE_STORE_DIR'), MODEL_NAME)
+
+# Per-video transcript segment embeddings for segment matching and coverage feedback
+segment_index = SegmentIndex(os.getenv('SEGMENT_INDEX_DIR', 'models/segment_index'), MODEL_NAME)
+SEGMENT_TOP_K = int(os.getenv('SEGMENT_TOP_K', 3))
+SEGMENT_COVERAGE_THRESHOLD = float(os.getenv('SEGMENT_COVERAGE_THRESHOLD', 0.5))
+
+def build_summary_evaluator():
+    """Build the summary evaluator from environment configuration"""
+    model_path = None
+    if MODEL_ARTIFACT_DIR:
+        model_path = load_artifact_path(
+            MODEL_ARTIFACT_DIR,
+            MODEL_NAME,
+            version=os.getenv('MODEL_VERSION') or None,
+            verify=os.getenv('MODEL_ARTIFACT_VERIFY', 'True').lower() == 'true'
+        )
+
+    return SummaryEvaluator(
+        model_name=MODEL_NAME,
+        cache_max_entries=int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 1024)),
+        cache_max_bytes=int(os.getenv('EMBEDDING_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        batch_size=int(os.getenv('ENCODE_BATCH_SIZE', 64)),
+        length_buckets=parse_length_buckets(os.getenv('LENGTH_BUCKETS', ','.join(map(str, DEFAULT_LENGTH_BUCKETS)))),
+        reference_store=reference_store,
+        backend=INFERENCE_BACKEND,
+        device=os.getenv('DEVICE', 'auto'),
+        onnx_model_dir=os.getenv('ONNX_MODEL_DIR'),
+        model_path=model_path,
+        chunk_long_texts=os.getenv('CHUNK_LONG_TEXTS', 'True').lower() == 'true',
+        chunk_aggregation=os.getenv('CHUNK_AGGREGATION', 'f1'),
+        chunk_overlap=int(os.getenv('CHUNK_OVERLAP', 1))
+    )
+
+# Load the summary evaluator, in the background unless LAZY_MODEL_LOAD is disabled
+model_loader = ModelLoader(
+    build_summary_evaluator,
+    heavy_modules=HEAVY_MODULES.get(INFERENCE_BACKEND),
+    warmup=os.getenv('MODEL_WARMUP', 'True').lower() == 'true'
+)
+model_loader.start(background=os.getenv('LAZY_MODEL_LOAD', 'True').lower() == 'true')
+
+def get_summary_evaluator():
+    """Get the loaded summary evaluator (raises ModelNotReady while loading)"""
+    return model_loader.get()
+
+# Coalesce concurrent single-pair requests into batched model calls
+request_coalescer = None
+if os.getenv('COALESCE_ENABLED', 'True').lower() == 'true':
+    request_coalescer = RequestCoalescer(
+        lambda user_texts, reference_texts: get_summary_evaluator().score_pairs(user_texts, reference_texts),
+        max_wait_ms=float(os.getenv('COALESCE_MAX_WAIT_MS', 5)),
+        max_batch_size=int(os.getenv('COALESCE_MAX_BATCH_SIZE', 32))
+    )
+
+# Cache results of repeated pairs, keyed by everything that determines the score
+result_cache = open_result_cache(
+    os.getenv('RESULT_CACHE_URL', 'memory'),
+    ttl=float(os.getenv('RESULT_CACHE_TTL', 3600)),
+    max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 10000)),
+    max_bytes=int(os.getenv('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+)
+
+def model_identity():
+    """Identify the model version scores come from, so a new artifact never serves cached scores"""
+    if MODEL_ARTIFACT_DIR:
+        try:
+            artifact = resolve_artifact(MODEL_ARTIFACT_DIR, MODEL_NAME, os.getenv('MODEL_VERSION') or None)
+            return f"{MODEL_NAME}@{os.path.basename(artifact)}"
+        except ArtifactError:
+            pass
+    return MODEL_NAME
+
+MODEL_IDENTITY = model_identity()
+SCORER_CONFIG = {
+    "backend": INFERENCE_BACKEND,
+    "onnx_model_dir": os.getenv('ONNX_MODEL_DIR') if INFERENCE_BACKEND != 'torch' else None,
+    "chunk_long_texts": os.getenv('CHUNK_LONG_TEXTS', 'True').lower() == 'true',
+    "chunk_aggregation": os.getenv('CHUNK_AGGREGATION', 'f1'),
+    "chunk_overlap": int(os.getenv('CHUNK_OVERLAP', 1))
+}
+
+def coalesced_score(user_text, reference_text):
+    """Score one pair through the request coalescer when it is enabled (raises on failure)"""
+    if request_coalescer is None:
+        return float(get_summary_evaluator().score_pairs([user_text], [reference_text])[0])
+    return float(request_coalescer.score(user_text, reference_text))
+
+def cached_score(user_text, reference_text):
+    """Score one pair, answering repeated pairs from the result cache when it is enabled"""
+    if result_cache is None:
+        return coalesced_score(user_text, reference_text)
+    result, status = result_cache.get_or_compute(
+        make_key('similarity', user_text, reference_text, MODEL_IDENTITY, SCORER_CONFIG),
+        lambda: {"similarity_score": coalesced_score(user_text, reference_text)}
+    )
+    if has_request_context():
+        g.result_cache = status
+    return result['similarity_score']
+
+def score_pair(user_text, reference_text):
+    """Score one pair, through the result cache and request coalescer when they are enabled"""
+    summary_evaluator = get_summary_evaluator()
+    if request_coalescer is None and result_cache is None:
+        return summary_evaluator.calculate_similarity_score(user_text, reference_text)
+    try:
+        return cached_score(user_text, reference_text)
+    except Exception as e:
+        logger.error(f"Error in cached scoring, scoring pair directly: {str(e)}")
+        return summary_evaluator.calculate_similarity_score(user_text, reference_text)
+
+def evaluate_pair(user_text, reference_text):
+    """Evaluate one pair, through the result cache and request coalescer when they are enabled"""
+    summary_evaluator = get_summary_evaluator()
+    if request_coalescer is None and result_cache is None:
+        return summary_evaluator.evaluate_summary(user_text, reference_text)
+    try:
+        similarity_score = cached_score(user_text, reference_text)
+    except Exception as e:
+        logger.error(f"Error in cached scoring, evaluating pair directly: {str(e)}")
+        return summary_evaluator.evaluate_summary(user_text, reference_text)
+    return summary_evaluator.build_evaluation(user_text, reference_text, similarity_score)
+
+# Bound concurrent inference and shed requests that cannot meet their deadline
+admission_controller = None
+if os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true':
+    admission_controller = AdmissionController(
+        max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', 32)),
+        max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', 128)),
+        default_deadline_ms=float(os.getenv('ADMISSION_DEFAULT_DEADLINE_MS', 5000))
+    )
+
+# Queue grading jobs for grading_worker.py processes when a broker is configured
+job_broker = None
+if os.getenv('JOB_BROKER_URL'):
+    job_broker = open_broker(os.getenv('JOB_BROKER_URL'), max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', 3)))
+JOB_MAX_PAIRS = int(os.getenv('JOB_MAX_PAIRS', 256))
+
+# Share derived video artifacts between uploads of the same content (set ARTIFACT_STORE_DIR= to disable)
+artifact_store = None
+if os.getenv('ARTIFACT_STORE_DIR', 'temp/artifacts'):
+    artifact_store = ArtifactStore(os.getenv('ARTIFACT_STORE_DIR', 'temp/artifacts'))
+
+# Extract audio and keyframes from uploaded videos in a background pool
+video_job_manager = VideoJobManager(
+    os.getenv('VIDEO_WORK_DIR', 'temp/videos'),
+    max_workers=int(os.getenv('VIDEO_JOB_WORKERS', 2)),
+    max_frames=int(os.getenv('MAX_FRAMES', 10)),
+    max_audio_length=float(os.getenv('MAX_AUDIO_LENGTH', 300)),
+    ffmpeg_path=os.getenv('FFMPEG_PATH', 'ffmpeg'),
+    artifact_store=artifact_store
+)
+
+# Stream uploads to disk in fixed-size chunks instead of spooling them in memory
+upload_storage = UploadStorage(
+    os.getenv('UPLOAD_STORAGE_DIR', 'temp/uploads'),
+    max_bytes=int(os.getenv('UPLOAD_MAX_BYTES', 4 * 1024 ** 3)),
+    allowed_types=tuple(t.strip() for t in os.getenv('UPLOAD_ALLOWED_TYPES', 'video/*,application/octet-stream').split(',')),
+    chunk_size=int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024)),
+    session_ttl=float(os.getenv('UPLOAD_SESSION_TTL', 24 * 3600))
+)
+# Allowance for multipart boundaries and form fields on top of the file itself
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
+
+class UploadRequest(Request):
+    """Request that writes multipart file parts straight into upload storage"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return upload_storage.open_writer(content_type, content_length)
+
+app.request_class = UploadRequest
+
+# Default aggregation of /evaluate-multi-reference scores: max, mean or top_k
+MULTI_REFERENCE_AGGREGATION = os.getenv('MULTI_REFERENCE_AGGREGATION', 'max')
+MULTI_REFERENCE_TOP_K = int(os.getenv('MULTI_REFERENCE_TOP_K', 2))
+
+# Largest M x K matrix /similarity-matrix computes per request
+SIMILARITY_MATRIX_MAX_CELLS = int(os.getenv('SIMILARITY_MATRIX_MAX_CELLS', 250000))
+
+# Pairs evaluated per chunk by /batch-evaluate/stream
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64))
+# Longest a streamed chunk waits for admission before the stream is stopped
+STREAM_ADMISSION_MAX_WAIT = float(os.getenv('STREAM_ADMISSION_MAX_WAIT', 60))
+
+def request_deadline_ms():
+    """Read the request's time budget from the X-Request-Deadline-Ms header, if set"""
+    try:
+        return float(request.headers['X-Request-Deadline-Ms'])
+    except (KeyError, ValueError):
+        return None
+
+def admission_controlled(view):
+    """Run a model-backed endpoint through the admission controller"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if admission_controller is None:
+            return view(*args, **kwargs)
+        try:
+            return admission_controller.run(request.endpoint, lambda: view(*args, **kwargs), request_deadline_ms())
+        except AdmissionRejected as e:
+            logger.warning(f"Shed {request.endpoint} request: {e.reason}")
+            response = jsonify({"error": "Server is overloaded, retry later", "reason": e.reason})
+            response.status_code = e.status_code
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+    return wrapper
+
+# Endpoints that can be served before the model has loaded
+MODEL_FREE_ENDPOINTS = {
+    'health_check', 'readiness_check', 'get_metrics', 'process_video', 'get_video_ai_status', 'reprocess_video',
+    'delete_video', 'create_upload', 'append_upload_chunk', 'get_upload', 'delete_upload', 'enqueue_jobs', 'get_job', 'static'
+}
+
+@app.before_request
+def require_model():
+    """Reject model-backed requests with 503 until the evaluator is ready"""
+    if request.endpoint is None or request.endpoint in MODEL_FREE_ENDPOINTS or request.method == 'OPTIONS' \
+            or model_loader.ready:
+        return None
+    response = jsonify({"error": "Model is not ready", "model": model_loader.status()})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+@app.after_request
+def add_cache_status(response):
+    """Tell clients whether the result came from the result cache (hit, miss or coalesced)"""
+    status = g.get('result_cache')
+    if status is not None:
+        response.headers['X-Cache'] = status
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "AI Video Evaluator"})
+    """Liveness check: the process is up and serving; only a failed model load is unhealthy"""
+    if model_loader.state == 'failed':
+        return jsonify({"status": "unhealthy", "service": "AI Video Evaluator", "model": model_loader.status()}), 503
+    return jsonify({"status": "healthy", "service": "AI Video Evaluator", "model_state": model_loader.state})
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check: the model is loaded and warmed up"""
+    status = model_loader.status()
+    status["app_import_seconds"] = APP_IMPORT_SECONDS
+    return jsonify(status), 200 if model_loader.ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Report evaluator runtime statistics"""
+    summary_evaluator = get_summary_evaluator() if model_loader.ready else None
+    return jsonify({
+        "model": model_loader.status(),
+        "embedding_cache": summary_evaluator.get_cache_stats() if summary_evaluator else None,
+        "padding": summary_evaluator.get_padding_stats() if summary_evaluator else None,
+        "coalescer": request_coalescer.stats() if request_coalescer else None,
+        "result_cache": result_cache.stats() if result_cache else None,
+        "admission": admission_controller.stats() if admission_controller else None,
+        "jobs": job_broker.stats() if job_broker else None,
+        "video_jobs": video_job_manager.stats(),
+        "uploads": upload_storage.stats(),
+        "artifacts": artifact_store.stats() if artifact_store else None,
+        "reference_store": {"entries": len(reference_store)} if reference_store else None,
+        "segment_index": segment_index.stats()
+    })
 
 @app.route('/process-video', methods=['POST'])
 def process_video():
-    """Process video and extract understanding - Simplified for summary evaluation"""
+    """Store an uploaded video and queue audio/keyframe extraction, returning a job id right away"""
     try:
-        if 'video' not in request.files:
+        # Reject oversized bodies from the declared length before reading any of it
+        if (request.content_length or 0) > upload_storage.max_bytes + UPLOAD_FORM_OVERHEAD_BYTES:
+            return jsonify({"error": f"Upload exceeds the {upload_storage.max_bytes} byte limit"}), 413
+
+        upload_id = request.form.get('upload_id')
+        if 'video' not in request.files and not upload_id:
             return jsonify({"error": "No video file provided"}), 400
 
-        video_file = request.files['video']
         user_text = request.form.get('user_text', '')
 
         if not user_text:
             return jsonify({"error": "No user text provided"}), 400
 
-        # For now, return basic video info since we're focusing on summary evaluation
-        # In a full implementation, you would add video processing here
+        video_id = request.form.get('video_id') or uuid.uuid4().hex
+        try:
+            # Answer early, before a resumable upload is claimed; submit() checks again before replacing anything
+            if video_job_manager.in_progress(video_id):
+                return jsonify({"error": f"Video {video_id} is already being processed"}), 409
+            if upload_id:
+                # A completed resumable upload is moved into place instead of being sent again
+                session = upload_storage.get_session(upload_id)
+                if session is None:
+                    return jsonify({"error": "Unknown upload"}), 404
+                if not session['complete']:
+                    return jsonify({"error": "Upload is incomplete", "upload": session}), 409
+                filename = session['filename']
+                staged_path = video_job_manager.staging_path_for(video_id, filename)
+                upload = upload_storage.claim_session(upload_id, staged_path)
+            else:
+                video_file = request.files['video']
+                filename = video_file.filename
+                staged_path = video_job_manager.staging_path_for(video_id, filename)
+                upload = video_file.stream.commit(staged_path)
+            # The new upload replaces the current one only if no job for the video is still reading it
+            job = video_job_manager.submit(video_id, {"filename": filename, "sha256": upload['sha256']}, staged_path)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except VideoJobError as e:
+            return jsonify({"error": str(e)}), 409
+
         video_understanding = {
-            "filename": video_file.filename,
+            "filename": filename,
             "user_text": user_text,
-            "status": "processed",
-            "message": "Video received successfully. Use /evaluate-summary for evaluation."
+            "video_id": video_id,
+            "size": upload['size'],
+            "sha256": upload['sha256'],
+            "job_id": job['job_id'],
+            "status": job['state'],
+            "deduplicated": job.get('deduplicated', False),
+            "status_url": f"/videos/{video_id}/ai-status",
+            "message": "Video received and queued for processing. Use /evaluate-summary for evaluation."
         }
 
         return jsonify({
             "video_understanding": video_understanding,
             "user_text": user_text
-        })
+        }), 202
 
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def upload_response(session, status_code=200):
+    """Return a resumable upload's state, with its offset also in the Upload-Offset header"""
+    response = jsonify(session)
+    response.status_code = status_code
+    response.headers['Upload-Offset'] = str(session['offset'])
+    return response
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a resumable upload of a large video"""
+    try:
+        data = request.get_json() or {}
+        session = upload_storage.create_session(
+            data.get('filename', ''),
+            data.get('size'),
+            data.get('content_type'),
+            sha256=data.get('sha256')
+        )
+        response = upload_response(session, 201)
+        response.headers['Location'] = f"/uploads/{session['upload_id']}"
+        return response
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error creating upload: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/uploads/<upload_id>', methods=['PATCH'])
+def append_upload_chunk(upload_id):
+    """Append the request body to a resumable upload at the offset in the Upload-Offset header"""
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+    try:
+        return upload_response(upload_storage.append_chunk(upload_id, offset, request.stream))
+    except UploadRejected as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = e.status_code
+        session = upload_storage.get_session(upload_id)
+        if session is not None:
+            # Tell the client where to resume from
+            response.headers['Upload-Offset'] = str(session['offset'])
+        return response
+    except Exception as e:
+        logger.error(f"Error appending to upload {upload_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Get a resumable upload's size, offset and completion"""
+    session = upload_storage.get_session(upload_id)
+    if session is None:
+        return jsonify({"error": "Unknown upload"}), 404
+    return upload_response(session)
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def delete_upload(upload_id):
+    """Abandon a resumable upload"""
+    if upload_storage.get_session(upload_id) is None:
+        return jsonify({"error": "Unknown upload"}), 404
+    upload_storage.discard_session(upload_id)
+    return '', 204
+
+@app.route('/videos/<video_id>/ai-status', methods=['GET'])
+def get_video_ai_status(video_id):
+    """Get the processing state, stage and progress of an uploaded video"""
+    status = video_job_manager.get_status(video_id)
+    if status is None:
+        return jsonify({"error": "Video not found"}), 404
+    return jsonify(status)
+
+@app.route('/videos/<video_id>/reprocess', methods=['POST'])
+def reprocess_video(video_id):
+    """Queue processing of an uploaded video again"""
+    try:
+        job = video_job_manager.submit(video_id)
+    except (ValueError, VideoJobError) as e:
+        status_code = 404 if video_job_manager.get_status(video_id) is None else 409
+        return jsonify({"error": str(e)}), status_code
+    return jsonify(job), 202
+
+@app.route('/videos/<video_id>', methods=['DELETE'])
+def delete_video(video_id):
+    """Delete an uploaded video and release its stored artifacts"""
+    try:
+        if not video_job_manager.delete(video_id):
+            return jsonify({"error": "Video not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except VideoJobError as e:
+        return jsonify({"error": str(e)}), 409
+    return '', 204
+
 @app.route('/evaluate-summary', methods=['POST'])
+@admission_controlled
 def evaluate_summary():
     """Evaluate user text against video summary using SummaryEvaluator"""
     try:
@@ -74,7 +497,7 @@ def evaluate_summary():
             return jsonify({"error": "Missing video_summary"}), 400
 
         # Use the new SummaryEvaluator to evaluate the user's summary
-        evaluation_results = summary_evaluator.evaluate_summary(user_text, video_summary)
+        evaluation_results = evaluate_pair(user_text, video_summary)
 
         # Add additional context from video understanding if available
         if video_understanding:
@@ -89,7 +512,51 @@ def evaluate_summary():
         logger.error(f"Error evaluating summary: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/evaluate-multi-reference', methods=['POST'])
+@admission_controlled
+def evaluate_multi_reference():
+    """Evaluate user text against several reference summaries of the same video"""
+    try:
+        data = request.get_json()
+
+        user_text = data.get('user_text')
+        reference_summaries = list(data.get('reference_summaries') or [])
+        reference_ids = data.get('reference_ids') or []
+
+        if not user_text:
+            return jsonify({"error": "Missing user_text"}), 400
+
+        # References can also be looked up by id in the reference store
+        if reference_ids and reference_store is None:
+            return jsonify({"error": "reference_ids requires a reference store (REFERENCE_STORE_DIR)"}), 400
+        for reference_id in reference_ids:
+            reference_text = reference_store.get_text(reference_id)
+            if not reference_text:
+                return jsonify({"error": f"Unknown reference_id: {reference_id}"}), 400
+            reference_summaries.append(reference_text)
+
+        if not reference_summaries or not all(isinstance(text, str) and text for text in reference_summaries):
+            return jsonify({"error": "Missing or empty reference_summaries"}), 400
+
+        try:
+            summary_evaluator = get_summary_evaluator()
+            evaluation_results = summary_evaluator.evaluate_multi_reference(
+                user_text,
+                reference_summaries,
+                aggregation=data.get('aggregation', MULTI_REFERENCE_AGGREGATION),
+                top_k=int(data.get('top_k', MULTI_REFERENCE_TOP_K))
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(evaluation_results)
+
+    except Exception as e:
+        logger.error(f"Error evaluating against multiple references: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/compare-texts', methods=['POST'])
+@admission_controlled
 def compare_texts():
     """Compare user text with reference text using SummaryEvaluator"""
     try:
@@ -106,7 +573,7 @@ def compare_texts():
             return jsonify({"error": "Missing reference_text"}), 400
 
         # Use SummaryEvaluator to compare texts
-        comparison_results = summary_evaluator.evaluate_summary(user_text, reference_text)
+        comparison_results = evaluate_pair(user_text, reference_text)
 
         # Add context information
         comparison_results['comparison_type'] = 'text_comparison'
@@ -120,6 +587,7 @@ def compare_texts():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/batch-evaluate', methods=['POST'])
+@admission_controlled
 def batch_evaluate():
     """Evaluate multiple user summaries against reference summaries"""
     try:
@@ -135,7 +603,7 @@ def batch_evaluate():
             return jsonify({"error": "Number of user summaries must match reference summaries"}), 400
 
         # Use batch evaluation
-        batch_results = summary_evaluator.batch_evaluate(user_summaries, reference_summaries)
+        batch_results = get_summary_evaluator().batch_evaluate(user_summaries, reference_summaries)
 
         return jsonify({
             "batch_results": batch_results,
@@ -147,7 +615,161 @@ def batch_evaluate():
         logger.error(f"Error in batch evaluation: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def parse_stream_line(line, default_reference_id=None):
+    """Parse one NDJSON input line into the item, user text and reference text"""
+    return resolve_pair(json.loads(line), default_reference_id)
+
+def resolve_pair(item, default_reference_id=None):
+    """Validate a pair object and resolve its reference text, looking up reference_id if needed"""
+    if not isinstance(item, dict):
+        raise ValueError("Each pair must be a JSON object")
+
+    user_text = item.get('user_text')
+    if not user_text:
+        raise ValueError("Missing user_text")
+
+    reference_text = item.get('reference_text')
+    if not reference_text:
+        reference_id = item.get('reference_id', default_reference_id)
+        if not reference_id:
+            raise ValueError("Missing reference_text or reference_id")
+        if reference_store is None:
+            raise ValueError("reference_id requires a reference store (REFERENCE_STORE_DIR)")
+        reference_text = reference_store.get_text(reference_id)
+        if not reference_text:
+            raise ValueError(f"Unknown reference_id: {reference_id}")
+
+    return item, user_text, reference_text
+
+def evaluate_stream_chunk(summary_evaluator, chunk):
+    """Evaluate one chunk of streamed pairs, waiting up to STREAM_ADMISSION_MAX_WAIT for admission"""
+    user_texts = [user_text for _, _, user_text, _ in chunk]
+    reference_texts = [reference_text for _, _, _, reference_text in chunk]
+    if admission_controller is None:
+        return summary_evaluator.batch_evaluate(user_texts, reference_texts)
+    give_up_at = time.monotonic() + STREAM_ADMISSION_MAX_WAIT
+    while True:
+        try:
+            return admission_controller.run(
+                'batch_evaluate_stream',
+                lambda: summary_evaluator.batch_evaluate(user_texts, reference_texts)
+            )
+        except AdmissionRejected as e:
+            # The response has already started, so apply backpressure rather than shedding,
+            # but do not hold the request thread forever if the overload persists
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise
+            time.sleep(min(e.retry_after, remaining))
+
+@app.route('/batch-evaluate/stream', methods=['POST'])
+def batch_evaluate_stream():
+    """Evaluate NDJSON pairs in fixed-size chunks, streaming one NDJSON result per line"""
+    summary_evaluator = get_summary_evaluator()
+    default_reference_id = request.args.get('reference_id')
+
+    def generate():
+        chunk = []
+        total_evaluations = 0
+        errors = 0
+        score_sum = 0.0
+        stopped = False
+
+        def flush():
+            nonlocal total_evaluations, score_sum, stopped
+            try:
+                results = evaluate_stream_chunk(summary_evaluator, chunk)
+            except AdmissionRejected as e:
+                logger.warning(f"Stopped /batch-evaluate/stream: still overloaded after {STREAM_ADMISSION_MAX_WAIT}s")
+                yield json.dumps({
+                    "error": "Server is overloaded, stream stopped",
+                    "reason": e.reason,
+                    "retry_after": e.retry_after,
+                    "resume_from_index": chunk[0][0]
+                }) + '\n'
+                stopped = True
+                return
+            for (index, item, _, _), result in zip(chunk, results):
+                total_evaluations += 1
+                score_sum += result.get('similarity_score', 0)
+                line = {"index": index}
+                if 'id' in item:
+                    line['id'] = item['id']
+                line.update(result)
+                yield json.dumps(line) + '\n'
+            chunk.clear()
+
+        for index, line in enumerate(request.stream):
+            if not line.strip():
+                continue
+            try:
+                chunk.append((index, *parse_stream_line(line, default_reference_id)))
+            except ValueError as e:
+                errors += 1
+                yield json.dumps({"index": index, "error": str(e)}) + '\n'
+                continue
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield from flush()
+                if stopped:
+                    return
+        if chunk:
+            yield from flush()
+            if stopped:
+                return
+
+        yield json.dumps({"summary": {
+            "total_evaluations": total_evaluations,
+            "errors": errors,
+            "average_score": score_sum / total_evaluations if total_evaluations else 0
+        }}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs', methods=['POST'])
+def enqueue_jobs():
+    """Enqueue pairs as grading jobs for queue workers"""
+    if job_broker is None:
+        return jsonify({"error": "Job queue is not configured (JOB_BROKER_URL)"}), 503
+    try:
+        data = request.get_json()
+        pairs = data.get('pairs', [])
+        if not pairs:
+            return jsonify({"error": "Missing pairs"}), 400
+
+        resolved = []
+        for index, item in enumerate(pairs):
+            try:
+                item, user_text, reference_text = resolve_pair(item, data.get('reference_id'))
+            except ValueError as e:
+                return jsonify({"error": str(e), "index": index}), 400
+            pair = {"user_text": user_text, "reference_text": reference_text}
+            if 'id' in item:
+                pair['id'] = item['id']
+            resolved.append(pair)
+
+        # Split large submissions so several workers can share them
+        job_ids = [
+            job_broker.enqueue({"pairs": resolved[start:start + JOB_MAX_PAIRS]})
+            for start in range(0, len(resolved), JOB_MAX_PAIRS)
+        ]
+        return jsonify({"job_ids": job_ids, "total_pairs": len(resolved)}), 202
+
+    except Exception as e:
+        logger.error(f"Error enqueueing jobs: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get a grading job's state and, once done, its results"""
+    if job_broker is None:
+        return jsonify({"error": "Job queue is not configured (JOB_BROKER_URL)"}), 503
+    job = job_broker.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
 @app.route('/similarity-score', methods=['POST'])
+@admission_controlled
 def get_similarity_score():
     """Get just the similarity score between two texts"""
     try:
@@ -160,7 +782,8 @@ def get_similarity_score():
             return jsonify({"error": "Missing user_text or reference_text"}), 400
 
         # Calculate similarity score only
-        similarity_score = summary_evaluator.calculate_similarity_score(user_text, reference_text)
+        summary_evaluator = get_summary_evaluator()
+        similarity_score = score_pair(user_text, reference_text)
         feedback_message = summary_evaluator.get_feedback_message(similarity_score)
         performance_level = summary_evaluator.get_performance_level(similarity_score)
 
@@ -174,6 +797,114 @@ def get_similarity_score():
         logger.error(f"Error calculating similarity score: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/videos/<video_id>/segments', methods=['PUT'])
+@admission_controlled
+def put_video_segments(video_id):
+    """Encode and index a video's transcript segments"""
+    try:
+        data = request.get_json()
+
+        transcript = data.get('segments', data.get('transcript'))
+        if not transcript:
+            return jsonify({"error": "Missing segments or transcript"}), 400
+
+        try:
+            segments = parse_segments(transcript, int(data.get('sentences_per_segment', 3)))
+            summary_evaluator = get_summary_evaluator()
+            result = segment_index.build(video_id, segments, summary_evaluator.encode_texts)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Error indexing segments for video {video_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/evaluate-segments', methods=['POST'])
+@admission_controlled
+def evaluate_segments():
+    """Match each sentence of a summary to the video's transcript segments and report uncovered parts"""
+    try:
+        data = request.get_json()
+
+        user_text = data.get('user_text')
+        video_id = data.get('video_id')
+
+        if not user_text or video_id is None:
+            return jsonify({"error": "Missing user_text or video_id"}), 400
+
+        try:
+            indexed = segment_index.get(video_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if indexed is None:
+            return jsonify({"error": f"No segments indexed for video {video_id}"}), 404
+        segments, segment_embeddings = indexed
+
+        summary_evaluator = get_summary_evaluator()
+        result = summary_evaluator.match_segments(
+            user_text,
+            segments,
+            segment_embeddings,
+            top_k=int(data.get('top_k', SEGMENT_TOP_K)),
+            coverage_threshold=float(data.get('coverage_threshold', SEGMENT_COVERAGE_THRESHOLD))
+        )
+        result['video_id'] = video_id
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Error evaluating segments: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/similarity-matrix', methods=['POST'])
+@admission_controlled
+def get_similarity_matrix():
+    """Score every user text against every reference, e.g. to attribute submissions to videos"""
+    try:
+        data = request.get_json()
+
+        user_texts = data.get('user_texts') or []
+        reference_texts = list(data.get('reference_texts') or [])
+        reference_ids = data.get('reference_ids') or []
+
+        # References can also be looked up by id in the reference store
+        if reference_ids and reference_store is None:
+            return jsonify({"error": "reference_ids requires a reference store (REFERENCE_STORE_DIR)"}), 400
+        labels = [None] * len(reference_texts) + list(reference_ids)
+        for reference_id in reference_ids:
+            reference_text = reference_store.get_text(reference_id)
+            if not reference_text:
+                return jsonify({"error": f"Unknown reference_id: {reference_id}"}), 400
+            reference_texts.append(reference_text)
+
+        if not user_texts or not reference_texts:
+            return jsonify({"error": "Missing user_texts or reference_texts"}), 400
+        if not all(isinstance(text, str) and text for text in user_texts + reference_texts):
+            return jsonify({"error": "Texts must be non-empty strings"}), 400
+        if len(user_texts) * len(reference_texts) > SIMILARITY_MATRIX_MAX_CELLS:
+            return jsonify({"error": f"Matrix exceeds {SIMILARITY_MATRIX_MAX_CELLS} cells; use grade_cli.py offline"}), 413
+
+        summary_evaluator = get_summary_evaluator()
+        scores = summary_evaluator.similarity_matrix(user_texts, reference_texts)
+        best = scores.argmax(axis=1)
+
+        return jsonify({
+            "shape": list(scores.shape),
+            "scores": scores.astype(np.float64).round(3).tolist(),
+            "best_match": [
+                {"reference_index": int(j), "reference_id": labels[j], "score": round(float(scores[i, j]), 3)}
+                for i, j in enumerate(best)
+            ]
+        })
+
+    except Exception as e:
+        logger.error(f"Error calculating similarity matrix: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+APP_IMPORT_SECONDS = round(time.perf_counter() - APP_IMPORT_STARTED, 3)
+logger.info(f"App imported in {APP_IMPORT_SECONDS}s; model state: {model_loader.state}")
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('DEBUG', 'False').lower() == 'true'
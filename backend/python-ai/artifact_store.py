@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Artifact Store Module
+
+This module keeps derived video artifacts (extracted audio, keyframes,
+transcripts, reference embeddings, ...) in a content-addressed store keyed by
+the SHA-256 of the uploaded video. A repeated upload of the same video resolves
+to the artifacts already in the store instead of being processed again.
+
+Each object records which videos reference it. Objects nobody references are
+removed by the ``gc`` command once a grace period has passed. Garbage
+collection holds an exclusive lock on the store; writers hold a shared one, so
+an object cannot be collected while it is being referenced.
+
+Layout:
+    <root>/objects/<aa>/<sha256>/<name>         artifact file or directory
+    <root>/objects/<aa>/<sha256>/refs/<ref>     one empty file per referencing video
+    <root>/staging/                             artifacts being moved into place
+
+Usage:
+    python artifact_store.py stats --root temp/artifacts
+    python artifact_store.py gc --root temp/artifacts --grace-seconds 3600 [--dry-run]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from file_locks import lock_file, unlock_file
+
+logger = logging.getLogger(__name__)
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}$")
+REFS_DIRNAME = 'refs'
+LOCK_FILENAME = 'store.lock'
+
+
+def _tree_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, filename)) for filename in filenames)
+    return total
+
+
+class ArtifactStore:
+    """
+    Content-addressed store of derived artifacts with per-object reference counts.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the store.
+
+        Args:
+            root (str): Store directory
+        """
+        self.root = root
+        self._objects_dir = os.path.join(root, 'objects')
+        self._staging_dir = os.path.join(root, 'staging')
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._staging_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False) -> Iterator[None]:
+        with open(os.path.join(self.root, LOCK_FILENAME), 'a') as handle:
+            lock_file(handle, exclusive=exclusive)
+            try:
+                yield
+            finally:
+                unlock_file(handle)
+
+    def object_dir(self, digest: str) -> str:
+        """
+        Get the directory of an object.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+
+        Returns:
+            str: Object directory (which may not exist yet)
+        """
+        if not DIGEST_PATTERN.match(digest or ''):
+            raise ValueError(f"Invalid digest: {digest}")
+        return os.path.join(self._objects_dir, digest[:2], digest)
+
+    def artifact_path(self, digest: str, name: str) -> Optional[str]:
+        """
+        Get the path of a stored artifact.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+            name (str): Artifact name
+
+        Returns:
+            Optional[str]: Path of the artifact, or None if it is not stored
+        """
+        path = os.path.join(self.object_dir(digest), name)
+        return path if os.path.exists(path) else None
+
+    def put_artifact(self, digest: str, name: str, source_path: str, link: bool = False) -> str:
+        """
+        Move a file or directory into the store as a named artifact.
+
+        If the artifact is already stored (for example by a concurrent job on the
+        same content), the stored copy wins and ``source_path`` is deleted.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+            name (str): Artifact name
+            source_path (str): File or directory to move into the store
+            link (bool): Hard-link a file into the store and leave ``source_path`` in place
+
+        Returns:
+            str: Path of the stored artifact
+        """
+        if not NAME_PATTERN.match(name) or name == REFS_DIRNAME:
+            raise ValueError(f"Invalid artifact name: {name}")
+        object_dir = self.object_dir(digest)
+        destination = os.path.join(object_dir, name)
+
+        with self._locked():
+            os.makedirs(os.path.join(object_dir, REFS_DIRNAME), exist_ok=True)
+            if not os.path.exists(destination):
+                # Stage next to the store so the final rename is atomic
+                staged = os.path.join(self._staging_dir, f"{uuid.uuid4().hex}-{name}")
+                if link:
+                    os.link(source_path, staged)
+                else:
+                    shutil.move(source_path, staged)
+                try:
+                    os.rename(staged, destination)
+                    os.utime(object_dir)
+                    return destination
+                except OSError:
+                    if not os.path.exists(destination):
+                        raise
+                    source_path = staged
+            elif link:
+                return destination
+
+        if os.path.isdir(source_path):
+            shutil.rmtree(source_path, ignore_errors=True)
+        elif os.path.exists(source_path):
+            os.remove(source_path)
+        return destination
+
+    def put_json(self, digest: str, name: str, data: Dict[str, Any]) -> str:
+        """
+        Store a JSON document as a named artifact.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+            name (str): Artifact name
+            data (Dict[str, Any]): Document to store
+
+        Returns:
+            str: Path of the stored artifact
+        """
+        staged = os.path.join(self._staging_dir, f"{uuid.uuid4().hex}.json")
+        with open(staged, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        return self.put_artifact(digest, name, staged)
+
+    def get_json(self, digest: str, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a JSON artifact.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+            name (str): Artifact name
+
+        Returns:
+            Optional[Dict[str, Any]]: The document, or None if it is not stored
+        """
+        path = self.artifact_path(digest, name)
+        if path is None:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def add_ref(self, digest: str, ref: str) -> None:
+        """
+        Record that ``ref`` (e.g. a video id) uses an object.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+            ref (str): Referencing id
+        """
+        if not NAME_PATTERN.match(ref):
+            raise ValueError(f"Invalid reference: {ref}")
+        refs_dir = os.path.join(self.object_dir(digest), REFS_DIRNAME)
+        with self._locked():
+            os.makedirs(refs_dir, exist_ok=True)
+            open(os.path.join(refs_dir, ref), 'a').close()
+
+    def remove_ref(self, digest: str, ref: str) -> None:
+        """
+        Drop a reference; the object becomes collectable when none remain.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+            ref (str): Referencing id
+        """
+        object_dir = self.object_dir(digest)
+        try:
+            os.remove(os.path.join(object_dir, REFS_DIRNAME, ref))
+            # Start the grace period from the last release
+            os.utime(object_dir)
+        except FileNotFoundError:
+            pass
+
+    def refs(self, digest: str) -> List[str]:
+        """
+        List the references to an object.
+
+        Args:
+            digest (str): Hex SHA-256 of the source content
+
+        Returns:
+            List[str]: Referencing ids
+        """
+        try:
+            return sorted(os.listdir(os.path.join(self.object_dir(digest), REFS_DIRNAME)))
+        except FileNotFoundError:
+            return []
+
+    def _iter_objects(self) -> Iterator[str]:
+        for prefix in sorted(os.listdir(self._objects_dir)):
+            prefix_dir = os.path.join(self._objects_dir, prefix)
+            if os.path.isdir(prefix_dir):
+                for digest in sorted(os.listdir(prefix_dir)):
+                    if DIGEST_PATTERN.match(digest):
+                        yield digest
+
+    def gc(self, grace_seconds: float = 3600, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Remove objects without references, and abandoned staging files.
+
+        Args:
+            grace_seconds (float): Only remove objects unreferenced and untouched for this long
+            dry_run (bool): Report what would be removed without removing it
+
+        Returns:
+            Dict[str, Any]: Removed digests, bytes freed and number of objects kept
+        """
+        cutoff = time.time() - grace_seconds
+        removed = []
+        freed_bytes = 0
+        kept = 0
+
+        with self._locked(exclusive=True):
+            for digest in list(self._iter_objects()):
+                object_dir = self.object_dir(digest)
+                if self.refs(digest) or os.path.getmtime(object_dir) > cutoff:
+                    kept += 1
+                    continue
+                freed_bytes += _tree_size(object_dir)
+                removed.append(digest)
+                if not dry_run:
+                    shutil.rmtree(object_dir, ignore_errors=True)
+                    try:
+                        os.rmdir(os.path.dirname(object_dir))
+                    except OSError:
+                        pass
+
+            # Leftovers from a process that died mid-move
+            for filename in os.listdir(self._staging_dir):
+                path = os.path.join(self._staging_dir, filename)
+                if os.path.getmtime(path) <= cutoff:
+                    freed_bytes += _tree_size(path)
+                    if dry_run:
+                        continue
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+
+        if removed:
+            logger.info(f"{'Would remove' if dry_run else 'Removed'} {len(removed)} unreferenced artifact objects "
+                        f"({freed_bytes} bytes)")
+        return {"removed": removed, "freed_bytes": freed_bytes, "kept": kept, "dry_run": dry_run}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dict[str, Any]: Number of objects, how many are referenced, and total references
+        """
+        objects = referenced = references = 0
+        for digest in self._iter_objects():
+            count = len(self.refs(digest))
+            objects += 1
+            referenced += 1 if count else 0
+            references += count
+        return {"objects": objects, "referenced_objects": referenced, "references": references}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for store maintenance."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed artifact store")
+    parser.add_argument('command', choices=['stats', 'gc'])
+    parser.add_argument('--root', default=os.getenv('ARTIFACT_STORE_DIR', 'temp/artifacts'), help="Store directory")
+    parser.add_argument('--grace-seconds', type=float, default=3600,
+                        help="Keep unreferenced objects touched more recently than this")
+    parser.add_argument('--dry-run', action='store_true', help="Report what gc would remove")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    store = ArtifactStore(args.root)
+    if args.command == 'gc':
+        print(json.dumps(store.gc(args.grace_seconds, args.dry_run), indent=2))
+    else:
+        print(json.dumps(store.stats(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
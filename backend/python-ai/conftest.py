@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Pytest configuration for the AI service.
+
+``test_api.py`` exercises a running server and is run directly
+(``python test_api.py``), so pytest does not collect it.
+"""
+
+collect_ignore = ["test_api.py"]
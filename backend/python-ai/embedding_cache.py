@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding Cache Module
+
+This module provides a bounded, thread-safe LRU cache for sentence embeddings
+so that reference summaries shared by many submissions are encoded only once.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings keyed by (model name, content hash) with entry and byte limits.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            max_entries (int): Maximum number of embeddings kept in the cache
+            max_bytes (int): Maximum total size of cached embeddings in bytes
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, model_name: str) -> Tuple[str, str]:
+        """
+        Build the cache key for a text encoded by a given model.
+
+        Args:
+            text (str): Text that was encoded
+            model_name (str): Name of the model that produced the embedding
+
+        Returns:
+            Tuple[str, str]: Model name and SHA-256 digest of the text
+        """
+        return model_name, hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, text: str, model_name: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding and mark it as most recently used.
+
+        Args:
+            text (str): Text to look up
+            model_name (str): Name of the model that produced the embedding
+
+        Returns:
+            Optional[np.ndarray]: Cached embedding, or None on a miss
+        """
+        key = self.make_key(text, model_name)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, text: str, model_name: str, embedding: np.ndarray) -> None:
+        """
+        Store an embedding, evicting least recently used entries to respect the limits.
+
+        Args:
+            text (str): Text that was encoded
+            model_name (str): Name of the model that produced the embedding
+            embedding (np.ndarray): Embedding vector to cache
+        """
+        size = int(embedding.nbytes)
+        if self.max_entries == 0 or size > self.max_bytes:
+            return
+
+        key = self.make_key(text, model_name)
+        # Copy so a row view never pins its whole batch matrix, and freeze the
+        # copy because cached arrays are shared between callers
+        embedding = np.array(embedding, copy=True)
+        embedding.setflags(write=False)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= int(previous.nbytes)
+
+            self._entries[key] = embedding
+            self._current_bytes += size
+
+            while len(self._entries) > self.max_entries or self._current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= int(evicted.nbytes)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached embeddings and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage statistics.
+
+        Returns:
+            Dict[str, Any]: Entry and byte usage, limits, hit/miss/eviction counters and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
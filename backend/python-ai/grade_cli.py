@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk Grading Module
+
+This module grades a file of submissions offline with ``SummaryEvaluator``,
+without going through the HTTP service. Submissions are split into fixed-size
+shards that are evaluated in a pool of worker processes, each loading the model
+once. Every finished shard is checkpointed to its own file, so an interrupted
+run picks up where it stopped, and the shards are merged into a JSONL or
+Parquet result file at the end.
+
+Each input row needs ``user_text`` and either ``reference_text`` or a
+``reference_id`` looked up in ``--catalog`` or ``--reference-store``; an ``id``
+column is carried through to the results.
+
+Usage:
+    python grade_cli.py submissions.csv --output results.jsonl --workers 4
+    python grade_cli.py submissions.jsonl --output results.parquet --catalog catalog.json
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_MANIFEST_FILENAME = 'checkpoint.json'
+
+# Flat columns written to Parquet; the full evaluation is kept as JSON alongside
+PARQUET_COLUMNS = [
+    ('index', 'int64'),
+    ('id', 'string'),
+    ('similarity_score', 'float64'),
+    ('performance_level', 'string'),
+    ('feedback_message', 'string'),
+    ('comprehensiveness_score', 'float64'),
+    ('length_ratio', 'float64'),
+    ('length_feedback', 'string'),
+    ('error', 'string'),
+    ('evaluation', 'string'),
+]
+
+# Per-process evaluator and reference lookups, built once by the pool initializer
+_worker: Dict[str, Any] = {}
+
+# Key of rows the reader could not parse; they are graded as a per-row error
+ROW_ERROR_KEY = '_error'
+
+
+def read_submissions(path: str, input_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream submissions from a CSV or JSONL file.
+
+    Args:
+        path (str): Input file path
+        input_format (Optional[str]): ``csv`` or ``jsonl`` (default: from the file extension)
+
+    Returns:
+        Iterator[Dict[str, Any]]: One row per submission; a line that is not a JSON object
+            becomes a row holding only ``ROW_ERROR_KEY``
+    """
+    input_format = input_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if input_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield {ROW_ERROR_KEY: f"Invalid JSON: {str(e)}"}
+                    continue
+                yield row if isinstance(row, dict) else {ROW_ERROR_KEY: "Row is not a JSON object"}
+
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    """Load the evaluator and reference lookups once per worker process."""
+    from summary_evaluation import SummaryEvaluator
+    from reference_store import ReferenceEmbeddingStore, load_catalog
+
+    logging.basicConfig(level=logging.WARNING)
+    reference_store = None
+    if options['reference_store']:
+        reference_store = ReferenceEmbeddingStore(options['reference_store'], options['model'])
+
+    evaluator = SummaryEvaluator(
+        model_name=options['model'],
+        batch_size=options['batch_size'],
+        reference_store=reference_store,
+        backend=options['backend'],
+        device=options['device'],
+        onnx_model_dir=options['onnx_dir'],
+        chunk_long_texts=options.get('chunk_long_texts', False),
+        chunk_aggregation=options.get('chunk_aggregation', 'f1'),
+        chunk_overlap=options.get('chunk_overlap', 1)
+    )
+    if options['threads_per_worker'] and evaluator.device == 'cpu':
+        evaluator.encoder.set_num_threads(options['threads_per_worker'])
+
+    _worker['evaluator'] = evaluator
+    _worker['reference_store'] = reference_store
+    _worker['catalog'] = load_catalog(options['catalog']) if options['catalog'] else {}
+
+
+def _resolve_reference(row: Dict[str, Any]) -> str:
+    reference_text = row.get('reference_text')
+    if reference_text:
+        return reference_text
+
+    reference_id = row.get('reference_id')
+    if not reference_id:
+        raise ValueError("Missing reference_text or reference_id")
+    reference_text = _worker['catalog'].get(str(reference_id))
+    if not reference_text and _worker['reference_store'] is not None:
+        reference_text = _worker['reference_store'].get_text(reference_id)
+    if not reference_text:
+        raise ValueError(f"Unknown reference_id: {reference_id}")
+    return reference_text
+
+
+def _grade_shard(shard_index: int, start_index: int, rows: List[Dict[str, Any]], shard_path: str) -> Dict[str, Any]:
+    """Evaluate one shard in a worker process and checkpoint its results."""
+    started = time.perf_counter()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    pending, user_texts, reference_texts = [], [], []
+
+    for i, row in enumerate(rows):
+        try:
+            if ROW_ERROR_KEY in row:
+                raise ValueError(row[ROW_ERROR_KEY])
+            if not row.get('user_text'):
+                raise ValueError("Missing user_text")
+            reference_texts.append(_resolve_reference(row))
+            user_texts.append(row['user_text'])
+            pending.append(i)
+        except ValueError as e:
+            results[i] = {"error": str(e)}
+
+    if pending:
+        evaluations = _worker['evaluator'].batch_evaluate(user_texts, reference_texts)
+        for i, evaluation in zip(pending, evaluations):
+            results[i] = evaluation
+
+    temporary_path = f"{shard_path}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        for i, (row, result) in enumerate(zip(rows, results)):
+            line = {"index": start_index + i}
+            if row.get('id') not in (None, ''):
+                line['id'] = row['id']
+            line.update(result)
+            f.write(json.dumps(line) + '\n')
+    # The renamed file is the checkpoint: it exists only once the whole shard is done
+    os.replace(temporary_path, shard_path)
+
+    seconds = time.perf_counter() - started
+    return {
+        "shard": shard_index,
+        "rows": len(rows),
+        "errors": len(rows) - len(pending),
+        "seconds": round(seconds, 3),
+        "pairs_per_second": round(len(rows) / seconds, 1) if seconds > 0 else None,
+        "pid": os.getpid()
+    }
+
+
+def _shard_path(checkpoint_dir: str, shard_index: int) -> str:
+    return os.path.join(checkpoint_dir, f"shard-{shard_index:06d}.jsonl")
+
+
+def _prepare_checkpoint_dir(checkpoint_dir: str, input_path: str, shard_size: int, restart: bool) -> None:
+    """Create the checkpoint directory, refusing to resume a run over different input."""
+    stat = os.stat(input_path)
+    manifest = {
+        "input": os.path.abspath(input_path),
+        "input_size": stat.st_size,
+        "input_mtime": stat.st_mtime,
+        "shard_size": shard_size
+    }
+    manifest_path = os.path.join(checkpoint_dir, CHECKPOINT_MANIFEST_FILENAME)
+
+    if restart:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if json.load(f) != manifest:
+                raise ValueError(
+                    f"Checkpoints in {checkpoint_dir} belong to a different input or shard size; "
+                    f"pass --restart to discard them"
+                )
+        return
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _iter_shard_results(checkpoint_dir: str, shard_index: int) -> Iterator[Dict[str, Any]]:
+    with open(_shard_path(checkpoint_dir, shard_index), 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _parquet_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    detailed_metrics = result.get('detailed_metrics', {})
+    length_analysis = result.get('length_analysis', {})
+    return {
+        "index": result['index'],
+        "id": None if result.get('id') is None else str(result['id']),
+        "similarity_score": result.get('similarity_score'),
+        "performance_level": result.get('performance_level'),
+        "feedback_message": result.get('feedback_message'),
+        "comprehensiveness_score": detailed_metrics.get('comprehensiveness_score'),
+        "length_ratio": length_analysis.get('length_ratio'),
+        "length_feedback": length_analysis.get('length_feedback'),
+        "error": result.get('error'),
+        "evaluation": json.dumps(result)
+    }
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output requires the 'pyarrow' package") from e
+    return pa, pq
+
+
+def merge_results(checkpoint_dir: str, shard_count: int, output_path: str) -> int:
+    """
+    Merge checkpointed shards, in input order, into the output file.
+
+    Args:
+        checkpoint_dir (str): Directory holding the shard files
+        shard_count (int): Number of shards
+        output_path (str): ``.parquet`` for Parquet, anything else for JSONL
+
+    Returns:
+        int: Number of results written
+    """
+    written = 0
+    temporary_path = f"{output_path}.tmp"
+
+    if output_path.lower().endswith('.parquet'):
+        pa, pq = _import_pyarrow()
+        schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in PARQUET_COLUMNS])
+        with pq.ParquetWriter(temporary_path, schema) as writer:
+            # One row group per shard keeps memory bounded by the shard size
+            for shard_index in range(shard_count):
+                rows = [_parquet_row(result) for result in _iter_shard_results(checkpoint_dir, shard_index)]
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                written += len(rows)
+    else:
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            for shard_index in range(shard_count):
+                for result in _iter_shard_results(checkpoint_dir, shard_index):
+                    f.write(json.dumps(result) + '\n')
+                    written += 1
+
+    os.replace(temporary_path, output_path)
+    return written
+
+
+def grade(input_path: str, output_path: str, options: Dict[str, Any], workers: int = 1, shard_size: int = 1000,
+          checkpoint_dir: Optional[str] = None, input_format: Optional[str] = None,
+          restart: bool = False) -> Dict[str, Any]:
+    """
+    Grade every submission in a file, resuming from checkpoints left by an earlier run.
+
+    Args:
+        input_path (str): CSV or JSONL submissions
+        output_path (str): JSONL or Parquet results file
+        options (Dict[str, Any]): Evaluator options passed to every worker process
+        workers (int): Number of worker processes
+        shard_size (int): Submissions per shard (the checkpoint granularity)
+        checkpoint_dir (Optional[str]): Checkpoint directory (default: ``<output>.checkpoints``)
+        input_format (Optional[str]): ``csv`` or ``jsonl`` (default: from the file extension)
+        restart (bool): Discard existing checkpoints instead of resuming
+
+    Returns:
+        Dict[str, Any]: Run summary with throughput and per-shard timings
+    """
+    if output_path.lower().endswith('.parquet'):
+        # Fail before grading rather than after
+        _import_pyarrow()
+    checkpoint_dir = checkpoint_dir or f"{output_path}.checkpoints"
+    _prepare_checkpoint_dir(checkpoint_dir, input_path, shard_size, restart)
+
+    started = time.perf_counter()
+    shard_timings = []
+    resumed_shards = 0
+    shard_count = 0
+    graded_rows = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+        in_flight = set()
+        rows = iter(read_submissions(input_path, input_format))
+        while True:
+            shard = list(itertools.islice(rows, shard_size))
+            if not shard:
+                break
+            shard_index = shard_count
+            shard_count += 1
+            shard_path = _shard_path(checkpoint_dir, shard_index)
+            if os.path.exists(shard_path):
+                resumed_shards += 1
+                continue
+
+            # Keep a bounded number of shards in memory at once
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard_timings.append(future.result())
+                    graded_rows += shard_timings[-1]['rows']
+                    print(json.dumps(shard_timings[-1]), file=sys.stderr, flush=True)
+            in_flight.add(pool.submit(_grade_shard, shard_index, shard_index * shard_size, shard, shard_path))
+
+        for future in wait(in_flight).done:
+            shard_timings.append(future.result())
+            graded_rows += shard_timings[-1]['rows']
+            print(json.dumps(shard_timings[-1]), file=sys.stderr, flush=True)
+
+    grading_seconds = time.perf_counter() - started
+    total_rows = merge_results(checkpoint_dir, shard_count, output_path)
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+    return {
+        "output": output_path,
+        "total_rows": total_rows,
+        "graded_rows": graded_rows,
+        "errors": sum(timing['errors'] for timing in shard_timings),
+        "shards": shard_count,
+        "resumed_shards": resumed_shards,
+        "workers": workers,
+        "seconds": round(grading_seconds, 3),
+        "pairs_per_second": round(graded_rows / grading_seconds, 1) if grading_seconds > 0 else None,
+        "shard_timings": sorted(shard_timings, key=lambda timing: timing['shard'])
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for bulk grading."""
+    parser = argparse.ArgumentParser(description="Grade a file of summaries offline with SummaryEvaluator")
+    parser.add_argument('input', help="CSV or JSONL file with user_text and reference_text/reference_id")
+    parser.add_argument('--output', required=True, help="Results file (.jsonl or .parquet)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Input format (default: from the extension)")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--shard-size', type=int, default=1000)
+    parser.add_argument('--checkpoint-dir', help="Default: <output>.checkpoints")
+    parser.add_argument('--restart', action='store_true', help="Discard checkpoints from an earlier run")
+    parser.add_argument('--model', default=os.getenv('MODEL_NAME', 'all-MiniLM-L6-v2'))
+    parser.add_argument('--backend', default=os.getenv('INFERENCE_BACKEND', 'torch'))
+    parser.add_argument('--device', default=os.getenv('DEVICE', 'auto'))
+    parser.add_argument('--onnx-dir', default=os.getenv('ONNX_MODEL_DIR'))
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('ENCODE_BATCH_SIZE', 64)))
+    parser.add_argument('--catalog', help="Catalog JSON for reference_id lookups")
+    parser.add_argument('--reference-store', default=os.getenv('REFERENCE_STORE_DIR'),
+                        help="Reference embedding store for reference_id lookups")
+    parser.add_argument('--no-chunking', action='store_true',
+                        help="Truncate texts past the model's sequence limit instead of scoring them by windows")
+    parser.add_argument('--chunk-aggregation', default=os.getenv('CHUNK_AGGREGATION', 'f1'),
+                        choices=['f1', 'recall', 'precision', 'max'])
+    parser.add_argument('--chunk-overlap', type=int, default=int(os.getenv('CHUNK_OVERLAP', 1)),
+                        help="Sentences shared by consecutive windows")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    workers = max(1, args.workers)
+    options = {
+        "model": args.model,
+        "backend": args.backend,
+        "device": args.device,
+        "onnx_dir": args.onnx_dir,
+        "batch_size": args.batch_size,
+        "catalog": args.catalog,
+        "reference_store": args.reference_store,
+        "chunk_long_texts": os.getenv('CHUNK_LONG_TEXTS', 'True').lower() == 'true' and not args.no_chunking,
+        "chunk_aggregation": args.chunk_aggregation,
+        "chunk_overlap": args.chunk_overlap,
+        # Split the cores between worker processes instead of oversubscribing them
+        "threads_per_worker": max(1, (os.cpu_count() or 1) // workers)
+    }
+
+    try:
+        summary = grade(args.input, args.output, options, workers=workers, shard_size=max(1, args.shard_size),
+                        checkpoint_dir=args.checkpoint_dir, input_format=args.format, restart=args.restart)
+    except (ValueError, ImportError, FileNotFoundError) as e:
+        logger.error(str(e))
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
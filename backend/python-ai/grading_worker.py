@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Grading Worker Module
+
+This module runs a queue-backed grading worker. It loads the evaluator once,
+then repeatedly claims a batch of jobs from the broker, scores all of their
+pairs with one batched ``SummaryEvaluator`` call and acknowledges each job with
+its results. Failed jobs are handed back to the broker for retry. Start as many
+workers, on as many nodes, as the queue needs; they coordinate only through
+the broker.
+
+Usage:
+    python grading_worker.py --broker sqlite:///jobs/jobs.db
+    python grading_worker.py --broker redis://queue-host:6379/0 --batch-jobs 16
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from job_queue import open_broker
+
+logger = logging.getLogger(__name__)
+
+
+def build_evaluator(model_name: Optional[str] = None) -> Any:
+    """
+    Build the evaluator from the same environment configuration as the API.
+
+    Args:
+        model_name (Optional[str]): Model to load instead of ``MODEL_NAME``
+
+    Returns:
+        SummaryEvaluator: The loaded evaluator
+    """
+    from model_artifacts import enable_offline_mode, load_artifact_path
+
+    model_name = model_name or os.getenv('MODEL_NAME', 'all-MiniLM-L6-v2')
+    model_path = None
+    if os.getenv('MODEL_ARTIFACT_DIR'):
+        enable_offline_mode()
+        model_path = load_artifact_path(
+            os.getenv('MODEL_ARTIFACT_DIR'),
+            model_name,
+            version=os.getenv('MODEL_VERSION') or None,
+            verify=os.getenv('MODEL_ARTIFACT_VERIFY', 'True').lower() == 'true'
+        )
+
+    from summary_evaluation import SummaryEvaluator
+    from reference_store import ReferenceEmbeddingStore
+
+    reference_store = None
+    if os.getenv('REFERENCE_STORE_DIR'):
+        reference_store = ReferenceEmbeddingStore(os.getenv('REFERENCE_STORE_DIR'), model_name)
+
+    return SummaryEvaluator(
+        model_name=model_name,
+        batch_size=int(os.getenv('ENCODE_BATCH_SIZE', 64)),
+        reference_store=reference_store,
+        backend=os.getenv('INFERENCE_BACKEND', 'torch'),
+        device=os.getenv('DEVICE', 'auto'),
+        onnx_model_dir=os.getenv('ONNX_MODEL_DIR'),
+        model_path=model_path,
+        chunk_long_texts=os.getenv('CHUNK_LONG_TEXTS', 'True').lower() == 'true',
+        chunk_aggregation=os.getenv('CHUNK_AGGREGATION', 'f1'),
+        chunk_overlap=int(os.getenv('CHUNK_OVERLAP', 1))
+    )
+
+
+def _validate_pairs(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    pairs = payload.get('pairs')
+    if not isinstance(pairs, list) or not pairs:
+        raise ValueError("Job payload has no pairs")
+    for pair in pairs:
+        if not pair.get('user_text') or not pair.get('reference_text'):
+            raise ValueError("Every pair needs user_text and reference_text")
+    return pairs
+
+
+def process_jobs(broker: Any, evaluator: Any, jobs: List[Dict[str, Any]], worker_id: str) -> Dict[str, int]:
+    """
+    Evaluate the pairs of several jobs in one batch and acknowledge each job.
+
+    Args:
+        broker (Any): Job broker
+        evaluator (SummaryEvaluator): Loaded evaluator
+        jobs (List[Dict[str, Any]]): Claimed jobs
+        worker_id (str): Identifier the jobs were claimed with
+
+    Returns:
+        Dict[str, int]: Number of jobs and pairs completed and jobs failed
+    """
+    valid_jobs = []
+    failed = 0
+    for job in jobs:
+        try:
+            valid_jobs.append((job, _validate_pairs(job['payload'])))
+        except (AttributeError, ValueError) as e:
+            broker.fail(job['id'], worker_id, str(e))
+            failed += 1
+
+    user_texts = [pair['user_text'] for _, pairs in valid_jobs for pair in pairs]
+    reference_texts = [pair['reference_text'] for _, pairs in valid_jobs for pair in pairs]
+    try:
+        evaluations = evaluator.batch_evaluate(user_texts, reference_texts) if user_texts else []
+    except Exception as e:
+        logger.error(f"Error evaluating batch of {len(valid_jobs)} jobs: {str(e)}")
+        for job, _ in valid_jobs:
+            broker.fail(job['id'], worker_id, str(e))
+        return {"jobs": 0, "pairs": 0, "failed": failed + len(valid_jobs)}
+
+    offset = 0
+    for job, pairs in valid_jobs:
+        results = []
+        for index, pair in enumerate(pairs):
+            result = {"index": index}
+            if 'id' in pair:
+                result['id'] = pair['id']
+            result.update(evaluations[offset + index])
+            results.append(result)
+        offset += len(pairs)
+        acknowledged = broker.ack(job['id'], worker_id, {
+            "results": results,
+            "total_evaluations": len(results),
+            "average_score": sum(result.get('similarity_score', 0) for result in results) / len(results)
+        })
+        if not acknowledged:
+            logger.warning(f"Job {job['id']} lost its claim before it finished; result dropped")
+
+    return {"jobs": len(valid_jobs), "pairs": offset, "failed": failed}
+
+
+def run_worker(broker: Any, evaluator: Any, worker_id: str, batch_jobs: int = 8, visibility_timeout: float = 60.0,
+               poll_interval: float = 1.0, drain: bool = False,
+               stop_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    Claim and process jobs until stopped.
+
+    Args:
+        broker (Any): Job broker
+        evaluator (SummaryEvaluator): Loaded evaluator
+        worker_id (str): Identifier recorded on claimed jobs
+        batch_jobs (int): Maximum number of jobs claimed and evaluated together
+        visibility_timeout (float): Seconds before an unacknowledged job is redelivered
+        poll_interval (float): Seconds to sleep when the queue is empty
+        drain (bool): Exit once the queue is empty instead of polling
+        stop_event (Optional[threading.Event]): Set to stop after the current batch
+
+    Returns:
+        Dict[str, Any]: Jobs and pairs processed, failures and throughput
+    """
+    stop_event = stop_event or threading.Event()
+    totals = {"jobs": 0, "pairs": 0, "failed": 0, "batches": 0}
+    busy_seconds = 0.0
+
+    while not stop_event.is_set():
+        jobs = broker.claim(worker_id, max_jobs=batch_jobs, visibility_timeout=visibility_timeout)
+        if not jobs:
+            if drain:
+                break
+            stop_event.wait(poll_interval)
+            continue
+
+        started = time.perf_counter()
+        processed = process_jobs(broker, evaluator, jobs, worker_id)
+        elapsed = time.perf_counter() - started
+        busy_seconds += elapsed
+        totals['batches'] += 1
+        for key in ('jobs', 'pairs', 'failed'):
+            totals[key] += processed[key]
+        logger.info(f"Processed {len(jobs)} jobs ({processed['pairs']} pairs) in {elapsed:.3f}s")
+
+    totals['pairs_per_second'] = round(totals['pairs'] / busy_seconds, 1) if busy_seconds > 0 else None
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for a grading worker."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Process grading jobs from the job queue")
+    parser.add_argument('--broker', default=os.getenv('JOB_BROKER_URL'), help="sqlite:///path or redis://host:port/db")
+    parser.add_argument('--batch-jobs', type=int, default=int(os.getenv('JOB_WORKER_BATCH_JOBS', 8)))
+    parser.add_argument('--visibility-timeout', type=float, default=float(os.getenv('JOB_VISIBILITY_TIMEOUT', 60)))
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--max-attempts', type=int, default=int(os.getenv('JOB_MAX_ATTEMPTS', 3)))
+    parser.add_argument('--drain', action='store_true', help="Exit when the queue is empty")
+    parser.add_argument('--worker-id', default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if not args.broker:
+        logger.error("No broker configured; pass --broker or set JOB_BROKER_URL")
+        return 1
+
+    broker = open_broker(args.broker, max_attempts=args.max_attempts)
+    evaluator = build_evaluator()
+
+    # Finish the current batch on SIGTERM/SIGINT instead of abandoning claimed jobs
+    stop_event = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    logger.info(f"Worker {args.worker_id} polling {args.broker}")
+    totals = run_worker(broker, evaluator, args.worker_id, args.batch_jobs, args.visibility_timeout,
+                        args.poll_interval, args.drain, stop_event)
+    print(json.dumps(totals))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn Configuration
+
+Production entry point for the AI evaluation service. On CPU the master process
+loads the model once, before forking, so every worker shares the weights
+copy-on-write instead of holding its own copy. Each worker then gets
+``cores // workers`` intra-op threads, so the workers never oversubscribe the
+cores, and warms up before it accepts requests.
+
+CUDA cannot be used across fork(), so when the model may run on a GPU
+(``DEVICE=auto`` or ``cuda`` with the torch backend) each worker loads its own
+copy after forking instead.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import gc
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Load the model in the master only when it can safely be shared with forked workers
+PRELOAD_MODEL = os.getenv('PRELOAD_MODEL', 'True').lower() == 'true' and (
+    os.getenv('INFERENCE_BACKEND', 'torch') != 'torch' or os.getenv('DEVICE', 'auto') == 'cpu'
+)
+WORKER_WARMUP = os.getenv('MODEL_WARMUP', 'True').lower() == 'true'
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WORKERS', CPU_COUNT if PRELOAD_MODEL else 1))
+
+# Request threads per worker let the request coalescer batch concurrent requests
+worker_class = 'gthread'
+threads = int(os.getenv('WORKER_THREADS', 8))
+
+# Inference threads per worker, sized so workers x threads fits the cores
+INTRA_OP_THREADS = int(os.getenv('INTRA_OP_THREADS', 0)) or max(1, CPU_COUNT // workers)
+
+timeout = int(os.getenv('WORKER_TIMEOUT', 120))
+graceful_timeout = 30
+accesslog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+preload_app = PRELOAD_MODEL
+if PRELOAD_MODEL:
+    # Load synchronously in the master (a loader thread would not survive fork) and keep
+    # it single-threaded so no OpenMP/BLAS thread pool exists at fork time
+    os.environ['LAZY_MODEL_LOAD'] = 'False'
+    os.environ['MODEL_WARMUP'] = 'False'
+    os.environ['OMP_NUM_THREADS'] = '1'
+    os.environ['MKL_NUM_THREADS'] = '1'
+else:
+    # Each worker loads its own model and sizes its thread pools from the environment
+    os.environ['OMP_NUM_THREADS'] = str(INTRA_OP_THREADS)
+    os.environ['MKL_NUM_THREADS'] = str(INTRA_OP_THREADS)
+
+
+def pre_fork(server, worker):
+    """Move the loaded model out of the garbage collector's reach before forking."""
+    if PRELOAD_MODEL:
+        # Otherwise the collector writes to every tracked object's header and unshares its page
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    """Size the worker's inference thread pool and warm it up before it accepts requests."""
+    if not PRELOAD_MODEL:
+        return
+    import app as service
+
+    service.model_loader.configure_worker(num_threads=INTRA_OP_THREADS, warmup=WORKER_WARMUP)
+    worker.log.info(
+        f"Worker {worker.pid} ready with {INTRA_OP_THREADS} intra-op threads: {service.model_loader.timings}"
+    )
@@ -0,0 +1,526 @@
+# -*- coding: utf-8 -*-
+"""
+Inference Backends Module
+
+This module provides the sentence encoders that ``SummaryEvaluator`` can run on:
+the default PyTorch ``SentenceTransformer`` and an ONNX Runtime export of the same
+model, optionally int8 dynamic-quantized, for CPU-only deployments. It also
+provides the export, parity check and benchmark commands for the ONNX variants.
+
+Usage:
+    python inference_backends.py export --model all-MiniLM-L6-v2 --output models/onnx/all-MiniLM-L6-v2 --quantize
+    python inference_backends.py parity --onnx-dir models/onnx/all-MiniLM-L6-v2 --backend onnx-int8
+    python inference_backends.py benchmark --onnx-dir models/onnx/all-MiniLM-L6-v2
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+ONNX_MODEL_FILENAME = 'model.onnx'
+ONNX_INT8_MODEL_FILENAME = 'model-int8.onnx'
+ENCODER_CONFIG_FILENAME = 'encoder_config.json'
+TOKENIZER_FILENAME = 'tokenizer.json'
+
+# Sample pairs for parity checks and benchmarks, from one-liners to paragraphs
+SAMPLE_PAIRS = [
+    ("Plants use sunlight to make food",
+     "Photosynthesis is the process by which plants convert light energy into chemical energy"),
+    ("The video shows how to cook pasta",
+     "This tutorial demonstrates pasta cooking techniques"),
+    ("Water boils at 100 degrees",
+     "Water reaches its boiling point at 100 degrees Celsius"),
+    ("The Earth orbits the Sun",
+     "Earth completes one orbit around the Sun in 365 days"),
+    ("The video explains how plants make their food using sunlight through photosynthesis.",
+     "This educational video demonstrates the process of photosynthesis, showing how plants convert "
+     "sunlight, water, and carbon dioxide into glucose and oxygen."),
+    ("Chloroplasts capture light and split water, releasing oxygen and producing ATP and NADPH. "
+     "The Calvin cycle then uses that energy to fix carbon dioxide into sugar, which feeds most food chains.",
+     "Photosynthesis is a vital biological process where plants, algae, and certain bacteria convert light "
+     "energy into chemical energy stored in glucose. The light-dependent reactions generate ATP and NADPH "
+     "while releasing oxygen, and the Calvin cycle fixes carbon dioxide into organic molecules."),
+]
+
+
+class TorchSentenceEncoder:
+    """
+    Sentence encoder running a full-precision PyTorch ``SentenceTransformer``.
+    """
+
+    def __init__(self, model_name: str, device: str = 'auto'):
+        """
+        Load the sentence transformer.
+
+        Args:
+            model_name (str): Sentence transformer model name or path
+            device (str): ``auto``, ``cpu`` or ``cuda``
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if device == 'auto':
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device
+        self.model = SentenceTransformer(model_name, device=device)
+        self.max_seq_length = self.model.max_seq_length
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode texts into embeddings.
+
+        Args:
+            texts (List[str]): Texts to encode
+            batch_size (int): Number of texts per forward pass
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per text
+        """
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+    def set_num_threads(self, num_threads: int) -> None:
+        """
+        Set the number of intra-op threads used for CPU inference in this process.
+
+        Args:
+            num_threads (int): Thread count
+        """
+        import torch
+
+        torch.set_num_threads(max(1, int(num_threads)))
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Count the tokens each text occupies after truncation.
+
+        Args:
+            texts (List[str]): Texts to tokenize
+
+        Returns:
+            List[int]: Token count of each text, including special tokens
+        """
+        input_ids = self.model.tokenizer(
+            texts, truncation=True, max_length=self.max_seq_length, return_attention_mask=False
+        )['input_ids']
+        return [len(ids) for ids in input_ids]
+
+
+class OnnxSentenceEncoder:
+    """
+    Sentence encoder running an ONNX export through ONNX Runtime, without importing torch.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, intra_op_threads: Optional[int] = None):
+        """
+        Load an exported model directory.
+
+        Args:
+            model_dir (str): Directory written by ``export_onnx``
+            quantized (bool): Load the int8 dynamic-quantized model instead of fp32
+            intra_op_threads (Optional[int]): ONNX Runtime intra-op thread count (None = runtime default)
+        """
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The ONNX backend requires the 'onnxruntime' and 'tokenizers' packages") from e
+
+        model_path = os.path.join(model_dir, ONNX_INT8_MODEL_FILENAME if quantized else ONNX_MODEL_FILENAME)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found at {model_path}; run 'python inference_backends.py export' first")
+
+        with open(os.path.join(model_dir, ENCODER_CONFIG_FILENAME), 'r', encoding='utf-8') as f:
+            encoder_config = json.load(f)
+        self.pooling_mode = encoder_config['pooling_mode']
+        self.normalize = encoder_config['normalize']
+        self.max_seq_length = encoder_config['max_seq_length']
+        self.pad_token_id = encoder_config['pad_token_id']
+        self.device = 'cpu'
+
+        self.model_path = model_path
+        self.session = self._create_session(intra_op_threads)
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILENAME))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+
+    def _create_session(self, intra_op_threads: Optional[int] = None) -> Any:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = int(intra_op_threads)
+        return ort.InferenceSession(self.model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+    def set_num_threads(self, num_threads: int) -> None:
+        """
+        Recreate the inference session with a new intra-op thread count.
+
+        ONNX Runtime sizes its thread pool when the session is created, and the pool
+        does not survive ``fork()``, so forked workers must call this before inference.
+
+        Args:
+            num_threads (int): Thread count
+        """
+        self.session = self._create_session(max(1, int(num_threads)))
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode texts into embeddings.
+
+        Args:
+            texts (List[str]): Texts to encode
+            batch_size (int): Number of texts per forward pass
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per text
+        """
+        batches = []
+        for start in range(0, len(texts), max(1, batch_size)):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            length = max(len(encoding.ids) for encoding in encodings)
+
+            # Pad the batch to its longest member
+            features = {
+                'input_ids': np.full((len(encodings), length), self.pad_token_id, dtype=np.int64),
+                'attention_mask': np.zeros((len(encodings), length), dtype=np.int64),
+                'token_type_ids': np.zeros((len(encodings), length), dtype=np.int64)
+            }
+            for i, encoding in enumerate(encodings):
+                features['input_ids'][i, :len(encoding.ids)] = encoding.ids
+                features['attention_mask'][i, :len(encoding.ids)] = 1
+                features['token_type_ids'][i, :len(encoding.ids)] = encoding.type_ids
+
+            token_embeddings = self.session.run(None, {name: features[name] for name in self.input_names})[0]
+            batches.append(self._pool(token_embeddings, features['attention_mask']))
+
+        return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Count the tokens each text occupies after truncation.
+
+        Args:
+            texts (List[str]): Texts to tokenize
+
+        Returns:
+            List[int]: Token count of each text, including special tokens
+        """
+        return [len(encoding.ids) for encoding in self.tokenizer.encode_batch(texts)]
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Pool token embeddings into sentence embeddings the way the exported pipeline does."""
+        if self.pooling_mode == 'cls':
+            embeddings = token_embeddings[:, 0]
+        else:
+            mask = attention_mask[..., np.newaxis].astype(token_embeddings.dtype)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+
+def load_encoder(model_name: str, backend: str = 'torch', device: str = 'auto',
+                 onnx_model_dir: Optional[str] = None, intra_op_threads: Optional[int] = None) -> Any:
+    """
+    Load a sentence encoder for the requested backend.
+
+    Args:
+        model_name (str): Sentence transformer model name or path
+        backend (str): One of ``torch``, ``onnx`` or ``onnx-int8``
+        device (str): Torch device for the torch backend (``auto``, ``cpu`` or ``cuda``)
+        onnx_model_dir (Optional[str]): Export directory for the ONNX backends
+        intra_op_threads (Optional[int]): ONNX Runtime intra-op thread count
+
+    Returns:
+        Any: An encoder with ``encode``, ``token_lengths``, ``max_seq_length`` and ``device``
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    if backend == 'torch':
+        return TorchSentenceEncoder(model_name, device=device)
+
+    if not onnx_model_dir:
+        raise ValueError(f"The {backend} backend requires ONNX_MODEL_DIR to point at an exported model")
+    return OnnxSentenceEncoder(onnx_model_dir, quantized=(backend == 'onnx-int8'), intra_op_threads=intra_op_threads)
+
+
+def _encoder_config(model: Any) -> Dict[str, Any]:
+    """Read pooling, normalization and tokenizer settings from a loaded SentenceTransformer pipeline."""
+    pooling_mode = None
+    normalize = False
+    for module in model:
+        module_type = type(module).__name__
+        if module_type == 'Pooling':
+            config = module.get_config_dict()
+            if config.get('pooling_mode_cls_token') or config.get('pooling_mode') == 'cls':
+                pooling_mode = 'cls'
+            elif config.get('pooling_mode_mean_tokens') or config.get('pooling_mode') == 'mean':
+                pooling_mode = 'mean'
+        elif module_type == 'Normalize':
+            normalize = True
+
+    if pooling_mode is None:
+        raise ValueError("Only mean and CLS pooling pipelines can be exported to ONNX")
+    return {
+        "pooling_mode": pooling_mode,
+        "normalize": normalize,
+        "max_seq_length": model.max_seq_length,
+        "pad_token_id": model.tokenizer.pad_token_id or 0
+    }
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = False, opset: int = 17) -> Dict[str, str]:
+    """
+    Export a SentenceTransformer's transformer to ONNX, optionally with an int8 variant.
+
+    Args:
+        model_name (str): Sentence transformer model name or path
+        output_dir (str): Directory to write the model, tokenizer and encoder config to
+        quantize (bool): Also write an int8 dynamic-quantized model
+        opset (int): ONNX opset version
+
+    Returns:
+        Dict[str, str]: Paths of the written model files
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device='cpu')
+    os.makedirs(output_dir, exist_ok=True)
+    model.tokenizer.save_pretrained(output_dir)
+    if not os.path.exists(os.path.join(output_dir, TOKENIZER_FILENAME)):
+        raise ValueError(f"{model_name} has no fast tokenizer, which the ONNX backend needs")
+    with open(os.path.join(output_dir, ENCODER_CONFIG_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(_encoder_config(model), f, indent=2)
+
+    features = model.tokenizer(["An example sentence to trace the graph"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in features]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, transformer: torch.nn.Module):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['token_embeddings']}
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILENAME)
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(model[0].auto_model).eval(),
+            tuple(features[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=['token_embeddings'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False
+        )
+    written = {"onnx": model_path}
+    logger.info(f"Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILENAME)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        written["onnx-int8"] = quantized_path
+        logger.info(f"Wrote int8 dynamic-quantized model to {quantized_path}")
+
+    return written
+
+
+def _pair_scores(embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each sample pair, given embeddings of [users..., references...]."""
+    users, references = embeddings[:len(SAMPLE_PAIRS)], embeddings[len(SAMPLE_PAIRS):]
+    users = users / np.linalg.norm(users, axis=1, keepdims=True)
+    references = references / np.linalg.norm(references, axis=1, keepdims=True)
+    return (users * references).sum(axis=1)
+
+
+def _sample_texts() -> List[str]:
+    return [user for user, _ in SAMPLE_PAIRS] + [reference for _, reference in SAMPLE_PAIRS]
+
+
+def check_parity(model_name: str, backend: str, onnx_model_dir: str, tolerance: float) -> Dict[str, Any]:
+    """
+    Compare a backend's pair scores with the torch backend on the sample pairs.
+
+    Args:
+        model_name (str): Sentence transformer model name or path
+        backend (str): Backend to check against torch
+        onnx_model_dir (str): Export directory for the ONNX backends
+        tolerance (float): Largest acceptable absolute score difference
+
+    Returns:
+        Dict[str, Any]: Per-pair scores, maximum difference and whether the check passed
+    """
+    texts = _sample_texts()
+    reference_scores = _pair_scores(load_encoder(model_name, 'torch', device='cpu').encode(texts))
+    scores = _pair_scores(load_encoder(model_name, backend, onnx_model_dir=onnx_model_dir).encode(texts))
+
+    max_difference = float(np.abs(scores - reference_scores).max())
+    return {
+        "backend": backend,
+        "torch_scores": [round(float(score), 4) for score in reference_scores],
+        "scores": [round(float(score), 4) for score in scores],
+        "max_abs_difference": round(max_difference, 6),
+        "tolerance": tolerance,
+        "passed": max_difference <= tolerance
+    }
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable, None if unknown)."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        # Unix-only; imported here so the module still loads on Windows
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().rss / (1024.0 * 1024.0)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def _round_mb(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def _benchmark_worker(model_name: str, backend: str, onnx_model_dir: Optional[str], repeats: int,
+                      batch_size: int, results: Any) -> None:
+    """Measure one backend in a fresh process so RSS is not shared with other backends."""
+    rss_start = _rss_mb()
+    started = time.perf_counter()
+    encoder = load_encoder(model_name, backend, device='cpu', onnx_model_dir=onnx_model_dir)
+    load_seconds = time.perf_counter() - started
+    rss_loaded = _rss_mb()
+
+    texts = _sample_texts()
+    encoder.encode(texts, batch_size=batch_size)
+
+    single_latencies = []
+    for i in range(repeats):
+        text = texts[i % len(texts)]
+        started = time.perf_counter()
+        encoder.encode([text], batch_size=1)
+        single_latencies.append((time.perf_counter() - started) * 1000.0)
+
+    batch_texts = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    started = time.perf_counter()
+    for _ in range(max(1, repeats // 10)):
+        encoder.encode(batch_texts, batch_size=batch_size)
+    batch_seconds = (time.perf_counter() - started) / max(1, repeats // 10)
+
+    single_latencies.sort()
+    results.put({
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "rss_before_load_mb": _round_mb(rss_start),
+        "rss_after_load_mb": _round_mb(rss_loaded),
+        "rss_after_inference_mb": _round_mb(_rss_mb()),
+        "single_latency_p50_ms": round(statistics.median(single_latencies), 2),
+        "single_latency_p95_ms": round(single_latencies[int(0.95 * (len(single_latencies) - 1))], 2),
+        "batch_size": batch_size,
+        "batch_texts_per_second": round(batch_size / batch_seconds, 1)
+    })
+
+
+def benchmark(model_name: str, backends: List[str], onnx_model_dir: Optional[str],
+              repeats: int = 100, batch_size: int = 64) -> List[Dict[str, Any]]:
+    """
+    Benchmark latency, throughput and memory of each backend, each in its own process.
+
+    Args:
+        model_name (str): Sentence transformer model name or path
+        backends (List[str]): Backends to benchmark
+        onnx_model_dir (Optional[str]): Export directory for the ONNX backends
+        repeats (int): Number of single-text encodes to time
+        batch_size (int): Batch size for the throughput measurement
+
+    Returns:
+        List[Dict[str, Any]]: One result per backend
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for backend in backends:
+        queue = context.Queue()
+        process = context.Process(
+            target=_benchmark_worker, args=(model_name, backend, onnx_model_dir, repeats, batch_size, queue)
+        )
+        process.start()
+        results.append(queue.get())
+        process.join()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for exporting, checking and benchmarking backends."""
+    parser = argparse.ArgumentParser(description="Export and benchmark SummaryEvaluator inference backends")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Export the model to ONNX")
+    export_parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    export_parser.add_argument('--output', required=True, help="Directory to write the ONNX model to")
+    export_parser.add_argument('--quantize', action='store_true', help="Also write an int8 dynamic-quantized model")
+    export_parser.add_argument('--tolerance', type=float, default=0.02, help="Parity tolerance checked after export")
+
+    parity_parser = subparsers.add_parser('parity', help="Compare an ONNX backend's scores with torch")
+    parity_parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parity_parser.add_argument('--onnx-dir', required=True)
+    parity_parser.add_argument('--backend', choices=BACKENDS[1:], default='onnx')
+    parity_parser.add_argument('--tolerance', type=float, default=0.02)
+
+    benchmark_parser = subparsers.add_parser('benchmark', help="Compare latency and RSS of the backends")
+    benchmark_parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    benchmark_parser.add_argument('--onnx-dir')
+    benchmark_parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    benchmark_parser.add_argument('--repeats', type=int, default=100)
+    benchmark_parser.add_argument('--batch-size', type=int, default=64)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'export':
+        written = export_onnx(args.model, args.output, quantize=args.quantize)
+        reports = [check_parity(args.model, backend, args.output, args.tolerance) for backend in written]
+        print(json.dumps(reports, indent=2))
+        return 0 if all(report["passed"] for report in reports) else 1
+
+    if args.command == 'parity':
+        report = check_parity(args.model, args.backend, args.onnx_dir, args.tolerance)
+        print(json.dumps(report, indent=2))
+        return 0 if report["passed"] else 1
+
+    print(json.dumps(benchmark(args.model, args.backends, args.onnx_dir, args.repeats, args.batch_size), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
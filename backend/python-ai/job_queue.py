@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+"""
+Job Queue Module
+
+This module provides the brokers behind queue-backed grading. The API enqueues
+grading jobs (batches of user/reference pairs); ``grading_worker.py`` processes
+on any number of nodes claim jobs, evaluate them and acknowledge them with
+their results.
+
+A claimed job is hidden from other workers for a visibility timeout. If its
+worker dies without acknowledging it, the job becomes visible again and is
+redelivered; a job that fails is retried with exponential backoff until it
+runs out of attempts.
+
+Brokers:
+    sqlite:///path/to/jobs.db   local broker for a single node and tests
+    redis://host:6379/0         shared broker for multiple nodes (requires ``redis``)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+
+
+def _retry_delay(attempts: int, retry_backoff: float) -> float:
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    return retry_backoff * (2 ** max(0, attempts - 1))
+
+
+class SQLiteBroker:
+    """
+    Job broker backed by a SQLite database, shared by the processes of one node.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, retry_backoff: float = 2.0):
+        """
+        Open (or create) the job database.
+
+        Args:
+            path (str): SQLite database file
+            max_attempts (int): Deliveries before a job is marked failed
+            retry_backoff (float): Base delay in seconds before retrying a failed job
+        """
+        self.path = path
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_backoff = float(retry_backoff)
+        self._local = threading.local()
+
+        # SQLite connections must not cross fork(); pre-fork workers open their own
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_connections)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, payload TEXT NOT NULL, state TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,"
+            " visible_at REAL NOT NULL, claimed_by TEXT, result TEXT, error TEXT,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS jobs_claimable ON jobs (state, visible_at, created_at)")
+
+    def _reset_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so keep one per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        """
+        Add a job to the queue.
+
+        Args:
+            payload (Dict[str, Any]): JSON-serializable job payload
+
+        Returns:
+            str: Job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (id, payload, state, max_attempts, visible_at, created_at, updated_at)"
+            " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, json.dumps(payload), self.max_attempts, now, now, now)
+        )
+        return job_id
+
+    def claim(self, worker_id: str, max_jobs: int = 1, visibility_timeout: float = 60.0) -> List[Dict[str, Any]]:
+        """
+        Claim up to ``max_jobs`` visible jobs, hiding them from other workers for ``visibility_timeout``.
+
+        Jobs whose previous claim expired are redelivered; jobs that have used up
+        their attempts are marked failed instead.
+
+        Args:
+            worker_id (str): Identifier of the claiming worker
+            max_jobs (int): Maximum number of jobs to claim
+            visibility_timeout (float): Seconds before an unacknowledged job is redelivered
+
+        Returns:
+            List[Dict[str, Any]]: Claimed jobs with ``id``, ``payload`` and ``attempts``
+        """
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # A running job past its visibility deadline lost its worker
+            connection.execute(
+                "UPDATE jobs SET state = 'failed', error = 'Visibility timeout expired on the last attempt',"
+                " updated_at = ? WHERE state = 'running' AND visible_at <= ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            rows = connection.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE state IN ('queued', 'running') AND visible_at <= ?"
+                " ORDER BY created_at LIMIT ?",
+                (now, max(1, int(max_jobs)))
+            ).fetchall()
+            connection.executemany(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, visible_at = ?, claimed_by = ?,"
+                " updated_at = ? WHERE id = ?",
+                [(now + visibility_timeout, worker_id, now, row['id']) for row in rows]
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        return [
+            {"id": row['id'], "payload": json.loads(row['payload']), "attempts": row['attempts'] + 1}
+            for row in rows
+        ]
+
+    def ack(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """
+        Mark a job claimed by ``worker_id`` done and store its result.
+
+        Args:
+            job_id (str): Job id
+            worker_id (str): Identifier of the worker that claimed the job
+            result (Any): JSON-serializable result
+
+        Returns:
+            bool: False if the job was since re-queued or claimed by another worker, or is already done
+        """
+        cursor = self._connection().execute(
+            "UPDATE jobs SET state = 'done', result = ?, error = NULL, updated_at = ?"
+            " WHERE id = ? AND claimed_by = ? AND state != 'done'",
+            (json.dumps(result), time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Record a failed attempt, re-queueing the job with backoff unless it is out of attempts.
+
+        Args:
+            job_id (str): Job id
+            worker_id (str): Identifier of the worker that claimed the job
+            error (str): Error message
+
+        Returns:
+            bool: False if the job is no longer running under this worker's claim
+        """
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND state = 'running' AND claimed_by = ?",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is not None:
+                if row['attempts'] >= row['max_attempts']:
+                    connection.execute(
+                        "UPDATE jobs SET state = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                        (error, now, job_id)
+                    )
+                else:
+                    connection.execute(
+                        "UPDATE jobs SET state = 'queued', error = ?, visible_at = ?, claimed_by = NULL,"
+                        " updated_at = ? WHERE id = ?",
+                        (error, now + _retry_delay(row['attempts'], self.retry_backoff), now, job_id)
+                    )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's state and result.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Optional[Dict[str, Any]]: Job record, or None if unknown
+        """
+        row = self._connection().execute(
+            "SELECT id, state, attempts, max_attempts, claimed_by, result, error, created_at, updated_at"
+            " FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics.
+
+        Returns:
+            Dict[str, Any]: Broker type and number of jobs in each state
+        """
+        counts = dict.fromkeys(JOB_STATES, 0)
+        for row in self._connection().execute("SELECT state, COUNT(*) AS jobs FROM jobs GROUP BY state"):
+            counts[row['state']] = row['jobs']
+        return {"broker": "sqlite", "jobs": counts}
+
+
+class RedisBroker:
+    """
+    Job broker backed by Redis, shared by workers on any number of nodes.
+
+    Jobs are hashes; ready job ids wait in a list, and claimed or backed-off jobs
+    wait in sorted sets scored by the time they become visible again. Claiming,
+    acknowledging and failing each run as one Lua script, so concurrent workers
+    never receive the same job and only the job's current claimant can finish it.
+    Finished jobs are counted in a hash, since they are in no list or set.
+    """
+
+    CLAIM_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local deadline = tonumber(ARGV[2])
+    local max_jobs = tonumber(ARGV[3])
+    local worker_id = ARGV[4]
+    local prefix = ARGV[5]
+
+    -- Move expired claims and due retries back to the ready list
+    for _, zset in ipairs({KEYS[2], KEYS[3]}) do
+        for _, job_id in ipairs(redis.call('ZRANGEBYSCORE', zset, '-inf', now)) do
+            redis.call('ZREM', zset, job_id)
+            local job = prefix .. job_id
+            if tonumber(redis.call('HGET', job, 'attempts')) >= tonumber(redis.call('HGET', job, 'max_attempts')) then
+                redis.call('HSET', job, 'state', 'failed', 'error', 'Visibility timeout expired on the last attempt',
+                           'updated_at', now)
+                redis.call('HINCRBY', KEYS[4], 'failed', 1)
+            else
+                redis.call('HSET', job, 'state', 'queued')
+                redis.call('RPUSH', KEYS[1], job_id)
+            end
+        end
+    end
+
+    local claimed = {}
+    for i = 1, max_jobs do
+        local job_id = redis.call('LPOP', KEYS[1])
+        if not job_id then
+            break
+        end
+        local job = prefix .. job_id
+        local attempts = redis.call('HINCRBY', job, 'attempts', 1)
+        redis.call('HSET', job, 'state', 'running', 'claimed_by', worker_id, 'updated_at', now)
+        redis.call('ZADD', KEYS[2], deadline, job_id)
+        table.insert(claimed, {job_id, redis.call('HGET', job, 'payload'), attempts})
+    end
+    return claimed
+    """
+
+    ACK_SCRIPT = """
+    local job = ARGV[5] .. ARGV[1]
+    if redis.call('HGET', job, 'claimed_by') ~= ARGV[2] or redis.call('HGET', job, 'state') == 'done' then
+        return 0
+    end
+    -- An expired claim may already be back in the ready list; do not run the job again
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    redis.call('LREM', KEYS[1], 0, ARGV[1])
+    if redis.call('HGET', job, 'state') == 'failed' then
+        redis.call('HINCRBY', KEYS[3], 'failed', -1)
+    end
+    redis.call('HSET', job, 'state', 'done', 'result', ARGV[3], 'error', '', 'updated_at', ARGV[4])
+    redis.call('HINCRBY', KEYS[3], 'done', 1)
+    return 1
+    """
+
+    FAIL_SCRIPT = """
+    local job = ARGV[5] .. ARGV[1]
+    if redis.call('HGET', job, 'claimed_by') ~= ARGV[2] or redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+        -- Already redelivered after its visibility timeout, claimed by another worker, or acknowledged
+        return 0
+    end
+    local now = tonumber(ARGV[4])
+    local attempts = tonumber(redis.call('HGET', job, 'attempts'))
+    if attempts >= tonumber(redis.call('HGET', job, 'max_attempts')) then
+        redis.call('HSET', job, 'state', 'failed', 'error', ARGV[3], 'updated_at', now)
+        redis.call('HINCRBY', KEYS[3], 'failed', 1)
+    else
+        redis.call('HSET', job, 'state', 'queued', 'error', ARGV[3], 'claimed_by', '', 'updated_at', now)
+        redis.call('ZADD', KEYS[2], now + tonumber(ARGV[6]) * 2 ^ math.max(0, attempts - 1), ARGV[1])
+    end
+    return 1
+    """
+
+    def __init__(self, url: str, namespace: str = 'grading', max_attempts: int = 3, retry_backoff: float = 2.0):
+        """
+        Connect to Redis.
+
+        Args:
+            url (str): Redis URL, e.g. ``redis://localhost:6379/0``
+            namespace (str): Key prefix for the queue
+            max_attempts (int): Deliveries before a job is marked failed
+            retry_backoff (float): Base delay in seconds before retrying a failed job
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The Redis broker requires the 'redis' package") from e
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.namespace = namespace
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_backoff = float(retry_backoff)
+        self._ready_key = f"{namespace}:ready"
+        self._claimed_key = f"{namespace}:claimed"
+        self._delayed_key = f"{namespace}:delayed"
+        self._counts_key = f"{namespace}:counts"
+        self._job_prefix = f"{namespace}:job:"
+        self._claim = self.client.register_script(self.CLAIM_SCRIPT)
+        self._ack = self.client.register_script(self.ACK_SCRIPT)
+        self._fail = self.client.register_script(self.FAIL_SCRIPT)
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        """
+        Add a job to the queue.
+
+        Args:
+            payload (Dict[str, Any]): JSON-serializable job payload
+
+        Returns:
+            str: Job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        pipeline = self.client.pipeline()
+        pipeline.hset(self._job_prefix + job_id, mapping={
+            "payload": json.dumps(payload),
+            "state": "queued",
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "created_at": now,
+            "updated_at": now
+        })
+        pipeline.rpush(self._ready_key, job_id)
+        pipeline.execute()
+        return job_id
+
+    def claim(self, worker_id: str, max_jobs: int = 1, visibility_timeout: float = 60.0) -> List[Dict[str, Any]]:
+        """
+        Claim up to ``max_jobs`` visible jobs, hiding them from other workers for ``visibility_timeout``.
+
+        Args:
+            worker_id (str): Identifier of the claiming worker
+            max_jobs (int): Maximum number of jobs to claim
+            visibility_timeout (float): Seconds before an unacknowledged job is redelivered
+
+        Returns:
+            List[Dict[str, Any]]: Claimed jobs with ``id``, ``payload`` and ``attempts``
+        """
+        now = time.time()
+        claimed = self._claim(
+            keys=[self._ready_key, self._claimed_key, self._delayed_key, self._counts_key],
+            args=[now, now + visibility_timeout, max(1, int(max_jobs)), worker_id, self._job_prefix]
+        )
+        return [
+            {"id": job_id, "payload": json.loads(payload), "attempts": int(attempts)}
+            for job_id, payload, attempts in claimed
+        ]
+
+    def ack(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """
+        Mark a job claimed by ``worker_id`` done and store its result.
+
+        Args:
+            job_id (str): Job id
+            worker_id (str): Identifier of the worker that claimed the job
+            result (Any): JSON-serializable result
+
+        Returns:
+            bool: False if the job was since claimed by another worker or re-queued, or is already done
+        """
+        return bool(self._ack(
+            keys=[self._ready_key, self._claimed_key, self._counts_key],
+            args=[job_id, worker_id, json.dumps(result), time.time(), self._job_prefix]
+        ))
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Record a failed attempt, re-queueing the job with backoff unless it is out of attempts.
+
+        Args:
+            job_id (str): Job id
+            worker_id (str): Identifier of the worker that claimed the job
+            error (str): Error message
+
+        Returns:
+            bool: False if the job is no longer running under this worker's claim
+        """
+        return bool(self._fail(
+            keys=[self._claimed_key, self._delayed_key, self._counts_key],
+            args=[job_id, worker_id, error, time.time(), self._job_prefix, self.retry_backoff]
+        ))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's state and result.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Optional[Dict[str, Any]]: Job record, or None if unknown
+        """
+        fields = self.client.hgetall(self._job_prefix + job_id)
+        if not fields:
+            return None
+        return {
+            "id": job_id,
+            "state": fields.get('state'),
+            "attempts": int(fields.get('attempts', 0)),
+            "max_attempts": int(fields.get('max_attempts', self.max_attempts)),
+            "claimed_by": fields.get('claimed_by'),
+            "result": json.loads(fields['result']) if fields.get('result') else None,
+            "error": fields.get('error') or None,
+            "created_at": float(fields['created_at']),
+            "updated_at": float(fields['updated_at'])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics.
+
+        Returns:
+            Dict[str, Any]: Broker type and number of jobs in each state
+        """
+        counts = self.client.hgetall(self._counts_key)
+        return {
+            "broker": "redis",
+            "jobs": {
+                "queued": self.client.llen(self._ready_key) + self.client.zcard(self._delayed_key),
+                "running": self.client.zcard(self._claimed_key),
+                "done": int(counts.get('done', 0)),
+                "failed": int(counts.get('failed', 0))
+            }
+        }
+
+
+def open_broker(url: str, max_attempts: int = 3, retry_backoff: float = 2.0) -> Any:
+    """
+    Open the broker named by a URL.
+
+    Args:
+        url (str): ``sqlite:///path/to/jobs.db``, a plain file path, or ``redis://...``
+        max_attempts (int): Deliveries before a job is marked failed
+        retry_backoff (float): Base delay in seconds before retrying a failed job
+
+    Returns:
+        Any: ``SQLiteBroker`` or ``RedisBroker``
+    """
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBroker(url, max_attempts=max_attempts, retry_backoff=retry_backoff)
+    path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url
+    return SQLiteBroker(path, max_attempts=max_attempts, retry_backoff=retry_backoff)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Length Bucketing Module
+
+This module groups texts of similar token length into the same encoder batch
+so that short summaries are not padded up to the length of long ones, and
+tracks how much of each padded batch is real tokens.
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+DEFAULT_LENGTH_BUCKETS = (16, 32, 64, 128, 256)
+
+
+def parse_length_buckets(value: str) -> List[int]:
+    """
+    Parse a comma-separated list of bucket boundaries such as ``"16,32,64"``.
+
+    Args:
+        value (str): Comma-separated token lengths
+
+    Returns:
+        List[int]: Sorted, de-duplicated positive boundaries
+    """
+    boundaries = {int(part) for part in value.split(',') if part.strip()}
+    return sorted(boundary for boundary in boundaries if boundary > 0)
+
+
+def plan_length_buckets(lengths: Sequence[int], boundaries: Sequence[int], max_batch_size: int) -> List[np.ndarray]:
+    """
+    Split texts into batches of similar length.
+
+    Texts are sorted by token length, assigned to the bucket whose upper boundary
+    covers them, and each bucket is cut into batches of at most ``max_batch_size``.
+    A batch never spans two buckets.
+
+    Args:
+        lengths (Sequence[int]): Token length of each text
+        boundaries (Sequence[int]): Inclusive upper token length of each bucket
+        max_batch_size (int): Maximum number of texts per batch
+
+    Returns:
+        List[np.ndarray]: Original indices of the texts in each batch
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if lengths.size == 0:
+        return []
+
+    order = np.argsort(lengths, kind='stable')
+    bucket_ids = np.searchsorted(np.asarray(boundaries, dtype=np.int64), lengths[order], side='left')
+    bucket_starts = np.flatnonzero(np.diff(bucket_ids, prepend=-1))
+    bucket_ends = np.append(bucket_starts[1:], order.size)
+
+    batches = []
+    for start, end in zip(bucket_starts, bucket_ends):
+        for batch_start in range(start, end, max_batch_size):
+            batches.append(order[batch_start:min(batch_start + max_batch_size, end)])
+    return batches
+
+
+def padded_token_count(lengths: Sequence[int], batches: Sequence[np.ndarray]) -> int:
+    """
+    Count the tokens processed when each batch is padded to its longest member.
+
+    Args:
+        lengths (Sequence[int]): Token length of each text
+        batches (Sequence[np.ndarray]): Original indices of the texts in each batch
+
+    Returns:
+        int: Total number of real and padding tokens
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    return int(sum(int(lengths[batch].max()) * len(batch) for batch in batches if len(batch)))
+
+
+class PaddingStats:
+    """
+    Running padding-efficiency counters for bucketed encoding, overall and per bucket.
+    """
+
+    def __init__(self, boundaries: Sequence[int]):
+        """
+        Initialize the padding statistics.
+
+        Args:
+            boundaries (Sequence[int]): Bucket boundaries used for encoding
+        """
+        self.boundaries = list(boundaries)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all counters."""
+        with self._lock:
+            self.texts = 0
+            self.batches = 0
+            self.real_tokens = 0
+            self.padded_tokens = 0
+            self.unbucketed_padded_tokens = 0
+            self.buckets: Dict[str, Dict[str, int]] = {}
+
+    def _bucket_label(self, length: int) -> str:
+        position = bisect.bisect_left(self.boundaries, length)
+        if position == len(self.boundaries):
+            return f">{self.boundaries[-1]}" if self.boundaries else "all"
+        return f"<={self.boundaries[position]}"
+
+    def record(self, lengths: Sequence[int], batches: Sequence[np.ndarray], max_batch_size: int) -> None:
+        """
+        Record one bucketed encode.
+
+        Args:
+            lengths (Sequence[int]): Token length of each text
+            batches (Sequence[np.ndarray]): Batches that were encoded
+            max_batch_size (int): Batch size a naive arrival-order split would have used
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        arrival_batches = [np.arange(i, min(i + max_batch_size, lengths.size)) for i in range(0, lengths.size, max_batch_size)]
+
+        with self._lock:
+            self.texts += int(lengths.size)
+            self.batches += len(batches)
+            self.real_tokens += int(lengths.sum())
+            self.padded_tokens += padded_token_count(lengths, batches)
+            self.unbucketed_padded_tokens += padded_token_count(lengths, arrival_batches)
+
+            for batch in batches:
+                if not len(batch):
+                    continue
+                bucket = self.buckets.setdefault(
+                    self._bucket_label(int(lengths[batch].max())),
+                    {"texts": 0, "batches": 0, "real_tokens": 0, "padded_tokens": 0}
+                )
+                bucket["texts"] += len(batch)
+                bucket["batches"] += 1
+                bucket["real_tokens"] += int(lengths[batch].sum())
+                bucket["padded_tokens"] += int(lengths[batch].max()) * len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get padding efficiency statistics.
+
+        Returns:
+            Dict[str, Any]: Real vs. padded token counts, efficiency with and without
+            bucketing, and a per-bucket breakdown for tuning the boundaries
+        """
+        def efficiency(real: int, padded: int) -> float:
+            return round(real / padded, 4) if padded else 1.0
+
+        with self._lock:
+            return {
+                "boundaries": self.boundaries,
+                "texts": self.texts,
+                "batches": self.batches,
+                "real_tokens": self.real_tokens,
+                "padded_tokens": self.padded_tokens,
+                "padding_efficiency": efficiency(self.real_tokens, self.padded_tokens),
+                "unbucketed_padding_efficiency": efficiency(self.real_tokens, self.unbucketed_padded_tokens),
+                "buckets": {
+                    label: dict(bucket, padding_efficiency=efficiency(bucket["real_tokens"], bucket["padded_tokens"]))
+                    for label, bucket in self.buckets.items()
+                }
+            }
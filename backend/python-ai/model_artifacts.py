@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Model Artifacts Module
+
+This module turns a sentence transformer into a versioned local artifact that the
+service can load without touching the network. A build step downloads the model
+once and writes its weights as safetensors (which are memory-mapped on load, so
+forked workers share the pages) together with a SHA-256 checksum manifest that
+is verified before every load.
+
+Layout:
+    <root>/<model>/<version>/...        model files and manifest.json
+    <root>/<model>/CURRENT              name of the version to load by default
+
+Usage:
+    python model_artifacts.py build --model all-MiniLM-L6-v2 --root /app/models
+    python model_artifacts.py verify --model all-MiniLM-L6-v2 --root /app/models
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = 'manifest.json'
+CURRENT_FILENAME = 'CURRENT'
+
+
+class ArtifactError(Exception):
+    """Raised when a model artifact is missing or fails checksum verification."""
+
+
+def enable_offline_mode() -> None:
+    """
+    Forbid Hugging Face libraries from reaching the network.
+
+    Must run before ``huggingface_hub``/``transformers`` are imported, since they
+    read these variables at import time.
+    """
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
+
+def _model_directory(root: str, model_name: str) -> str:
+    return os.path.join(root, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+
+
+def _file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_files(directory: str) -> Dict[str, Dict[str, Any]]:
+    """Checksum every file under a directory except the manifest itself."""
+    files = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            relative_path = os.path.relpath(path, directory).replace(os.sep, '/')
+            if relative_path == MANIFEST_FILENAME:
+                continue
+            files[relative_path] = {"sha256": _file_digest(path), "size": os.path.getsize(path)}
+    return dict(sorted(files.items()))
+
+
+def build_artifact(model_name: str, root: str, version: Optional[str] = None) -> str:
+    """
+    Download a model once and write it as a versioned, checksummed local artifact.
+
+    Args:
+        model_name (str): Sentence transformer model name on the Hugging Face Hub
+        root (str): Artifact root directory
+        version (Optional[str]): Version label (default: derived from the weight checksums)
+
+    Returns:
+        str: Path of the artifact directory
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model_directory = _model_directory(root, model_name)
+    staging_directory = os.path.join(model_directory, f".staging-{os.getpid()}")
+    shutil.rmtree(staging_directory, ignore_errors=True)
+
+    model = SentenceTransformer(model_name, device='cpu')
+    model.save(staging_directory, safe_serialization=True)
+
+    files = _hash_files(staging_directory)
+    if not any(path.endswith('.safetensors') for path in files):
+        shutil.rmtree(staging_directory, ignore_errors=True)
+        raise ArtifactError(f"{model_name} did not produce safetensors weights")
+
+    if version is None:
+        # Derive the label from the weights alone so rebuilding identical weights is idempotent
+        weights = {path: entry['sha256'] for path, entry in files.items() if path.endswith('.safetensors')}
+        version = hashlib.sha256(json.dumps(weights, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    manifest = {
+        "model_name": model_name,
+        "version": version,
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "files": files
+    }
+    with open(os.path.join(staging_directory, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    artifact_directory = os.path.join(model_directory, version)
+    if os.path.exists(artifact_directory):
+        shutil.rmtree(artifact_directory)
+    os.replace(staging_directory, artifact_directory)
+
+    current_path = os.path.join(model_directory, CURRENT_FILENAME)
+    with open(f"{current_path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(f"{current_path}.tmp", current_path)
+
+    logger.info(f"Built model artifact {model_name}@{version} at {artifact_directory}")
+    return artifact_directory
+
+
+def resolve_artifact(root: str, model_name: str, version: Optional[str] = None) -> str:
+    """
+    Find the artifact directory for a model version.
+
+    Args:
+        root (str): Artifact root directory
+        model_name (str): Sentence transformer model name
+        version (Optional[str]): Version label (default: the CURRENT version)
+
+    Returns:
+        str: Path of the artifact directory
+    """
+    model_directory = _model_directory(root, model_name)
+    if version is None:
+        try:
+            with open(os.path.join(model_directory, CURRENT_FILENAME), 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            raise ArtifactError(
+                f"No model artifact for {model_name} under {root}; run 'python model_artifacts.py build' first"
+            )
+
+    artifact_directory = os.path.join(model_directory, version)
+    if not os.path.isfile(os.path.join(artifact_directory, MANIFEST_FILENAME)):
+        raise ArtifactError(f"Model artifact {model_name}@{version} not found at {artifact_directory}")
+    return artifact_directory
+
+
+def verify_artifact(artifact_directory: str) -> Dict[str, Any]:
+    """
+    Check every file of an artifact against its manifest checksums.
+
+    Args:
+        artifact_directory (str): Path of the artifact directory
+
+    Returns:
+        Dict[str, Any]: The verified manifest
+
+    Raises:
+        ArtifactError: If a file is missing, unexpected or does not match its checksum
+    """
+    with open(os.path.join(artifact_directory, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    actual = _hash_files(artifact_directory)
+    expected = manifest['files']
+    missing = sorted(set(expected) - set(actual))
+    unexpected = sorted(set(actual) - set(expected))
+    mismatched = sorted(path for path in set(expected) & set(actual) if expected[path]['sha256'] != actual[path]['sha256'])
+    if missing or unexpected or mismatched:
+        raise ArtifactError(
+            f"Model artifact at {artifact_directory} failed verification: "
+            f"missing={missing} unexpected={unexpected} mismatched={mismatched}"
+        )
+    return manifest
+
+
+def load_artifact_path(root: str, model_name: str, version: Optional[str] = None, verify: bool = True) -> str:
+    """
+    Resolve and (optionally) verify the local artifact to load a model from.
+
+    Args:
+        root (str): Artifact root directory
+        model_name (str): Sentence transformer model name
+        version (Optional[str]): Version label (default: the CURRENT version)
+        verify (bool): Verify checksums before returning
+
+    Returns:
+        str: Path to pass to the encoder in place of the model name
+    """
+    artifact_directory = resolve_artifact(root, model_name, version)
+    if verify:
+        started = time.perf_counter()
+        manifest = verify_artifact(artifact_directory)
+        logger.info(
+            f"Verified model artifact {model_name}@{manifest['version']} "
+            f"({len(manifest['files'])} files) in {time.perf_counter() - started:.3f}s"
+        )
+    return artifact_directory
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for building and verifying model artifacts."""
+    parser = argparse.ArgumentParser(description="Build and verify offline model artifacts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Download a model and write a versioned artifact")
+    build_parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    build_parser.add_argument('--root', default=os.getenv('MODEL_ARTIFACT_DIR', 'models'))
+    build_parser.add_argument('--version', help="Version label (default: checksum-derived)")
+
+    verify_parser = subparsers.add_parser('verify', help="Check an artifact against its manifest")
+    verify_parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    verify_parser.add_argument('--root', default=os.getenv('MODEL_ARTIFACT_DIR', 'models'))
+    verify_parser.add_argument('--version', help="Version label (default: CURRENT)")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        if args.command == 'build':
+            print(build_artifact(args.model, args.root, args.version))
+        else:
+            manifest = verify_artifact(resolve_artifact(args.root, args.model, args.version))
+            print(json.dumps({"model_name": manifest['model_name'], "version": manifest['version'], "verified": True}))
+    except ArtifactError as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Model Loading Module
+
+This module loads the ``SummaryEvaluator`` off the request path: heavy framework
+imports, model construction and a warm-up inference run in a background thread
+while the web server is already accepting liveness probes. Each phase is timed
+so readiness can be reported together with where startup time went.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules whose import dominates startup for each inference backend
+HEAVY_MODULES = {
+    'torch': ['torch', 'sentence_transformers'],
+    'onnx': ['onnxruntime', 'tokenizers'],
+    'onnx-int8': ['onnxruntime', 'tokenizers'],
+}
+
+WARMUP_TEXTS = [
+    "Plants use sunlight to make food.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose, releasing oxygen as a byproduct.",
+]
+
+
+class ModelNotReady(Exception):
+    """Raised when the evaluator is requested before it has finished loading."""
+
+
+class ModelLoader:
+    """
+    Background loader for the summary evaluator with readiness state and startup timings.
+    """
+
+    def __init__(self, factory: Callable[[], Any], heavy_modules: Optional[List[str]] = None, warmup: bool = True):
+        """
+        Initialize the loader.
+
+        Args:
+            factory (Callable[[], Any]): Builds the evaluator (imports happen inside)
+            heavy_modules (Optional[List[str]]): Modules to import and time before building the evaluator
+            warmup (bool): Run a warm-up inference before reporting ready
+        """
+        self.factory = factory
+        self.heavy_modules = heavy_modules or []
+        self.warmup = warmup
+        self.state = 'pending'
+        self.error: Optional[str] = None
+        self.timings: Dict[str, Any] = {}
+        self._evaluator: Optional[Any] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, background: bool = True) -> None:
+        """
+        Start loading the evaluator.
+
+        Args:
+            background (bool): Load in a daemon thread; otherwise block until loaded
+        """
+        if self.state != 'pending':
+            return
+        self.state = 'loading'
+        if background:
+            self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+            self._thread.start()
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            imports = {}
+            for module_name in self.heavy_modules:
+                import_started = time.perf_counter()
+                importlib.import_module(module_name)
+                imports[module_name] = round(time.perf_counter() - import_started, 3)
+            self.timings['import_seconds'] = imports
+
+            load_started = time.perf_counter()
+            evaluator = self.factory()
+            self.timings['model_load_seconds'] = round(time.perf_counter() - load_started, 3)
+
+            if self.warmup:
+                self._warm_up(evaluator)
+
+            self.timings['total_seconds'] = round(time.perf_counter() - started, 3)
+            self._evaluator = evaluator
+            self.state = 'ready'
+            self._ready.set()
+            logger.info(f"Model ready in {self.timings['total_seconds']}s: {self.timings}")
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            self.timings['total_seconds'] = round(time.perf_counter() - started, 3)
+            logger.error(f"Error loading model: {str(e)}")
+
+    def _warm_up(self, evaluator: Any) -> None:
+        # Encode directly so warm-up does not count towards cache or padding stats
+        warmup_started = time.perf_counter()
+        evaluator.encoder.encode(WARMUP_TEXTS, batch_size=len(WARMUP_TEXTS))
+        self.timings['warmup_seconds'] = round(time.perf_counter() - warmup_started, 3)
+
+    def configure_worker(self, num_threads: Optional[int] = None, warmup: bool = True) -> None:
+        """
+        Prepare a forked worker process that inherited an already loaded evaluator.
+
+        Args:
+            num_threads (Optional[int]): Intra-op threads for this worker (None = keep the default)
+            warmup (bool): Run a warm-up inference in this worker
+        """
+        evaluator = self.get()
+        if num_threads:
+            evaluator.encoder.set_num_threads(num_threads)
+            self.timings['intra_op_threads'] = int(num_threads)
+        if warmup:
+            self._warm_up(evaluator)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the evaluator has loaded and warmed up."""
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the evaluator is ready.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait (None = forever)
+
+        Returns:
+            bool: True if the evaluator is ready
+        """
+        return self._ready.wait(timeout)
+
+    def get(self) -> Any:
+        """
+        Get the loaded evaluator.
+
+        Returns:
+            Any: The evaluator built by the factory
+
+        Raises:
+            ModelNotReady: If loading has not finished or failed
+        """
+        if self._evaluator is None:
+            raise ModelNotReady(self.error or f"Model is {self.state}")
+        return self._evaluator
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the loading state and startup timings.
+
+        Returns:
+            Dict[str, Any]: State, error (if any) and per-phase timings in seconds
+        """
+        return {"state": self.state, "error": self.error, "timings": dict(self.timings)}
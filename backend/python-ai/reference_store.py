@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Reference Embedding Store Module
+
+This module keeps precomputed reference-summary embeddings on disk, one memory-mapped
+NumPy matrix per model plus a small JSON index keyed by video id. Worker processes
+map the same file read-only and share its pages, and a restart does not have to
+re-encode the catalog.
+
+Usage:
+    python reference_store.py rebuild --catalog catalog.json --store-dir models/reference_store [--merge]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'index.json'
+
+
+def text_digest(text: str) -> str:
+    """Return the SHA-256 hex digest used to key reference texts."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def load_catalog(path: str) -> Dict[str, str]:
+    """
+    Load a video catalog as a mapping of video id to reference summary.
+
+    Accepts either the list returned by ``GET /api/videos`` or an object mapping
+    video ids to summaries.
+
+    Args:
+        path (str): Path to the catalog JSON file
+
+    Returns:
+        Dict[str, str]: Reference summary for each video id
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+
+    if isinstance(catalog, dict):
+        return {str(video_id): summary for video_id, summary in catalog.items()}
+    return {str(video['id']): video['summary'] for video in catalog if video.get('summary')}
+
+
+class ReferenceEmbeddingStore:
+    """
+    Memory-mapped on-disk store of reference embeddings for one model.
+    """
+
+    def __init__(self, store_dir: str, model_name: str):
+        """
+        Open (or prepare) the store for a model.
+
+        Args:
+            store_dir (str): Root directory of the store
+            model_name (str): Name of the model whose embeddings are stored
+        """
+        self.model_name = model_name
+        self.directory = os.path.join(store_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        self.index_path = os.path.join(self.directory, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._index_mtime = None
+        # (entries by video id, row by text digest, embedding matrix), swapped as one unit
+        self._state: Tuple[Dict[str, Dict[str, Any]], Dict[str, int], Optional[np.ndarray]] = ({}, {}, None)
+        self.reload_if_changed()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-open the index and embedding matrix if another process rebuilt the store.
+
+        Returns:
+            bool: True if the store was (re)loaded
+        """
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._index_mtime:
+            return False
+
+        with self._lock:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            try:
+                # Files are replaced atomically, so the old mapping stays valid for readers
+                embeddings = np.load(os.path.join(self.directory, index['embeddings_file']), mmap_mode='r')
+            except FileNotFoundError:
+                # A newer rebuild replaced this matrix between reading the index and opening it
+                return False
+            entries = index['entries']
+            rows_by_digest = {entry['sha256']: entry['row'] for entry in entries.values()}
+            self._state = (entries, rows_by_digest, embeddings)
+            self._index_mtime = mtime
+
+        logger.info(f"Loaded {len(entries)} reference embeddings for {self.model_name} from {self.directory}")
+        return True
+
+    def get(self, video_id: Any) -> Optional[np.ndarray]:
+        """
+        Get the stored embedding for a video.
+
+        Args:
+            video_id (Any): Video identifier
+
+        Returns:
+            Optional[np.ndarray]: Read-only memory-mapped embedding, or None if not stored
+        """
+        self.reload_if_changed()
+        entries, _, embeddings = self._state
+        entry = entries.get(str(video_id))
+        return None if entry is None else embeddings[entry['row']]
+
+    def get_by_text(self, reference_summary: str) -> Optional[np.ndarray]:
+        """
+        Get the stored embedding for a reference summary by content hash.
+
+        Args:
+            reference_summary (str): Reference summary text
+
+        Returns:
+            Optional[np.ndarray]: Read-only memory-mapped embedding, or None if not stored
+        """
+        self.reload_if_changed()
+        _, rows_by_digest, embeddings = self._state
+        row = rows_by_digest.get(text_digest(reference_summary))
+        return None if row is None else embeddings[row]
+
+    def get_text(self, video_id: Any) -> Optional[str]:
+        """
+        Get the reference summary stored for a video.
+
+        Args:
+            video_id (Any): Video identifier
+
+        Returns:
+            Optional[str]: Reference summary, or None if not stored
+        """
+        self.reload_if_changed()
+        entry = self._state[0].get(str(video_id))
+        return None if entry is None else entry['text']
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def rebuild(self, catalog: Dict[str, str], encode_fn: Callable[[List[str]], np.ndarray],
+                prune: bool = True) -> Dict[str, int]:
+        """
+        Incrementally rebuild the store from a catalog.
+
+        Only videos that are new or whose summary changed are encoded; unchanged rows are
+        copied from the current matrix. Videos missing from the catalog are dropped, unless
+        ``prune`` is off, in which case the catalog is merged into the store.
+
+        Args:
+            catalog (Dict[str, str]): Reference summary for each video id
+            encode_fn (Callable[[List[str]], np.ndarray]): Encodes a list of texts into a matrix
+            prune (bool): Drop stored videos that are not in the catalog
+
+        Returns:
+            Dict[str, int]: Number of added, updated, unchanged and removed videos
+        """
+        self.reload_if_changed()
+        previous, _, previous_embeddings = self._state
+        catalog = {str(video_id): summary for video_id, summary in catalog.items()}
+        if not prune:
+            # Keep references that other catalogs put in the store
+            catalog = {**{video_id: entry['text'] for video_id, entry in previous.items()}, **catalog}
+
+        stale = [
+            video_id for video_id, summary in catalog.items()
+            if video_id not in previous or previous[video_id]['sha256'] != text_digest(summary)
+        ]
+        encoded = encode_fn([catalog[video_id] for video_id in stale]) if stale else None
+        encoded_rows = {video_id: i for i, video_id in enumerate(stale)}
+
+        if encoded is not None:
+            dims = encoded.shape[1]
+        else:
+            dims = previous_embeddings.shape[1] if previous_embeddings is not None else 0
+        matrix = np.zeros((len(catalog), dims), dtype=np.float32)
+        entries = {}
+        for row, (video_id, summary) in enumerate(catalog.items()):
+            if video_id in encoded_rows:
+                matrix[row] = encoded[encoded_rows[video_id]]
+            else:
+                matrix[row] = previous_embeddings[previous[video_id]['row']]
+            entries[video_id] = {"row": row, "sha256": text_digest(summary), "text": summary}
+
+        os.makedirs(self.directory, exist_ok=True)
+        embeddings_file = f"embeddings-{time.time_ns()}.npy"
+        np.save(os.path.join(self.directory, embeddings_file), matrix)
+
+        index = {"model_name": self.model_name, "dimensions": dims, "embeddings_file": embeddings_file, "entries": entries}
+        temp_index_path = f"{self.index_path}.tmp"
+        with open(temp_index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_index_path, self.index_path)
+
+        # Readers that still map an old matrix keep their pages after unlink
+        for filename in os.listdir(self.directory):
+            if filename.startswith('embeddings-') and filename != embeddings_file:
+                os.remove(os.path.join(self.directory, filename))
+
+        self.reload_if_changed()
+
+        added = sum(1 for video_id in stale if video_id not in previous)
+        return {
+            "added": added,
+            "updated": len(stale) - added,
+            "unchanged": len(catalog) - len(stale),
+            "removed": sum(1 for video_id in previous if video_id not in catalog)
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for rebuilding the store."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Manage the on-disk reference embedding store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser('rebuild', help="Encode new or changed reference summaries")
+    rebuild_parser.add_argument('--catalog', required=True, help="Catalog JSON (GET /api/videos output or {id: summary})")
+    rebuild_parser.add_argument('--store-dir', default=os.getenv('REFERENCE_STORE_DIR', 'models/reference_store'))
+    rebuild_parser.add_argument('--model', default=os.getenv('MODEL_NAME', 'all-MiniLM-L6-v2'),
+                                help="Sentence transformer model name")
+    rebuild_parser.add_argument('--merge', action='store_true',
+                                help="Keep stored videos that are not in the catalog")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Encode with the backend, artifact and chunking settings the API serves with
+    from grading_worker import build_evaluator
+
+    evaluator = None
+
+    def encode(texts: List[str]) -> np.ndarray:
+        # Loading the model is the slow part; skip it when every summary is already stored
+        nonlocal evaluator
+        if evaluator is None:
+            evaluator = build_evaluator(args.model)
+        return evaluator.encode_texts(texts)
+
+    store = ReferenceEmbeddingStore(args.store_dir, args.model)
+    counts = store.rebuild(load_catalog(args.catalog), encode, prune=not args.merge)
+    print(json.dumps(counts))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Request Coalescing Module
+
+This module collects concurrent single-pair scoring requests for a short window
+and scores them together in one batched model call, handing each caller back
+its own result.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ScoreFunction = Callable[[List[str], List[str]], np.ndarray]
+
+
+class RequestCoalescer:
+    """
+    Micro-batching scheduler that merges concurrent (user, reference) scoring requests.
+    """
+
+    def __init__(self, score_fn: ScoreFunction, max_wait_ms: float = 5.0, max_batch_size: int = 32):
+        """
+        Initialize the coalescer. The batching thread starts with the first request.
+
+        Args:
+            score_fn (ScoreFunction): Scores lists of user and reference texts pairwise,
+                e.g. ``SummaryEvaluator.score_pairs``
+            max_wait_ms (float): Longest time the first request of a batch waits for company
+            max_batch_size (int): Maximum number of requests scored together
+        """
+        self.score_fn = score_fn
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+
+        self._reset()
+
+        # The batching thread does not survive fork(); pre-fork servers get a fresh one per worker
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._queue: "queue.Queue[Tuple[str, str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self._max_queue_depth = 0
+        self._requests = 0
+        self._failed_batches = 0
+        self._thread = None
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, user_text: str, reference_text: str) -> Future:
+        """
+        Queue a pair for scoring.
+
+        Args:
+            user_text (str): User summary
+            reference_text (str): Reference summary
+
+        Returns:
+            Future: Resolves to the pair's similarity score
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._start()
+        self._queue.put((user_text, reference_text, future))
+        with self._lock:
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return future
+
+    def score(self, user_text: str, reference_text: str) -> float:
+        """
+        Score a pair, blocking until the batch containing it has been evaluated.
+
+        Args:
+            user_text (str): User summary
+            reference_text (str): Reference summary
+
+        Returns:
+            float: Similarity score between 0 and 1
+        """
+        return self.submit(user_text, reference_text).result()
+
+    def _collect_batch(self) -> List[Tuple[str, str, Future]]:
+        """Block for one request, then gather more until the batch is full or the wait expires."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+
+            user_texts = [user_text for user_text, _, _ in batch]
+            reference_texts = [reference_text for _, reference_text, _ in batch]
+            try:
+                scores = self.score_fn(user_texts, reference_texts)
+            except Exception as e:
+                logger.error(f"Error scoring coalesced batch of {len(batch)}: {str(e)}")
+                with self._lock:
+                    self._failed_batches += 1
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, future), score in zip(batch, scores):
+                future.set_result(float(score))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dict[str, Any]: Current and peak queue depth, request and batch counts,
+            mean batch size and the batch-size distribution
+        """
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            coalesced = sum(size * count for size, count in self._batch_sizes.items())
+            return {
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "batches": batches,
+                "failed_batches": self._failed_batches,
+                "mean_batch_size": round(coalesced / batches, 2) if batches else 0.0,
+                "batch_size_distribution": {str(size): count for size, count in sorted(self._batch_sizes.items())}
+            }
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Segment Index Module
+
+This module stores per-video transcript segment embeddings on disk. Each video's
+segments are kept as one L2-normalized float32 matrix, memory-mapped read-only
+so worker processes share its pages, next to a JSON file with the segments'
+timestamps and text. Matching a summary against a video is then a single matrix
+multiply of its sentence embeddings with the segment matrix, followed by a
+top-k selection per sentence. The same scores show which segments no sentence
+covers, which becomes coverage feedback such as "you missed 4:00-7:00".
+
+Layout:
+    <index_dir>/<model>/<video_id>.json                segment timestamps and text
+    <index_dir>/<model>/<video_id>-<version>.npy       normalized segment embeddings
+
+Usage:
+    python segment_index.py build --video-id 42 --transcript lecture.vtt
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from text_segmentation import format_timestamp, parse_segments
+
+logger = logging.getLogger(__name__)
+
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+def top_k_matches(query: np.ndarray, segments: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the best matching segments for each query row with one matrix multiply.
+
+    Args:
+        query (np.ndarray): Normalized query embeddings, one row per sentence (S x d)
+        segments (np.ndarray): Normalized segment embeddings (N x d)
+        k (int): Matches returned per query row
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Segment indices (S x k) and scores (S x k),
+            best first, and each segment's best score over all query rows (N)
+    """
+    scores = query @ segments.T
+    k = max(1, min(int(k), scores.shape[1]))
+    if k < scores.shape[1]:
+        # Select the k best per row in linear time, then order only those
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.take_along_axis(candidate_scores, order, axis=1), scores.max(axis=0)
+
+
+def coverage_gaps(segments: List[Dict[str, Any]], best_scores: np.ndarray, threshold: float) -> List[Dict[str, Any]]:
+    """
+    Merge consecutive segments that no sentence matched into gaps.
+
+    Args:
+        segments (List[Dict[str, Any]]): Segments in order, with ``start`` and ``end``
+        best_scores (np.ndarray): Best score of each segment over all sentences
+        threshold (float): Minimum score for a segment to count as covered
+
+    Returns:
+        List[Dict[str, Any]]: Gaps with the first and last segment index, start, end and a label
+    """
+    gaps = []
+    uncovered = np.flatnonzero(best_scores < threshold)
+    if uncovered.size == 0:
+        return gaps
+    # Split the uncovered indices wherever they stop being consecutive
+    for run in np.split(uncovered, np.flatnonzero(np.diff(uncovered) > 1) + 1):
+        first, last = int(run[0]), int(run[-1])
+        start, end = segments[first]['start'], segments[last]['end']
+        if start is not None and end is not None:
+            label = f"{format_timestamp(start)}-{format_timestamp(end)}"
+        else:
+            label = f"segments {first + 1}-{last + 1}" if first != last else f"segment {first + 1}"
+        gaps.append({"first_segment": first, "last_segment": last, "start": start, "end": end, "label": label})
+    return gaps
+
+
+def _is_embeddings_file(filename: str, video_id: str) -> bool:
+    return re.match(rf"^{re.escape(video_id)}-\d+\.npy$", filename) is not None
+
+
+class SegmentIndex:
+    """
+    On-disk store of normalized transcript segment embeddings per video, for one model.
+    """
+
+    def __init__(self, index_dir: str, model_name: str, max_cached_videos: int = 256):
+        """
+        Open (or prepare) the index for a model.
+
+        Args:
+            index_dir (str): Root directory of the index
+            model_name (str): Name of the model whose embeddings are stored
+            max_cached_videos (int): Number of videos whose segments are kept open in memory
+        """
+        self.model_name = model_name
+        self.directory = os.path.join(index_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        self.max_cached_videos = max(1, int(max_cached_videos))
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # video id -> (metadata mtime, segments, memory-mapped matrix)
+        self._cache: "OrderedDict[str, Tuple[int, List[Dict[str, Any]], np.ndarray]]" = OrderedDict()
+
+    def _metadata_path(self, video_id: Any) -> str:
+        video_id = str(video_id)
+        if not VIDEO_ID_PATTERN.match(video_id):
+            raise ValueError(f"Invalid video id: {video_id}")
+        return os.path.join(self.directory, f"{video_id}.json")
+
+    def put(self, video_id: Any, segments: List[Dict[str, Any]], embeddings: np.ndarray) -> Dict[str, Any]:
+        """
+        Store a video's segments and their embeddings, replacing any previous ones.
+
+        Args:
+            video_id (Any): Video identifier
+            segments (List[Dict[str, Any]]): Segments with ``start``, ``end`` and ``text``
+            embeddings (np.ndarray): One embedding row per segment (normalized here)
+
+        Returns:
+            Dict[str, Any]: Video id, number of segments and embedding dimensions
+        """
+        if len(segments) != len(embeddings):
+            raise ValueError("Number of segments must match number of embeddings")
+        metadata_path = self._metadata_path(video_id)
+        video_id = str(video_id)
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        matrix = (embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+        embeddings_file = f"{video_id}-{time.time_ns()}.npy"
+        np.save(os.path.join(self.directory, embeddings_file), matrix)
+
+        metadata = {
+            "video_id": video_id,
+            "model_name": self.model_name,
+            "dimensions": int(matrix.shape[1]),
+            "embeddings_file": embeddings_file,
+            "segments": segments
+        }
+        with open(f"{metadata_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(metadata, f)
+        os.replace(f"{metadata_path}.tmp", metadata_path)
+
+        # Readers that still map an old matrix keep their pages after unlink
+        for filename in os.listdir(self.directory):
+            if _is_embeddings_file(filename, video_id) and filename != embeddings_file:
+                os.remove(os.path.join(self.directory, filename))
+
+        return {"video_id": video_id, "segments": len(segments), "dimensions": metadata['dimensions']}
+
+    def get(self, video_id: Any) -> Optional[Tuple[List[Dict[str, Any]], np.ndarray]]:
+        """
+        Get a video's segments and normalized segment embeddings.
+
+        Args:
+            video_id (Any): Video identifier
+
+        Returns:
+            Optional[Tuple[List[Dict[str, Any]], np.ndarray]]: Segments and read-only memory-mapped
+                matrix, or None if the video is not indexed
+        """
+        metadata_path = self._metadata_path(video_id)
+        try:
+            mtime = os.stat(metadata_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        video_id = str(video_id)
+        with self._lock:
+            cached = self._cache.get(video_id)
+            if cached is not None and cached[0] == mtime:
+                self._cache.move_to_end(video_id)
+                return cached[1], cached[2]
+
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        try:
+            matrix = np.load(os.path.join(self.directory, metadata['embeddings_file']), mmap_mode='r')
+        except FileNotFoundError:
+            # Rebuilt between reading the metadata and opening the matrix
+            return self.get(video_id)
+
+        with self._lock:
+            self._cache[video_id] = (mtime, metadata['segments'], matrix)
+            self._cache.move_to_end(video_id)
+            while len(self._cache) > self.max_cached_videos:
+                self._cache.popitem(last=False)
+        return metadata['segments'], matrix
+
+    def delete(self, video_id: Any) -> bool:
+        """
+        Remove a video's segments.
+
+        Args:
+            video_id (Any): Video identifier
+
+        Returns:
+            bool: False if the video was not indexed
+        """
+        metadata_path = self._metadata_path(video_id)
+        if not os.path.exists(metadata_path):
+            return False
+        os.remove(metadata_path)
+        for filename in os.listdir(self.directory):
+            if _is_embeddings_file(filename, str(video_id)):
+                os.remove(os.path.join(self.directory, filename))
+        with self._lock:
+            self._cache.pop(str(video_id), None)
+        return True
+
+    def build(self, video_id: Any, segments: List[Dict[str, Any]],
+              encode_fn: Callable[[List[str]], np.ndarray]) -> Dict[str, Any]:
+        """
+        Encode a video's segments and store them.
+
+        Args:
+            video_id (Any): Video identifier
+            segments (List[Dict[str, Any]]): Segments with ``start``, ``end`` and ``text``
+            encode_fn (Callable[[List[str]], np.ndarray]): Encodes a list of texts into a matrix
+
+        Returns:
+            Dict[str, Any]: Video id, number of segments and embedding dimensions
+        """
+        if not segments:
+            raise ValueError("No segments to index")
+        return self.put(video_id, segments, encode_fn([segment['text'] for segment in segments]))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dict[str, Any]: Number of indexed videos and of videos open in this process
+        """
+        videos = sum(1 for filename in os.listdir(self.directory) if filename.endswith('.json'))
+        with self._lock:
+            return {"videos": videos, "cached_videos": len(self._cache)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for indexing a transcript."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Manage the per-video transcript segment index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="Encode and index a video's transcript segments")
+    build_parser.add_argument('--video-id', required=True)
+    build_parser.add_argument('--transcript', required=True,
+                              help="SRT/WebVTT subtitles, plain text, or a JSON list of {start, end, text}")
+    build_parser.add_argument('--sentences-per-segment', type=int, default=3, help="Segment size for plain text")
+    build_parser.add_argument('--index-dir', default=os.getenv('SEGMENT_INDEX_DIR', 'models/segment_index'))
+    build_parser.add_argument('--model', default=os.getenv('MODEL_NAME', 'all-MiniLM-L6-v2'),
+                              help="Sentence transformer model name")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    with open(args.transcript, 'r', encoding='utf-8') as f:
+        content = f.read()
+    data = json.loads(content) if args.transcript.endswith('.json') else content
+
+    # Encode with the backend, artifact and chunking settings the API serves with
+    from grading_worker import build_evaluator
+
+    evaluator = build_evaluator(args.model)
+    index = SegmentIndex(args.index_dir, args.model)
+    print(json.dumps(index.build(args.video_id, parse_segments(data, args.sentences_per_segment),
+                                 evaluator.encode_texts)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
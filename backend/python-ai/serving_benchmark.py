@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Serving Benchmark Module
+
+This module measures how throughput of the pre-fork Gunicorn server scales with
+the number of CPU cores. For each worker count it starts ``gunicorn -c
+gunicorn.conf.py app:app`` with one worker per core budget, drives it with
+concurrent ``/similarity-score`` requests for a fixed duration and reports
+throughput, latency percentiles, throughput per core and scaling efficiency
+relative to the smallest configuration.
+
+Usage:
+    python serving_benchmark.py --workers 1,2,4 --duration 30
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from inference_backends import SAMPLE_PAIRS
+
+SERVICE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode} before becoming ready")
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Service at {base_url} was not ready within {timeout}s")
+
+
+def _drive_load(base_url: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    """Send requests from ``concurrency`` client threads for ``duration`` seconds."""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(client_id: int) -> None:
+        session = requests.Session()
+        i = client_id
+        while time.monotonic() < deadline:
+            user_text, reference_text = SAMPLE_PAIRS[i % len(SAMPLE_PAIRS)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = session.post(
+                    f"{base_url}/similarity-score",
+                    json={"user_text": user_text, "reference_text": reference_text},
+                    timeout=60
+                )
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_latency_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_latency_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2) if latencies else None
+    }
+
+
+def run_configuration(workers: int, intra_op_threads: int, concurrency_per_worker: int,
+                      duration: float, warmup: float, ready_timeout: float) -> Dict[str, Any]:
+    """
+    Start the server with one worker configuration and measure it under load.
+
+    Args:
+        workers (int): Number of Gunicorn worker processes
+        intra_op_threads (int): Inference threads per worker
+        concurrency_per_worker (int): Concurrent client connections per worker
+        duration (float): Seconds of measured load
+        warmup (float): Seconds of unmeasured load before measuring
+        ready_timeout (float): Seconds to wait for the server to become ready
+
+    Returns:
+        Dict[str, Any]: Configuration and load results
+    """
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), WORKERS=str(workers), INTRA_OP_THREADS=str(intra_op_threads))
+    env.setdefault('DEVICE', 'cpu')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=SERVICE_DIRECTORY,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_ready(base_url, process, ready_timeout)
+        concurrency = workers * concurrency_per_worker
+        if warmup > 0:
+            _drive_load(base_url, concurrency, warmup)
+        result = _drive_load(base_url, concurrency, duration)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    cores = workers * intra_op_threads
+    result.update({
+        "workers": workers,
+        "intra_op_threads": intra_op_threads,
+        "cores": cores,
+        "concurrency": concurrency,
+        "throughput_per_core": round(result['throughput_rps'] / cores, 2)
+    })
+    return result
+
+
+def benchmark(worker_counts: List[int], intra_op_threads: int = 1, concurrency_per_worker: int = 4,
+              duration: float = 20.0, warmup: float = 3.0, ready_timeout: float = 300.0) -> List[Dict[str, Any]]:
+    """
+    Measure throughput for each worker count.
+
+    Args:
+        worker_counts (List[int]): Worker counts to measure, smallest first
+        intra_op_threads (int): Inference threads per worker
+        concurrency_per_worker (int): Concurrent client connections per worker
+        duration (float): Seconds of measured load per configuration
+        warmup (float): Seconds of unmeasured load per configuration
+        ready_timeout (float): Seconds to wait for each server to become ready
+
+    Returns:
+        List[Dict[str, Any]]: One result per worker count, with scaling efficiency
+            relative to the first configuration
+    """
+    results = []
+    baseline: Optional[Dict[str, Any]] = None
+    for workers in worker_counts:
+        result = run_configuration(workers, intra_op_threads, concurrency_per_worker, duration, warmup, ready_timeout)
+        if baseline is None:
+            baseline = result
+        ideal = baseline['throughput_per_core'] * result['cores']
+        result['scaling_efficiency'] = round(result['throughput_rps'] / ideal, 3) if ideal else None
+        results.append(result)
+        print(json.dumps(result), flush=True)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for the serving benchmark."""
+    parser = argparse.ArgumentParser(description="Measure pre-fork server throughput scaling per core")
+    parser.add_argument('--workers', default='1,2,4', help="Comma-separated worker counts")
+    parser.add_argument('--intra-op-threads', type=int, default=1, help="Inference threads per worker")
+    parser.add_argument('--concurrency-per-worker', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--ready-timeout', type=float, default=300.0)
+    args = parser.parse_args(argv)
+
+    worker_counts = sorted(int(count) for count in args.workers.split(',') if count.strip())
+    cpu_count = os.cpu_count() or 1
+    if worker_counts[-1] * args.intra_op_threads > cpu_count:
+        print(f"Warning: {worker_counts[-1]} workers x {args.intra_op_threads} threads exceeds {cpu_count} cores",
+              file=sys.stderr)
+
+    results = benchmark(worker_counts, args.intra_op_threads, args.concurrency_per_worker,
+                        args.duration, args.warmup, args.ready_timeout)
+
+    print(f"\n{'workers':>8} {'cores':>6} {'req/s':>10} {'req/s/core':>11} {'p50 ms':>9} {'p95 ms':>9} {'scaling':>8}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['cores']:>6} {result['throughput_rps']:>10} "
+              f"{result['throughput_per_core']:>11} {result['p50_latency_ms']:>9} "
+              f"{result['p95_latency_ms']:>9} {result['scaling_efficiency']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,28 +8,129 @@ by comparing user summaries with reference content using semantic similarity.
 
 import logging
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
 from typing import Dict, List, Any, Tuple, Optional
-import torch
+
+from embedding_cache import EmbeddingCache
+from inference_backends import load_encoder
+from length_bucketing import DEFAULT_LENGTH_BUCKETS, PaddingStats, plan_length_buckets
+from segment_index import coverage_gaps, top_k_matches
+from text_segmentation import pack_windows, split_sentences, split_words
 
 logger = logging.getLogger(__name__)
 
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Scale each embedding row to unit L2 norm, leaving all-zero rows at zero."""
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+CHUNK_AGGREGATIONS = ('f1', 'recall', 'precision', 'max')
+REFERENCE_AGGREGATIONS = ('max', 'mean', 'top_k')
+
+def pad_windows(embeddings: np.ndarray, offsets: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gather per-text window embeddings from a flat matrix into a padded tensor.
+
+    Args:
+        embeddings (np.ndarray): Window embeddings of all texts, one row per window
+        offsets (np.ndarray): Row of each text's first window
+        counts (np.ndarray): Number of windows of each text
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Windows (texts x max windows x dims) and the mask of real windows
+    """
+    positions = np.arange(int(counts.max()))
+    mask = positions[None, :] < counts[:, None]
+    rows = np.where(mask, offsets[:, None] + positions[None, :], 0)
+    return embeddings[rows], mask
+
+def aggregate_window_scores(similarity: np.ndarray, user_mask: np.ndarray, reference_mask: np.ndarray,
+                            method: str = 'f1') -> np.ndarray:
+    """
+    Reduce per-pair window similarity matrices to one score per pair.
+
+    ``recall`` averages, over the reference windows, the best match among the user
+    windows (how much of the reference is covered); ``precision`` does the same the
+    other way round; ``f1`` is their harmonic mean; ``max`` is the best single match.
+    With one window on each side every method equals the plain cosine similarity.
+
+    Args:
+        similarity (np.ndarray): Cosine similarities (pairs x user windows x reference windows)
+        user_mask (np.ndarray): Real user windows (pairs x user windows)
+        reference_mask (np.ndarray): Real reference windows (pairs x reference windows)
+        method (str): ``f1``, ``recall``, ``precision`` or ``max``
+
+    Returns:
+        np.ndarray: Score for each pair
+    """
+    valid = user_mask[:, :, None] & reference_mask[:, None, :]
+    similarity = np.where(valid, similarity, -np.inf)
+    if method == 'max':
+        return similarity.max(axis=(1, 2))
+
+    best_for_user = np.where(user_mask, similarity.max(axis=2), 0.0)
+    best_for_reference = np.where(reference_mask, similarity.max(axis=1), 0.0)
+    precision = best_for_user.sum(axis=1) / user_mask.sum(axis=1)
+    recall = best_for_reference.sum(axis=1) / reference_mask.sum(axis=1)
+    if method == 'recall':
+        return recall
+    if method == 'precision':
+        return precision
+    total = precision + recall
+    return np.where(total > 0, 2 * precision * recall / np.where(total > 0, total, 1.0), total / 2)
+
 class SummaryEvaluator:
     """
     AI-powered summary evaluation using sentence transformers for semantic similarity.
     """
 
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2',
+                 cache_max_entries: int = 1024,
+                 cache_max_bytes: int = 64 * 1024 * 1024,
+                 batch_size: int = 64,
+                 length_buckets: Optional[List[int]] = None,
+                 reference_store: Optional[Any] = None,
+                 backend: str = 'torch',
+                 device: str = 'auto',
+                 onnx_model_dir: Optional[str] = None,
+                 model_path: Optional[str] = None,
+                 chunk_long_texts: bool = False,
+                 chunk_aggregation: str = 'f1',
+                 chunk_overlap: int = 1):
         """
         Initialize the summary evaluator with a sentence transformer model.
 
         Args:
             model_name (str): Name of the sentence transformer model to use
+            cache_max_entries (int): Maximum number of cached reference embeddings
+            cache_max_bytes (int): Maximum total size of cached reference embeddings in bytes
+            batch_size (int): Number of texts per forward pass when encoding in batch
+            length_buckets (Optional[List[int]]): Token length boundaries for bucketed batching
+            reference_store (Optional[Any]): ReferenceEmbeddingStore with precomputed reference embeddings
+            backend (str): Inference backend: ``torch``, ``onnx`` or ``onnx-int8``
+            device (str): Torch device for the torch backend (``auto``, ``cpu`` or ``cuda``)
+            onnx_model_dir (Optional[str]): Exported model directory for the ONNX backends
+            model_path (Optional[str]): Local model artifact to load instead of resolving model_name
+            chunk_long_texts (bool): Score texts longer than the model's sequence limit by sentence windows
+            chunk_aggregation (str): How window similarities become a score: ``f1``, ``recall``, ``precision`` or ``max``
+            chunk_overlap (int): Sentences shared by consecutive windows
         """
         try:
-            self.model = SentenceTransformer(model_name)
-            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            logger.info(f"SummaryEvaluator initialized with model: {model_name} on device: {self.device}")
+            self.model_name = model_name
+            self.batch_size = max(1, int(batch_size))
+            self.length_buckets = sorted(length_buckets or DEFAULT_LENGTH_BUCKETS)
+            self.padding_stats = PaddingStats(self.length_buckets)
+            self.reference_store = reference_store
+            self.backend = backend
+            self.encoder = load_encoder(model_path or model_name, backend, device=device, onnx_model_dir=onnx_model_dir)
+            self.device = self.encoder.device
+            self.embedding_cache = EmbeddingCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes)
+            if chunk_aggregation not in CHUNK_AGGREGATIONS:
+                raise ValueError(f"Unknown chunk aggregation: {chunk_aggregation}")
+            self.chunk_long_texts = chunk_long_texts
+            self.chunk_aggregation = chunk_aggregation
+            self.chunk_overlap = max(0, int(chunk_overlap))
+            self._special_tokens: Optional[int] = None
+            logger.info(f"SummaryEvaluator initialized with model: {model_name} ({backend} backend) on device: {self.device}")
         except Exception as e:
             logger.error(f"Error initializing SummaryEvaluator: {str(e)}")
             raise
@@ -46,19 +147,433 @@ class SummaryEvaluator:
             float: Similarity score between 0 and 1
         """
         try:
-            # Encode both summaries
-            embedding_reference = self.model.encode(reference_summary, convert_to_tensor=True)
-            embedding_user = self.model.encode(user_summary, convert_to_tensor=True)
-
-            # Calculate cosine similarity
-            similarity_score = util.pytorch_cos_sim(embedding_user, embedding_reference).item()
-
-            return float(similarity_score)
+            return float(self.score_pairs([user_summary], [reference_summary])[0])
 
         except Exception as e:
             logger.error(f"Error calculating similarity score: {str(e)}")
             return 0.0
 
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts in length-bucketed batches and return embeddings in input order.
+
+        Texts are grouped by token length so each forward pass pads only up to the
+        longest member of its own bucket; padding efficiency is recorded in
+        ``padding_stats``.
+
+        Args:
+            texts (List[str]): Texts to encode
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per text
+        """
+        if len(texts) <= 1:
+            return self.encoder.encode(texts)
+
+        lengths = self.encoder.token_lengths(texts)
+        batches = plan_length_buckets(lengths, self.length_buckets, self.batch_size)
+        self.padding_stats.record(lengths, batches, self.batch_size)
+
+        embeddings = None
+        for batch in batches:
+            batch_embeddings = self.encoder.encode([texts[i] for i in batch], batch_size=len(batch))
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch_embeddings.shape[1]), dtype=batch_embeddings.dtype)
+            # Scatter the bucket back into the original order
+            embeddings[batch] = batch_embeddings
+
+        return embeddings
+
+    def get_reference_embeddings(self, reference_summaries: List[str]) -> np.ndarray:
+        """
+        Get embeddings for reference summaries, encoding only those not already cached
+        in memory or precomputed in the reference store.
+
+        Args:
+            reference_summaries (List[str]): Reference summaries to embed
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per reference summary
+        """
+        embeddings: List[Optional[np.ndarray]] = [
+            self.embedding_cache.get(reference, self.model_name) for reference in reference_summaries
+        ]
+
+        # Fall back to the precomputed on-disk store before running the model
+        if self.reference_store is not None:
+            for i, reference in enumerate(reference_summaries):
+                if embeddings[i] is None:
+                    embeddings[i] = self.reference_store.get_by_text(reference)
+                    if embeddings[i] is not None:
+                        self.embedding_cache.put(reference, self.model_name, embeddings[i])
+
+        # Encode each distinct missing reference once, in a single call
+        missing = list(dict.fromkeys(
+            reference for reference, embedding in zip(reference_summaries, embeddings) if embedding is None
+        ))
+        if missing:
+            encoded = dict(zip(missing, self.encode_texts(missing)))
+            for reference, embedding in encoded.items():
+                self.embedding_cache.put(reference, self.model_name, embedding)
+            embeddings = [
+                encoded[reference] if embedding is None else embedding
+                for reference, embedding in zip(reference_summaries, embeddings)
+            ]
+
+        return np.stack(embeddings)
+
+    def score_pairs(self, user_summaries: List[str], reference_summaries: List[str]) -> np.ndarray:
+        """
+        Calculate cosine similarity for many (user, reference) pairs at once.
+
+        Distinct references are embedded once through the cache, all user summaries
+        are encoded in length-bucketed batches, and every pair is scored in a single
+        vectorized operation.
+
+        Args:
+            user_summaries (List[str]): User summaries
+            reference_summaries (List[str]): Reference summary paired with each user summary
+
+        Returns:
+            np.ndarray: Similarity score for each pair
+        """
+        if len(user_summaries) != len(reference_summaries):
+            raise ValueError("Number of user summaries must match number of reference summaries")
+        if not user_summaries:
+            return np.zeros(0, dtype=np.float32)
+        if self.chunk_long_texts:
+            return self.score_pairs_chunked(user_summaries, reference_summaries)
+
+        unique_references = list(dict.fromkeys(reference_summaries))
+        reference_index = {reference: i for i, reference in enumerate(unique_references)}
+        reference_rows = [reference_index[reference] for reference in reference_summaries]
+
+        embeddings_reference = self.get_reference_embeddings(unique_references)[reference_rows]
+        embeddings_user = self.encode_texts(user_summaries)
+
+        # Row-wise cosine similarity of each user embedding with its reference
+        return (normalize_rows(embeddings_user) * normalize_rows(embeddings_reference)).sum(axis=1)
+
+    def split_windows(self, texts: List[str]) -> List[List[str]]:
+        """
+        Split texts that exceed the model's sequence limit into sentence-aware windows.
+
+        Texts within the limit stay a single window. Longer texts are split into
+        sentences (sentences that are too long on their own into word pieces) and
+        packed greedily into windows that fit the limit.
+
+        Args:
+            texts (List[str]): Texts to split
+
+        Returns:
+            List[List[str]]: Window texts of each text
+        """
+        max_tokens = self.encoder.max_seq_length
+        if self._special_tokens is None:
+            self._special_tokens = self.encoder.token_lengths([''])[0]
+        budget = max_tokens - self._special_tokens
+
+        windows: List[List[str]] = [[text] for text in texts]
+        # Every token covers at least one byte, so shorter texts fit without tokenizing them
+        candidates = [i for i, text in enumerate(texts) if len(text.encode('utf-8')) >= budget]
+        if not candidates:
+            return windows
+        # Token counts are capped at the limit, so reaching it means the text was truncated
+        lengths = self.encoder.token_lengths([texts[i] for i in candidates])
+        long_texts = [i for i, length in zip(candidates, lengths) if length >= max_tokens]
+        if not long_texts:
+            return windows
+
+        sentences_per_text = [split_sentences(texts[i]) or [texts[i]] for i in long_texts]
+        flat = [sentence for sentences in sentences_per_text for sentence in sentences]
+        lengths = self.encoder.token_lengths(flat)
+        if any(length >= max_tokens for length in lengths):
+            # Cut over-long sentences into word pieces; most tokenizers stay under 2 tokens per word
+            too_long = iter([length >= max_tokens for length in lengths])
+            sentences_per_text = [
+                [piece for sentence in sentences
+                 for piece in (split_words(sentence, budget // 2) if next(too_long) else [sentence])]
+                for sentences in sentences_per_text
+            ]
+            flat = [sentence for sentences in sentences_per_text for sentence in sentences]
+            lengths = self.encoder.token_lengths(flat)
+
+        offset = 0
+        for i, sentences in zip(long_texts, sentences_per_text):
+            counts = [length - self._special_tokens for length in lengths[offset:offset + len(sentences)]]
+            windows[i] = pack_windows(sentences, counts, budget, self.chunk_overlap)
+            offset += len(sentences)
+        return windows
+
+    def get_reference_windows(self, reference_summaries: List[str]) -> List[np.ndarray]:
+        """
+        Get normalized window embeddings for reference summaries, encoding only
+        the windows of references not already cached. A reference that fits in
+        one window is its own only window, so its precomputed embedding in the
+        reference store is used when there is one.
+
+        Args:
+            reference_summaries (List[str]): Distinct reference summaries
+
+        Returns:
+            List[np.ndarray]: Matrix of normalized window embeddings for each reference
+        """
+        cache_model = f"{self.model_name}#windows"
+        windows: List[Optional[np.ndarray]] = [
+            self.embedding_cache.get(reference, cache_model) for reference in reference_summaries
+        ]
+        missing = [i for i, embedding in enumerate(windows) if embedding is None]
+        if missing:
+            window_texts = self.split_windows([reference_summaries[i] for i in missing])
+            if self.reference_store is not None:
+                stored = [
+                    self.reference_store.get_by_text(reference_summaries[i]) if len(texts) == 1 else None
+                    for i, texts in zip(missing, window_texts)
+                ]
+                for i, embedding in zip(missing, stored):
+                    if embedding is not None:
+                        windows[i] = normalize_rows(np.asarray(embedding)[None, :])
+                        self.embedding_cache.put(reference_summaries[i], cache_model, windows[i])
+                window_texts = [texts for texts, embedding in zip(window_texts, stored) if embedding is None]
+                missing = [i for i, embedding in zip(missing, stored) if embedding is None]
+        if missing:
+            encoded = normalize_rows(self.encode_texts([text for texts in window_texts for text in texts]))
+            offsets = np.cumsum([0] + [len(texts) for texts in window_texts])
+            for j, i in enumerate(missing):
+                windows[i] = encoded[offsets[j]:offsets[j + 1]]
+                self.embedding_cache.put(reference_summaries[i], cache_model, windows[i])
+        return windows
+
+    def score_pairs_chunked(self, user_summaries: List[str], reference_summaries: List[str]) -> np.ndarray:
+        """
+        Score pairs whose texts may exceed the model's sequence limit.
+
+        Every text is split into sentence-aware windows. All user windows are
+        encoded in one batch and reference windows come from the cache; each
+        pair's user x reference window similarities are computed in one batched
+        matrix multiply and aggregated with ``chunk_aggregation``.
+
+        Args:
+            user_summaries (List[str]): User summaries
+            reference_summaries (List[str]): Reference summary paired with each user summary
+
+        Returns:
+            np.ndarray: Similarity score for each pair
+        """
+        unique_references = list(dict.fromkeys(reference_summaries))
+        reference_index = {reference: i for i, reference in enumerate(unique_references)}
+        reference_rows = np.array([reference_index[reference] for reference in reference_summaries])
+
+        user_windows = self.split_windows(user_summaries)
+        user_embeddings = normalize_rows(self.encode_texts([text for texts in user_windows for text in texts]))
+        user_counts = np.array([len(texts) for texts in user_windows])
+        user_offsets = np.cumsum(user_counts) - user_counts
+
+        return self._score_windows(
+            user_embeddings, user_offsets, user_counts, self.get_reference_windows(unique_references), reference_rows
+        )
+
+    def _score_windows(self, user_embeddings: np.ndarray, user_offsets: np.ndarray, user_counts: np.ndarray,
+                       reference_windows: List[np.ndarray], reference_rows: np.ndarray) -> np.ndarray:
+        """Score each pair's user windows against the windows of reference ``reference_rows[pair]``."""
+        reference_embeddings = np.concatenate(reference_windows).astype(user_embeddings.dtype, copy=False)
+        reference_counts = np.array([len(windows) for windows in reference_windows])
+        reference_offsets = np.cumsum(reference_counts) - reference_counts
+
+        users, user_mask = pad_windows(user_embeddings, user_offsets, user_counts)
+        references, reference_mask = pad_windows(
+            reference_embeddings, reference_offsets[reference_rows], reference_counts[reference_rows]
+        )
+        similarity = np.matmul(users, references.transpose(0, 2, 1))
+        return aggregate_window_scores(similarity, user_mask, reference_mask, self.chunk_aggregation)
+
+    def similarity_matrix(self, user_summaries: List[str], reference_summaries: List[str], tile_size: int = 1024,
+                          out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Score every user summary against every reference summary.
+
+        User summaries are encoded one tile of rows at a time, references come from
+        the embedding cache, and each tile is scored against a tile of references
+        with a single product of normalized embeddings, so memory stays bounded by
+        the tile size. Texts split into windows (``chunk_long_texts``) are compared
+        window by window and aggregated as in ``score_pairs``.
+
+        Args:
+            user_summaries (List[str]): M user summaries
+            reference_summaries (List[str]): K reference summaries
+            tile_size (int): Rows and columns scored per block
+            out (Optional[np.ndarray]): M x K array to write into, e.g. a ``np.memmap`` for very large results
+
+        Returns:
+            np.ndarray: M x K float32 matrix of similarity scores
+        """
+        rows, columns = len(user_summaries), len(reference_summaries)
+        if out is None:
+            out = np.empty((rows, columns), dtype=np.float32)
+        elif out.shape != (rows, columns):
+            raise ValueError(f"out must have shape {(rows, columns)}")
+        if rows == 0 or columns == 0:
+            return out
+        tile_size = max(1, int(tile_size))
+
+        unique_references = list(dict.fromkeys(reference_summaries))
+        reference_index = {reference: i for i, reference in enumerate(unique_references)}
+        reference_rows = np.array([reference_index[reference] for reference in reference_summaries])
+        # Score distinct references only, straight into ``out`` when there are no duplicates
+        unique_out = out if len(unique_references) == columns else np.empty((rows, len(unique_references)), np.float32)
+
+        if self.chunk_long_texts:
+            reference_windows = self.get_reference_windows(unique_references)
+            reference_counts = np.array([len(windows) for windows in reference_windows])
+            references = np.concatenate(reference_windows)
+        else:
+            reference_counts = np.ones(len(unique_references), dtype=np.int64)
+            references = normalize_rows(self.get_reference_embeddings(unique_references))
+        reference_offsets = np.cumsum(reference_counts) - reference_counts
+
+        for row_start in range(0, rows, tile_size):
+            tile = user_summaries[row_start:row_start + tile_size]
+            if self.chunk_long_texts:
+                user_windows = self.split_windows(tile)
+                users = normalize_rows(self.encode_texts([text for texts in user_windows for text in texts]))
+                user_counts = np.array([len(texts) for texts in user_windows])
+            else:
+                users = normalize_rows(self.encode_texts(tile))
+                user_counts = np.ones(len(tile), dtype=np.int64)
+            users = users.astype(references.dtype, copy=False)
+            block = unique_out[row_start:row_start + len(tile)]
+
+            if user_counts.max() == 1 and reference_counts.max() == 1:
+                # One embedding per text: a plain product of normalized embeddings
+                for column_start in range(0, len(unique_references), tile_size):
+                    block[:, column_start:column_start + tile_size] = \
+                        users @ references[column_start:column_start + tile_size].T
+            else:
+                self._window_matrix_tile(users, user_counts, references, reference_offsets, reference_counts,
+                                         tile_size, block)
+
+        if unique_out is not out:
+            out[:] = unique_out[:, reference_rows]
+        return out
+
+    def _window_matrix_tile(self, users: np.ndarray, user_counts: np.ndarray, references: np.ndarray,
+                            reference_offsets: np.ndarray, reference_counts: np.ndarray, tile_size: int,
+                            block: np.ndarray, max_elements: int = 1 << 24) -> None:
+        """Fill ``block`` with window-aggregated scores of a tile of users against all references."""
+        user_offsets = np.cumsum(user_counts) - user_counts
+        user_tensor, user_mask = pad_windows(users, user_offsets, user_counts)
+        # Keep the (users x references x user windows x reference windows) block under max_elements
+        per_reference = user_tensor.shape[0] * user_tensor.shape[1] * int(reference_counts.max())
+        column_tile = max(1, min(tile_size, max_elements // per_reference))
+
+        for column_start in range(0, len(reference_counts), column_tile):
+            columns = slice(column_start, column_start + column_tile)
+            reference_tensor, reference_mask = pad_windows(
+                references, reference_offsets[columns], reference_counts[columns]
+            )
+            similarity = np.einsum('mud,krd->mkur', user_tensor, reference_tensor)
+            m, k = similarity.shape[:2]
+            scores = aggregate_window_scores(
+                similarity.reshape(m * k, *similarity.shape[2:]),
+                np.repeat(user_mask, k, axis=0),
+                np.tile(reference_mask, (m, 1)),
+                self.chunk_aggregation
+            )
+            block[:, columns] = scores.reshape(m, k)
+
+    def score_references(self, user_summary: str, reference_summaries: List[str]) -> np.ndarray:
+        """
+        Score one user summary against several references.
+
+        The user summary is encoded once and the references come from the
+        embedding cache, so the cost stays close to a single-reference score.
+
+        Args:
+            user_summary (str): User summary
+            reference_summaries (List[str]): Reference summaries
+
+        Returns:
+            np.ndarray: Similarity score against each reference
+        """
+        if not reference_summaries:
+            return np.zeros(0, dtype=np.float32)
+
+        unique_references = list(dict.fromkeys(reference_summaries))
+        reference_index = {reference: i for i, reference in enumerate(unique_references)}
+        reference_rows = np.array([reference_index[reference] for reference in reference_summaries])
+
+        if not self.chunk_long_texts:
+            user_embedding = normalize_rows(self.encode_texts([user_summary]))[0]
+            reference_embeddings = normalize_rows(self.get_reference_embeddings(unique_references))
+            return (reference_embeddings @ user_embedding)[reference_rows]
+
+        # Every reference is compared with the same user windows
+        user_windows = self.split_windows([user_summary])[0]
+        user_embeddings = normalize_rows(self.encode_texts(user_windows))
+        count = len(reference_summaries)
+        return self._score_windows(
+            user_embeddings, np.zeros(count, dtype=np.int64), np.full(count, len(user_windows)),
+            self.get_reference_windows(unique_references), reference_rows
+        )
+
+    def evaluate_multi_reference(self, user_summary: str, reference_summaries: List[str],
+                                 aggregation: str = 'max', top_k: int = 2) -> Dict[str, Any]:
+        """
+        Evaluate a user summary against several valid reference summaries.
+
+        Args:
+            user_summary (str): User's understanding/summary
+            reference_summaries (List[str]): Reference summaries for the same video
+            aggregation (str): ``max`` (best reference), ``mean`` (all references) or
+                ``top_k`` (mean of the ``top_k`` best references)
+            top_k (int): Number of references averaged by ``top_k`` aggregation
+
+        Returns:
+            Dict[str, Any]: Evaluation results against the best matching reference, with the
+                aggregated score and the score against each reference
+        """
+        if aggregation not in REFERENCE_AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}")
+        if not reference_summaries:
+            raise ValueError("At least one reference summary is required")
+
+        scores = self.score_references(user_summary, reference_summaries)
+        if aggregation == 'max':
+            similarity_score = float(scores.max())
+        elif aggregation == 'mean':
+            similarity_score = float(scores.mean())
+        else:
+            k = max(1, min(int(top_k), len(scores)))
+            similarity_score = float(np.partition(scores, len(scores) - k)[-k:].mean())
+
+        best_reference = int(scores.argmax())
+        evaluation = self.build_evaluation(user_summary, reference_summaries[best_reference], similarity_score)
+        evaluation["multi_reference"] = {
+            "aggregation": aggregation,
+            "top_k": k if aggregation == 'top_k' else None,
+            "best_reference_index": best_reference,
+            "reference_scores": [round(float(score), 3) for score in scores]
+        }
+        return evaluation
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get reference embedding cache statistics.
+
+        Returns:
+            Dict[str, Any]: Cache usage and hit/miss counters
+        """
+        return self.embedding_cache.stats()
+
+    def get_padding_stats(self) -> Dict[str, Any]:
+        """
+        Get padding efficiency statistics for bucketed encoding.
+
+        Returns:
+            Dict[str, Any]: Real vs. padded token counts, overall and per bucket
+        """
+        return self.padding_stats.stats()
+
     def get_feedback_message(self, similarity_score: float) -> str:
         """
         Generate feedback message based on similarity score.
@@ -114,35 +629,7 @@ class SummaryEvaluator:
             # Calculate similarity score
             similarity_score = self.calculate_similarity_score(user_summary, reference_summary)
 
-            # Generate feedback and performance level
-            feedback_message = self.get_feedback_message(similarity_score)
-            performance_level = self.get_performance_level(similarity_score)
-
-            # Calculate additional metrics
-            word_count_user = len(user_summary.split())
-            word_count_reference = len(reference_summary.split())
-            length_ratio = word_count_user / word_count_reference if word_count_reference > 0 else 0
-
-            # Determine if length is appropriate
-            length_feedback = self._get_length_feedback(length_ratio)
-
-            return {
-                "similarity_score": round(similarity_score, 3),
-                "performance_level": performance_level,
-                "feedback_message": feedback_message,
-                "length_analysis": {
-                    "user_word_count": word_count_user,
-                    "reference_word_count": word_count_reference,
-                    "length_ratio": round(length_ratio, 2),
-                    "length_feedback": length_feedback
-                },
-                "detailed_metrics": {
-                    "semantic_similarity": round(similarity_score, 3),
-                    "comprehensiveness_score": round(similarity_score * 100, 1),
-                    "understanding_quality": performance_level
-                },
-                "recommendations": self._generate_recommendations(similarity_score, length_ratio)
-            }
+            return self.build_evaluation(user_summary, reference_summary, similarity_score)
 
         except Exception as e:
             logger.error(f"Error in summary evaluation: {str(e)}")
@@ -153,6 +640,48 @@ class SummaryEvaluator:
                 "feedback_message": "An error occurred during evaluation."
             }
 
+    def build_evaluation(self, user_summary: str, reference_summary: str, similarity_score: float) -> Dict[str, Any]:
+        """
+        Assemble the evaluation result for a pair whose similarity score is already known.
+
+        Args:
+            user_summary (str): User's understanding/summary
+            reference_summary (str): Reference or ideal summary
+            similarity_score (float): Similarity score between 0 and 1
+
+        Returns:
+            Dict[str, Any]: Comprehensive evaluation results
+        """
+        # Generate feedback and performance level
+        feedback_message = self.get_feedback_message(similarity_score)
+        performance_level = self.get_performance_level(similarity_score)
+
+        # Calculate additional metrics
+        word_count_user = len(user_summary.split())
+        word_count_reference = len(reference_summary.split())
+        length_ratio = word_count_user / word_count_reference if word_count_reference > 0 else 0
+
+        # Determine if length is appropriate
+        length_feedback = self._get_length_feedback(length_ratio)
+
+        return {
+            "similarity_score": round(similarity_score, 3),
+            "performance_level": performance_level,
+            "feedback_message": feedback_message,
+            "length_analysis": {
+                "user_word_count": word_count_user,
+                "reference_word_count": word_count_reference,
+                "length_ratio": round(length_ratio, 2),
+                "length_feedback": length_feedback
+            },
+            "detailed_metrics": {
+                "semantic_similarity": round(similarity_score, 3),
+                "comprehensiveness_score": round(similarity_score * 100, 1),
+                "understanding_quality": performance_level
+            },
+            "recommendations": self._generate_recommendations(similarity_score, length_ratio)
+        }
+
     def _get_length_feedback(self, length_ratio: float) -> str:
         """Generate feedback about summary length."""
         if length_ratio < 0.3:
@@ -189,6 +718,9 @@ class SummaryEvaluator:
         """
         Evaluate multiple summaries in batch.
 
+        All pairs are scored with one batched encode and a vectorized cosine
+        similarity, producing the same per-pair results as ``evaluate_summary``.
+
         Args:
             user_summaries (List[str]): List of user summaries
             reference_summaries (List[str]): List of reference summaries
@@ -199,9 +731,69 @@ class SummaryEvaluator:
         if len(user_summaries) != len(reference_summaries):
             raise ValueError("Number of user summaries must match number of reference summaries")
 
-        results = []
-        for user_summary, reference_summary in zip(user_summaries, reference_summaries):
-            result = self.evaluate_summary(user_summary, reference_summary)
-            results.append(result)
+        try:
+            scores = self.score_pairs(user_summaries, reference_summaries)
+        except Exception as e:
+            # Fall back to pair-by-pair evaluation so one bad input only fails its own result
+            logger.error(f"Error in batched scoring, evaluating pairs individually: {str(e)}")
+            return [
+                self.evaluate_summary(user_summary, reference_summary)
+                for user_summary, reference_summary in zip(user_summaries, reference_summaries)
+            ]
+
+        return [
+            self.build_evaluation(user_summary, reference_summary, float(score))
+            for user_summary, reference_summary, score in zip(user_summaries, reference_summaries, scores)
+        ]
+
+    def match_segments(self, user_summary: str, segments: List[Dict[str, Any]], segment_embeddings: np.ndarray,
+                       top_k: int = 3, coverage_threshold: float = 0.5) -> Dict[str, Any]:
+        """
+        Match each sentence of a summary to its best transcript segments and report uncovered parts.
+
+        The summary's sentences are encoded in one batch and scored against every
+        segment with a single matrix multiply.
 
-        return results
\ No newline at end of file
+        Args:
+            user_summary (str): User's understanding/summary
+            segments (List[Dict[str, Any]]): Transcript segments with ``start``, ``end`` and ``text``
+            segment_embeddings (np.ndarray): Normalized segment embeddings, one row per segment
+            top_k (int): Matches returned per sentence
+            coverage_threshold (float): Minimum similarity for a segment to count as covered
+
+        Returns:
+            Dict[str, Any]: Top matches per sentence and coverage of the segments, with gaps
+        """
+        sentences = split_sentences(user_summary) or [user_summary]
+        query = normalize_rows(self.encode_texts(sentences)).astype(segment_embeddings.dtype, copy=False)
+        indices, scores, best_scores = top_k_matches(query, segment_embeddings, top_k)
+
+        matches = []
+        for sentence, sentence_indices, sentence_scores in zip(sentences, indices, scores):
+            matches.append({
+                "sentence": sentence,
+                "matches": [
+                    {
+                        "segment": int(index),
+                        "start": segments[index]['start'],
+                        "end": segments[index]['end'],
+                        "text": segments[index]['text'],
+                        "score": round(float(score), 3)
+                    }
+                    for index, score in zip(sentence_indices, sentence_scores)
+                ]
+            })
+
+        covered = int((best_scores >= coverage_threshold).sum())
+        gaps = coverage_gaps(segments, best_scores, coverage_threshold)
+        return {
+            "sentences": matches,
+            "coverage": {
+                "covered_segments": covered,
+                "total_segments": len(segments),
+                "coverage_ratio": round(covered / len(segments), 3) if segments else 0.0,
+                "threshold": coverage_threshold,
+                "gaps": gaps
+            },
+            "feedback": [f"You did not cover {gap['label']}" for gap in gaps]
+        }
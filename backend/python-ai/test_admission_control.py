@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the admission controller.
+
+Usage:
+    python -m pytest test_admission_control.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from admission_control import AdmissionController, AdmissionRejected
+
+
+def _hold_slot(controller: AdmissionController, release: threading.Event) -> threading.Thread:
+    """Occupy one in-flight slot from another thread until ``release`` is set."""
+    acquired = threading.Event()
+
+    def work() -> None:
+        controller.acquire("evaluate")
+        acquired.set()
+        release.wait()
+        controller.release("evaluate", 0.01)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    assert acquired.wait(1)
+    return thread
+
+
+def test_admits_immediately_below_limit():
+    controller = AdmissionController(max_in_flight=2, max_queue=0)
+    assert controller.acquire("evaluate") < 0.1
+    assert controller.acquire("evaluate") < 0.1
+    assert controller.stats()["in_flight"] == 2
+
+
+def test_rejects_with_429_when_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+    controller.acquire("evaluate")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("evaluate")
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after >= 1
+    assert controller.stats()["endpoints"]["evaluate"]["rejected"]["queue_full"] == 1
+
+
+def test_rejects_with_503_when_deadline_passes_in_queue():
+    controller = AdmissionController(max_in_flight=1, max_queue=4)
+    release = threading.Event()
+    holder = _hold_slot(controller, release)
+    try:
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.acquire("evaluate", deadline_ms=50)
+        assert rejected.value.status_code == 503
+        assert controller.stats()["queued"] == 0
+    finally:
+        release.set()
+        holder.join()
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_sheds_up_front_when_backlog_rules_out_deadline():
+    controller = AdmissionController(max_in_flight=1, max_queue=4)
+    controller.acquire("evaluate")
+    controller.release("evaluate", 1.0)
+    controller.acquire("evaluate")
+    started = time.monotonic()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("evaluate", deadline_ms=100)
+    assert rejected.value.status_code == 503
+    assert time.monotonic() - started < 0.05
+
+
+def test_release_hands_slot_to_queued_waiter():
+    controller = AdmissionController(max_in_flight=1, max_queue=4)
+    release = threading.Event()
+    holder = _hold_slot(controller, release)
+    waits = []
+    waiter = threading.Thread(target=lambda: waits.append(controller.acquire("evaluate", deadline_ms=2000)))
+    waiter.start()
+    time.sleep(0.05)
+    assert controller.stats()["queued"] == 1
+    release.set()
+    holder.join()
+    waiter.join(1)
+    assert len(waits) == 1 and waits[0] >= 0.05
+    assert controller.stats()["in_flight"] == 1
+
+
+def test_timed_out_waiter_does_not_strand_the_next_one():
+    controller = AdmissionController(max_in_flight=1, max_queue=4)
+    release = threading.Event()
+    holder = _hold_slot(controller, release)
+    outcomes = []
+
+    def wait_for_slot(deadline_ms: float) -> None:
+        try:
+            controller.acquire("evaluate", deadline_ms=deadline_ms)
+            outcomes.append("admitted")
+        except AdmissionRejected:
+            outcomes.append("rejected")
+
+    short = threading.Thread(target=wait_for_slot, args=(30,))
+    long = threading.Thread(target=wait_for_slot, args=(2000,))
+    short.start()
+    long.start()
+    short.join(1)
+    release.set()
+    holder.join()
+    long.join(1)
+    assert sorted(outcomes) == ["admitted", "rejected"]
+
+
+def test_run_releases_slot_when_work_raises():
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+
+    def fail() -> None:
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        controller.run("evaluate", fail)
+    stats = controller.stats()
+    assert stats["in_flight"] == 0
+    assert stats["endpoints"]["evaluate"]["completed"] == 1
+    assert controller.run("evaluate", lambda: 42) == 42
@@ -22,6 +22,18 @@ def test_health():
         print(f"Error: {e}")
         return False
 
+def test_ready():
+    """Test readiness endpoint"""
+    print("Testing ready endpoint...")
+    try:
+        response = requests.get(f"{BASE_URL}/ready")
+        print(f"Status: {response.status_code}")
+        print(f"Response: {response.json()}")
+        return response.status_code == 200
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
 def test_evaluate_summary():
     """Test summary evaluation endpoint"""
     print("\nTesting evaluate-summary endpoint...")
@@ -91,6 +103,33 @@ def test_similarity_score():
         print(f"Error: {e}")
         return False
 
+def test_evaluate_multi_reference():
+    """Test multi-reference evaluation endpoint"""
+    print("\nTesting evaluate-multi-reference endpoint...")
+    
+    test_data = {
+        "user_text": "The video shows how to cook pasta",
+        "reference_summaries": [
+            "This tutorial demonstrates pasta cooking techniques",
+            "Boil water, add salt and cook the pasta until al dente"
+        ],
+        "aggregation": "max"
+    }
+    
+    try:
+        response = requests.post(
+            f"{BASE_URL}/evaluate-multi-reference",
+            json=test_data,
+            headers={"Content-Type": "application/json"}
+        )
+        print(f"Status: {response.status_code}")
+        result = response.json()
+        print(f"Response: {json.dumps(result, indent=2)}")
+        return response.status_code == 200 and len(result['multi_reference']['reference_scores']) == 2
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
 def test_batch_evaluate():
     """Test batch evaluation endpoint"""
     print("\nTesting batch-evaluate endpoint...")
@@ -122,6 +161,32 @@ def test_batch_evaluate():
         print(f"Error: {e}")
         return False
 
+def test_batch_evaluate_stream():
+    """Test streaming NDJSON batch evaluation endpoint"""
+    print("\nTesting batch-evaluate/stream endpoint...")
+    
+    pairs = [
+        {"user_text": "Plants make food using sunlight", "reference_text": "Photosynthesis allows plants to convert sunlight into energy"},
+        {"user_text": "Water boils at 100 degrees", "reference_text": "Water reaches its boiling point at 100 degrees Celsius"},
+        {"user_text": "The Earth orbits the Sun", "reference_text": "Earth completes one orbit around the Sun in 365 days"}
+    ]
+    
+    try:
+        response = requests.post(
+            f"{BASE_URL}/batch-evaluate/stream",
+            data="".join(json.dumps(pair) + "\n" for pair in pairs),
+            headers={"Content-Type": "application/x-ndjson"},
+            stream=True
+        )
+        print(f"Status: {response.status_code}")
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        for line in lines:
+            print(f"Line: {json.dumps(line)}")
+        return response.status_code == 200 and lines[-1].get("summary", {}).get("total_evaluations") == len(pairs)
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 Testing AI Evaluation API")
@@ -129,10 +194,13 @@ def main():
     
     tests = [
         ("Health Check", test_health),
+        ("Readiness Check", test_ready),
         ("Evaluate Summary", test_evaluate_summary),
         ("Compare Texts", test_compare_texts),
         ("Similarity Score", test_similarity_score),
-        ("Batch Evaluate", test_batch_evaluate)
+        ("Multi-Reference Evaluation", test_evaluate_multi_reference),
+        ("Batch Evaluate", test_batch_evaluate),
+        ("Batch Evaluate Stream", test_batch_evaluate_stream)
     ]
     
     results = []
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for text segmentation.
+
+Usage:
+    python -m pytest test_text_segmentation.py
+"""
+
+import random
+from typing import List, Tuple
+
+import pytest
+
+from text_segmentation import pack_windows, split_sentences, split_words
+
+
+def _spans(windows: List[str]) -> List[Tuple[int, int]]:
+    """Turn windows of sentences named ``s<i>`` back into (first, last + 1) sentence ranges."""
+    spans = []
+    for window in windows:
+        indices = [int(name[1:]) for name in window.split(' ')]
+        assert indices == list(range(indices[0], indices[-1] + 1))
+        spans.append((indices[0], indices[-1] + 1))
+    return spans
+
+
+def _pack(token_counts: List[int], max_tokens: int, overlap: int = 1) -> List[Tuple[int, int]]:
+    sentences = [f"s{i}" for i in range(len(token_counts))]
+    return _spans(pack_windows(sentences, token_counts, max_tokens, overlap))
+
+
+def test_no_sentences_no_windows():
+    assert pack_windows([], [], 128) == []
+
+
+def test_short_text_is_one_window():
+    assert pack_windows(["One.", "Two."], [3, 3], 128) == ["One. Two."]
+
+
+def test_windows_respect_the_budget_and_overlap():
+    assert _pack([4, 4, 4, 4, 4], 8) == [(0, 2), (1, 3), (2, 4), (3, 5)]
+    assert _pack([4, 4, 4, 4, 4], 12, overlap=2) == [(0, 3), (1, 4), (2, 5)]
+
+
+def test_no_overlap_partitions_the_sentences():
+    assert _pack([4, 4, 4, 4, 4], 8, overlap=0) == [(0, 2), (2, 4), (4, 5)]
+
+
+def test_oversized_sentence_gets_its_own_window():
+    assert _pack([2, 50, 2, 2], 8) == [(0, 1), (1, 2), (2, 4)]
+
+
+def test_overlap_is_dropped_when_it_would_not_make_progress():
+    # Restarting at sentence 1 could not reach past sentence 1, so the next window starts at 2
+    assert _pack([2, 6, 7], 8) == [(0, 2), (2, 3)]
+
+
+def test_overlap_never_repeats_a_whole_window():
+    assert _pack([4, 4, 4], 8, overlap=5) == [(0, 2), (1, 3)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_inputs_cover_every_sentence_within_budget(seed):
+    rng = random.Random(seed)
+    token_counts = [rng.randint(1, 40) for _ in range(rng.randint(1, 60))]
+    max_tokens = rng.randint(8, 96)
+    overlap = rng.randint(0, 3)
+    spans = _pack(token_counts, max_tokens, overlap)
+
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(token_counts)
+    for first, last in spans:
+        assert last - first == 1 or sum(token_counts[first:last]) <= max_tokens
+    for (first, last), (next_first, next_last) in zip(spans, spans[1:]):
+        # Windows advance, never skip a sentence, and share at most ``overlap`` sentences
+        assert first < next_first <= last < next_last
+        assert last - next_first <= overlap
+
+
+def test_split_sentences_keeps_abbreviations_and_quotes():
+    text = 'Plants need light, e.g. Sunlight. "Water matters." (Roots absorb it.) Done!'
+    assert split_sentences(text) == [
+        'Plants need light, e.g. Sunlight.',
+        '"Water matters."',
+        '(Roots absorb it.)',
+        'Done!'
+    ]
+
+
+@pytest.mark.parametrize("text", ["", None, "   \n "])
+def test_split_sentences_of_nothing(text):
+    assert split_sentences(text) == []
+
+
+def test_split_words_caps_each_piece():
+    assert split_words("a b c d e", 2) == ["a b", "c d", "e"]
+    assert split_words("a b", 0) == ["a", "b"]
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Text Segmentation Module
+
+This module splits summaries into sentences and turns video transcripts into
+timestamped segments. Transcripts can be given as a list of
+``{"start", "end", "text"}`` segments, as SRT/WebVTT subtitles, or as plain
+text, which is grouped into segments of a few sentences without timestamps.
+It also packs sentences into token-bounded windows for texts longer than the
+model's sequence limit.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Sentence end: terminal punctuation (optionally followed by a closing quote or bracket) and whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+(?=[\"'(\[]?[A-Z0-9])")
+CUE_TIMING = re.compile(
+    r"(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})"
+)
+ABBREVIATIONS = {'e.g.', 'i.e.', 'etc.', 'vs.', 'mr.', 'mrs.', 'ms.', 'dr.', 'prof.', 'fig.', 'no.', 'approx.'}
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        List[str]: Non-empty sentences in order
+    """
+    sentences: List[str] = []
+    for part in SENTENCE_BOUNDARY.split(' '.join((text or '').split())):
+        part = part.strip()
+        if not part:
+            continue
+        # Rejoin splits that happened right after a common abbreviation
+        if sentences and sentences[-1].split(' ')[-1].lower() in ABBREVIATIONS:
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences
+
+
+def split_words(text: str, max_words: int) -> List[str]:
+    """
+    Split text into pieces of at most ``max_words`` words.
+
+    Args:
+        text (str): Text to split
+        max_words (int): Maximum words per piece
+
+    Returns:
+        List[str]: Pieces in order
+    """
+    words = text.split()
+    step = max(1, int(max_words))
+    return [' '.join(words[i:i + step]) for i in range(0, len(words), step)]
+
+
+def pack_windows(sentences: Sequence[str], token_counts: Sequence[int], max_tokens: int,
+                 overlap: int = 1) -> List[str]:
+    """
+    Greedily pack consecutive sentences into windows of at most ``max_tokens`` tokens.
+
+    Consecutive windows share ``overlap`` sentences so content at a window
+    boundary is seen whole by at least one window. A sentence longer than the
+    budget gets a window of its own.
+
+    Args:
+        sentences (Sequence[str]): Sentences in order
+        token_counts (Sequence[int]): Token count of each sentence, without special tokens
+        max_tokens (int): Token budget per window
+        overlap (int): Sentences repeated at the start of the next window
+
+    Returns:
+        List[str]: Window texts in order
+    """
+    if not sentences:
+        return []
+    ends = np.cumsum(np.asarray(token_counts, dtype=np.int64))
+    starts = ends - np.asarray(token_counts, dtype=np.int64)
+
+    def window_end(first: int) -> int:
+        # One past the last sentence that still fits in a window starting at ``first``
+        return max(first + 1, int(np.searchsorted(ends, starts[first] + max_tokens, side='right')))
+
+    windows = []
+    first = 0
+    while True:
+        last = window_end(first)
+        windows.append(' '.join(sentences[first:last]))
+        if last >= len(sentences):
+            return windows
+        overlapped = max(first + 1, last - max(0, int(overlap)))
+        # Drop the overlap when the next window would not reach past this one
+        first = overlapped if window_end(overlapped) > last else last
+
+
+def _cue_seconds(hours: Optional[str], minutes: str, seconds: str, millis: str) -> float:
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_subtitles(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse SRT or WebVTT subtitles into timestamped segments.
+
+    Args:
+        text (str): Subtitle file content
+
+    Returns:
+        List[Dict[str, Any]]: Segments with ``start`` and ``end`` seconds and ``text``
+    """
+    segments = []
+    for block in re.split(r"\n\s*\n", text.replace('\r\n', '\n')):
+        lines = [line.strip() for line in block.strip().split('\n')]
+        for i, line in enumerate(lines):
+            match = CUE_TIMING.search(line)
+            if match:
+                groups = match.groups()
+                # Drop inline markup such as <v Speaker> or <i>
+                cue_text = re.sub(r"<[^>]+>", '', ' '.join(lines[i + 1:])).strip()
+                if cue_text:
+                    segments.append({
+                        "start": _cue_seconds(*groups[:4]),
+                        "end": _cue_seconds(*groups[4:]),
+                        "text": cue_text
+                    })
+                break
+    return segments
+
+
+def segments_from_text(text: str, sentences_per_segment: int = 3) -> List[Dict[str, Any]]:
+    """
+    Group plain text into segments of consecutive sentences, without timestamps.
+
+    Args:
+        text (str): Transcript or reference text
+        sentences_per_segment (int): Sentences per segment
+
+    Returns:
+        List[Dict[str, Any]]: Segments with ``start`` and ``end`` set to None and ``text``
+    """
+    sentences = split_sentences(text)
+    step = max(1, int(sentences_per_segment))
+    return [
+        {"start": None, "end": None, "text": ' '.join(sentences[i:i + step])}
+        for i in range(0, len(sentences), step)
+    ]
+
+
+def parse_segments(data: Any, sentences_per_segment: int = 3) -> List[Dict[str, Any]]:
+    """
+    Read segments from a request payload.
+
+    Args:
+        data (Any): A list of ``{"start", "end", "text"}`` segments, subtitle text, or plain text
+        sentences_per_segment (int): Sentences per segment for plain text
+
+    Returns:
+        List[Dict[str, Any]]: Segments with ``start``, ``end`` and ``text``
+
+    Raises:
+        ValueError: If a segment is malformed
+    """
+    if isinstance(data, str):
+        if CUE_TIMING.search(data):
+            return parse_subtitles(data)
+        return segments_from_text(data, sentences_per_segment)
+    if not isinstance(data, list):
+        raise ValueError("Segments must be a list, subtitles or text")
+
+    segments = []
+    for i, item in enumerate(data):
+        if not isinstance(item, dict) or not str(item.get('text') or '').strip():
+            raise ValueError(f"Segment {i} needs text")
+        try:
+            start = None if item.get('start') is None else float(item['start'])
+            end = None if item.get('end') is None else float(item['end'])
+        except (TypeError, ValueError):
+            raise ValueError(f"Segment {i} has an invalid start or end")
+        segments.append({"start": start, "end": end, "text": str(item['text']).strip()})
+    return segments
+
+
+def format_timestamp(seconds: Optional[float]) -> Optional[str]:
+    """
+    Format seconds as ``m:ss`` (or ``h:mm:ss`` past an hour).
+
+    Args:
+        seconds (Optional[float]): Offset in seconds
+
+    Returns:
+        Optional[str]: Formatted timestamp, or None if no offset was given
+    """
+    if seconds is None:
+        return None
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
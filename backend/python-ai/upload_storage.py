@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+"""
+Upload Storage Module
+
+This module writes uploaded videos straight to disk in fixed-size chunks, so
+memory use per upload stays flat regardless of file size. The SHA-256 of the
+content is computed while it streams, and limits are enforced as early as
+possible: the declared size and content type before any body is read, the
+container signature on the first bytes, and the size limit on every chunk.
+
+Large recordings can also be sent as resumable uploads: a session is created
+with the final size, chunks are appended at an explicit offset, and an
+interrupted client asks for the current offset and continues from there.
+
+Layout:
+    <storage_dir>/tmp/<id>.part             single-request upload in progress
+    <storage_dir>/sessions/<id>.json        resumable upload metadata
+    <storage_dir>/sessions/<id>.part        resumable upload content
+"""
+
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from file_locks import lock_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_ALLOWED_TYPES = ('video/*', 'application/octet-stream')
+SNIFF_BYTES = 189
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadRejected(Exception):
+    """Raised when an upload breaks a limit; carries the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_video_container(head: bytes) -> Optional[str]:
+    """
+    Identify a video container from its first bytes.
+
+    Args:
+        head (bytes): The first ``SNIFF_BYTES`` bytes of the file (or all of it, if shorter)
+
+    Returns:
+        Optional[str]: Container name, or None if the signature is not a known video format
+    """
+    if head[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip'):
+        return 'mp4'
+    if head.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'matroska'
+    if head.startswith(b'RIFF') and head[8:12] == b'AVI ':
+        return 'avi'
+    if head.startswith(b'\x00\x00\x01\xba') or head.startswith(b'\x00\x00\x01\xb3'):
+        return 'mpeg'
+    if head[:1] == b'\x47' and head[188:189] == b'\x47':
+        return 'mpegts'
+    if head.startswith(b'FLV'):
+        return 'flv'
+    if head.startswith(b'OggS'):
+        return 'ogg'
+    if head.startswith(b'\x30\x26\xb2\x75\x8e\x66\xcf\x11'):
+        return 'asf'
+    return None
+
+
+class HashingFileWriter:
+    """
+    Writable upload file that hashes, counts and size-checks content as it is written.
+
+    Behaves like the temporary file Werkzeug would otherwise create for a multipart
+    file part, so it can be returned from ``Request._get_file_stream``. The file is
+    deleted on close unless ``commit`` moved it into place.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        """
+        Create the file.
+
+        Args:
+            path (str): Temporary path to write to
+            max_bytes (int): Maximum accepted size in bytes
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.container: Optional[str] = None
+        self._head = b''
+        self._digest = hashlib.sha256()
+        self._file: IO[bytes] = open(path, 'w+b')
+        self._committed = False
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self._reject(f"Upload exceeds the {self.max_bytes} byte limit", 413)
+        if len(self._head) < SNIFF_BYTES:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._check_container()
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def _check_container(self) -> None:
+        self.container = sniff_video_container(self._head)
+        if self.container is None:
+            self._reject("Upload is not a recognized video container", 415)
+
+    def _reject(self, message: str, status_code: int) -> None:
+        # The form parser drops the file object on error, so clean up before raising
+        self.close()
+        raise UploadRejected(message, status_code)
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of everything written so far."""
+        return self._digest.hexdigest()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def commit(self, destination: str) -> Dict[str, Any]:
+        """
+        Move the finished upload into place.
+
+        Args:
+            destination (str): Final path of the upload
+
+        Returns:
+            Dict[str, Any]: Path, size in bytes, SHA-256 and detected container
+        """
+        if self.size == 0:
+            self._reject("Upload is empty", 400)
+        if self.container is None:
+            self._check_container()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+        shutil.move(self.path, destination)
+        self._committed = True
+        return {"path": destination, "size": self.size, "sha256": self.sha256, "container": self.container}
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        if not self._committed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+
+class UploadStorage:
+    """
+    Streaming, size-limited upload storage with resumable upload sessions.
+    """
+
+    def __init__(self, storage_dir: str, max_bytes: int = 4 * 1024 ** 3,
+                 allowed_types: Tuple[str, ...] = DEFAULT_ALLOWED_TYPES, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 session_ttl: float = 24 * 3600):
+        """
+        Initialize the storage.
+
+        Args:
+            storage_dir (str): Directory for uploads in progress
+            max_bytes (int): Maximum upload size in bytes
+            allowed_types (Tuple[str, ...]): Accepted content types (``fnmatch`` patterns)
+            chunk_size (int): Bytes read from the request stream at a time
+            session_ttl (float): Seconds after which an idle resumable upload is discarded
+        """
+        self.storage_dir = storage_dir
+        self.max_bytes = int(max_bytes)
+        self.allowed_types = tuple(allowed_types)
+        self.chunk_size = int(chunk_size)
+        self.session_ttl = float(session_ttl)
+        self._tmp_dir = os.path.join(storage_dir, 'tmp')
+        self._sessions_dir = os.path.join(storage_dir, 'sessions')
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        os.makedirs(self._sessions_dir, exist_ok=True)
+
+        # Running hashes of resumable uploads appended to by this process, keyed by upload id
+        self._digests: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+
+    def check_declared(self, content_type: Optional[str], size: Optional[int]) -> None:
+        """
+        Reject an upload from its declared type and size before reading any content.
+
+        Args:
+            content_type (Optional[str]): Declared content type
+            size (Optional[int]): Declared size in bytes
+
+        Raises:
+            UploadRejected: With status 415 or 413
+        """
+        mimetype = (content_type or 'application/octet-stream').split(';')[0].strip().lower()
+        if not any(fnmatch.fnmatch(mimetype, pattern) for pattern in self.allowed_types):
+            raise UploadRejected(f"Content type {mimetype} is not allowed", 415)
+        if size is not None and size > self.max_bytes:
+            raise UploadRejected(f"Upload of {size} bytes exceeds the {self.max_bytes} byte limit", 413)
+
+    def open_writer(self, content_type: Optional[str], size: Optional[int] = None) -> HashingFileWriter:
+        """
+        Open a streaming writer for a single-request upload.
+
+        Args:
+            content_type (Optional[str]): Declared content type of the file
+            size (Optional[int]): Declared size in bytes, if known
+
+        Returns:
+            HashingFileWriter: Writer whose ``commit`` moves the upload into place
+        """
+        self.check_declared(content_type, size)
+        return HashingFileWriter(os.path.join(self._tmp_dir, f"{uuid.uuid4().hex}.part"), self.max_bytes)
+
+    def save_stream(self, stream: IO[bytes], destination: str, content_type: Optional[str],
+                    size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Stream a raw request body to disk.
+
+        Args:
+            stream (IO[bytes]): Request body stream
+            destination (str): Final path of the upload
+            content_type (Optional[str]): Declared content type
+            size (Optional[int]): Declared size in bytes, if known
+
+        Returns:
+            Dict[str, Any]: Path, size in bytes, SHA-256 and detected container
+        """
+        writer = self.open_writer(content_type, size)
+        try:
+            for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                writer.write(chunk)
+            return writer.commit(destination)
+        finally:
+            writer.close()
+
+    def _session_paths(self, upload_id: str) -> Tuple[str, str]:
+        if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+            raise UploadRejected("Unknown upload", 404)
+        base = os.path.join(self._sessions_dir, upload_id)
+        return f"{base}.json", f"{base}.part"
+
+    def _write_session(self, session: Dict[str, Any]) -> None:
+        metadata_path, _ = self._session_paths(session['upload_id'])
+        with open(f"{metadata_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+        os.replace(f"{metadata_path}.tmp", metadata_path)
+
+    def create_session(self, filename: str, size: int, content_type: Optional[str],
+                       sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start a resumable upload.
+
+        Args:
+            filename (str): Original filename
+            size (int): Total size in bytes
+            content_type (Optional[str]): Declared content type
+            sha256 (Optional[str]): Expected hex SHA-256, verified on completion
+
+        Returns:
+            Dict[str, Any]: Session with ``upload_id`` and ``offset``
+        """
+        if not isinstance(size, int) or size <= 0:
+            raise UploadRejected("size must be a positive integer", 400)
+        self.check_declared(content_type, size)
+
+        self.purge_expired()
+        upload_id = uuid.uuid4().hex
+        _, part_path = self._session_paths(upload_id)
+        open(part_path, 'wb').close()
+        session = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "expected_sha256": sha256.lower() if sha256 else None,
+            "offset": 0,
+            "complete": False,
+            "sha256": None,
+            "created_at": time.time(),
+            "updated_at": time.time()
+        }
+        self._write_session(session)
+        return session
+
+    def get_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a resumable upload's state.
+
+        Args:
+            upload_id (str): Upload id
+
+        Returns:
+            Optional[Dict[str, Any]]: Session with the current ``offset``, or None if unknown
+        """
+        try:
+            metadata_path, part_path = self._session_paths(upload_id)
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                session = json.load(f)
+        except (FileNotFoundError, UploadRejected):
+            return None
+        # The bytes on disk are the source of truth for where to resume
+        session['offset'] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        return session
+
+    def _resume_digest(self, upload_id: str, part_path: str, offset: int) -> Any:
+        """Get the running hash of the first ``offset`` bytes, rehashing from disk if this process lacks it."""
+        with self._lock:
+            cached = self._digests.pop(upload_id, None)
+        if cached is not None and cached[0] == offset:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(chunk)
+        return digest
+
+    def append_chunk(self, upload_id: str, offset: int, stream: IO[bytes]) -> Dict[str, Any]:
+        """
+        Append a chunk to a resumable upload at an explicit offset.
+
+        Args:
+            upload_id (str): Upload id
+            offset (int): Offset the chunk starts at; must equal the current offset
+            stream (IO[bytes]): Chunk body stream
+
+        Returns:
+            Dict[str, Any]: Updated session; ``complete`` and ``sha256`` are set once all bytes arrived
+
+        Raises:
+            UploadRejected: 404 unknown upload, 409 wrong offset or concurrent append,
+                413 chunk past the declared size, 415 not a video, 422 checksum mismatch
+        """
+        session = self.get_session(upload_id)
+        if session is None:
+            raise UploadRejected("Unknown upload", 404)
+        if session['complete']:
+            raise UploadRejected("Upload is already complete", 409)
+        _, part_path = self._session_paths(upload_id)
+
+        with open(part_path, 'ab') as f:
+            try:
+                # Serialize appends across every process on the node
+                lock_file(f, blocking=False)
+            except BlockingIOError:
+                raise UploadRejected("Another chunk of this upload is being written", 409)
+
+            current = os.path.getsize(part_path)
+            if offset != current:
+                raise UploadRejected(f"Expected offset {current}", 409)
+
+            digest = self._resume_digest(upload_id, part_path, current)
+            head = b''
+            if current < SNIFF_BYTES:
+                # Earlier chunks may have stopped short of the bytes the container check needs
+                with open(part_path, 'rb') as written:
+                    head = written.read(current)
+            for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                if current + len(chunk) > session['size']:
+                    f.truncate(offset)
+                    raise UploadRejected(f"Chunk runs past the declared size of {session['size']} bytes", 413)
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                    if len(head) >= min(SNIFF_BYTES, session['size']) and sniff_video_container(head) is None:
+                        # The upload can never become a video, so end it instead of accepting more chunks
+                        self.discard_session(upload_id)
+                        raise UploadRejected("Upload is not a recognized video container", 415)
+                f.write(chunk)
+                digest.update(chunk)
+                current += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        session['offset'] = current
+        session['updated_at'] = time.time()
+        if current == session['size']:
+            session['sha256'] = digest.hexdigest()
+            if session['expected_sha256'] and session['expected_sha256'] != session['sha256']:
+                self.discard_session(upload_id)
+                raise UploadRejected("Upload checksum does not match the expected sha256", 422)
+            session['complete'] = True
+        else:
+            with self._lock:
+                self._digests[upload_id] = (current, digest)
+        self._write_session(session)
+        return session
+
+    def claim_session(self, upload_id: str, destination: str) -> Dict[str, Any]:
+        """
+        Move a completed resumable upload into place and end its session.
+
+        Args:
+            upload_id (str): Upload id
+            destination (str): Final path of the upload
+
+        Returns:
+            Dict[str, Any]: The completed session, with ``path`` set to ``destination``
+        """
+        session = self.get_session(upload_id)
+        if session is None:
+            raise UploadRejected("Unknown upload", 404)
+        if not session['complete']:
+            raise UploadRejected(f"Upload is incomplete ({session['offset']} of {session['size']} bytes)", 409)
+        metadata_path, part_path = self._session_paths(upload_id)
+        os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+        shutil.move(part_path, destination)
+        os.remove(metadata_path)
+        session['path'] = destination
+        return session
+
+    def discard_session(self, upload_id: str) -> None:
+        """
+        Delete a resumable upload and its content.
+
+        Args:
+            upload_id (str): Upload id
+        """
+        with self._lock:
+            self._digests.pop(upload_id, None)
+        for path in self._session_paths(upload_id):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def purge_expired(self) -> List[str]:
+        """
+        Discard resumable uploads that have been idle for longer than ``session_ttl``.
+
+        Returns:
+            List[str]: Ids of the discarded uploads
+        """
+        expired = []
+        cutoff = time.time() - self.session_ttl
+        for filename in os.listdir(self._sessions_dir):
+            upload_id, extension = os.path.splitext(filename)
+            if extension == '.json':
+                session = self.get_session(upload_id)
+                if session is not None and session['updated_at'] < cutoff:
+                    self.discard_session(upload_id)
+                    expired.append(upload_id)
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get storage statistics.
+
+        Returns:
+            Dict[str, Any]: Size limit, chunk size and number of resumable uploads in progress
+        """
+        sessions = sum(1 for filename in os.listdir(self._sessions_dir) if filename.endswith('.json'))
+        return {"max_bytes": self.max_bytes, "chunk_size": self.chunk_size, "resumable_uploads": sessions}
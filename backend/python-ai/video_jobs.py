@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+Video Jobs Module
+
+This module runs uploaded-video processing off the request path. Each job runs
+ffmpeg in a background worker pool to extract a mono 16 kHz audio track and a
+bounded set of evenly spaced keyframes. Its state, current stage and progress
+are written to a ``status.json`` next to the video, so any server process on
+the node can report them and a job can be rerun from the stored upload.
+
+With an artifact store, uploads are deduplicated by their SHA-256: the audio,
+keyframes and result of a video are kept in the store, and a repeated upload of
+the same content is marked done at once with the stored result.
+
+Layout:
+    <work_dir>/<video_id>/source<ext>       uploaded video
+    <work_dir>/<video_id>/status.json       job state, stage, progress and result
+    <work_dir>/<video_id>/audio.wav         extracted audio
+    <work_dir>/<video_id>/frames/*.jpg      extracted keyframes (in the artifact store when one is set)
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from artifact_store import ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+SOURCE_BASENAME = 'source'
+STAGING_PREFIX = 'incoming-'
+STATUS_FILENAME = 'status.json'
+AUDIO_FILENAME = 'audio.wav'
+FRAMES_DIRNAME = 'frames'
+
+# Share of the overall progress covered by each stage
+STAGE_PROGRESS = {
+    'probing': (0.0, 0.05),
+    'extracting_audio': (0.05, 0.6),
+    'extracting_keyframes': (0.6, 0.95),
+}
+
+DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+class VideoJobError(Exception):
+    """Raised when a video job cannot be submitted or ffmpeg fails."""
+
+
+class VideoJobManager:
+    """
+    Background pool that extracts audio and keyframes from uploaded videos with ffmpeg.
+    """
+
+    def __init__(self, work_dir: str, max_workers: int = 2, max_frames: int = 10, max_audio_length: float = 300,
+                 ffmpeg_path: str = 'ffmpeg', timeout: float = 600, artifact_store: Optional[ArtifactStore] = None):
+        """
+        Initialize the manager.
+
+        Args:
+            work_dir (str): Directory holding one subdirectory per video
+            max_workers (int): Number of videos processed concurrently
+            max_frames (int): Maximum number of keyframes extracted per video
+            max_audio_length (float): Maximum seconds of audio extracted per video
+            ffmpeg_path (str): ffmpeg executable
+            timeout (float): Seconds before an ffmpeg step is killed
+            artifact_store (Optional[ArtifactStore]): Store that deduplicates derived artifacts by content hash
+        """
+        self.work_dir = work_dir
+        self.max_workers = max(1, int(max_workers))
+        self.max_frames = max(1, int(max_frames))
+        self.max_audio_length = float(max_audio_length)
+        self.ffmpeg_path = ffmpeg_path
+        self.timeout = float(timeout)
+        self.artifact_store = artifact_store
+        # Stored artifacts are only reused by jobs extracting with the same settings
+        self._artifact_variant = f"a{self.max_audio_length:g}s-f{self.max_frames}"
+        os.makedirs(work_dir, exist_ok=True)
+
+        self._reset()
+        # Pool threads do not survive fork(); pre-fork workers start their own pool lazily
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        # Held from the in-progress check until the job is queued, so concurrent submits cannot both pass it
+        self._submit_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._active_jobs = 0
+
+    def _video_dir(self, video_id: str) -> str:
+        if not VIDEO_ID_PATTERN.match(video_id):
+            raise ValueError(f"Invalid video id: {video_id}")
+        return os.path.join(self.work_dir, video_id)
+
+    def _write_status(self, video_id: str, **fields: Any) -> Dict[str, Any]:
+        with self._lock:
+            status = self.get_status(video_id) or {"video_id": video_id}
+            status.update(fields, updated_at=time.time())
+            path = os.path.join(self._video_dir(video_id), STATUS_FILENAME)
+            # Write-then-rename so concurrent readers never see a partial file
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(status, f)
+            os.replace(f"{path}.tmp", path)
+            return status
+
+    def get_status(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a video's processing status.
+
+        Args:
+            video_id (str): Video identifier
+
+        Returns:
+            Optional[Dict[str, Any]]: Job id, state, stage, progress, error and result,
+                or None if the video is unknown
+        """
+        try:
+            with open(os.path.join(self._video_dir(video_id), STATUS_FILENAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _source_path(self, video_id: str) -> Optional[str]:
+        video_dir = self._video_dir(video_id)
+        if not os.path.isdir(video_dir):
+            return None
+        for filename in os.listdir(video_dir):
+            if filename.startswith(SOURCE_BASENAME):
+                return os.path.join(video_dir, filename)
+        return None
+
+    def staging_path_for(self, video_id: str, filename: str) -> str:
+        """
+        Get a path to store a new upload at until ``submit`` accepts it, creating the video's directory.
+
+        The video's current upload stays in place, so a job still reading it is unaffected.
+
+        Args:
+            video_id (str): Video identifier
+            filename (str): Original upload filename (only its extension is kept)
+
+        Returns:
+            str: Staging path for the uploaded video
+        """
+        video_dir = self._video_dir(video_id)
+        os.makedirs(video_dir, exist_ok=True)
+        extension = os.path.splitext(filename or '')[1].lower()
+        if not re.match(r"^\.[a-z0-9]{1,8}$", extension):
+            extension = ''
+        return os.path.join(video_dir, f"{STAGING_PREFIX}{uuid.uuid4().hex}{extension}")
+
+    def in_progress(self, video_id: str) -> bool:
+        """
+        Check whether a video has a queued or running job.
+
+        Args:
+            video_id (str): Video identifier
+
+        Returns:
+            bool: True if a new upload for the video would be rejected
+        """
+        return self._in_progress(self.get_status(video_id) or {})
+
+    def submit(self, video_id: str, metadata: Optional[Dict[str, Any]] = None,
+               staged_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue processing of a stored upload.
+
+        Args:
+            video_id (str): Video identifier
+            metadata (Optional[Dict[str, Any]]): Extra fields kept in the status (e.g. filename)
+            staged_path (Optional[str]): New upload from ``staging_path_for``; it replaces the video's
+                upload only once the job is accepted, and is deleted otherwise
+
+        Returns:
+            Dict[str, Any]: The queued job's status
+
+        Raises:
+            VideoJobError: If the upload is missing or the video is already being processed
+        """
+        with self._submit_lock:
+            current = self.get_status(video_id)
+            if current and self._in_progress(current):
+                if staged_path is not None and os.path.exists(staged_path):
+                    os.remove(staged_path)
+                raise VideoJobError(f"Video {video_id} is already {current['state']}")
+            if staged_path is not None:
+                previous_source = self._source_path(video_id)
+                if previous_source is not None:
+                    os.remove(previous_source)
+                extension = os.path.splitext(staged_path)[1]
+                os.replace(staged_path, os.path.join(self._video_dir(video_id), SOURCE_BASENAME + extension))
+            if self._source_path(video_id) is None:
+                raise VideoJobError(f"No uploaded video for {video_id}")
+            return self._queue(video_id, current, metadata)
+
+    def _queue(self, video_id: str, current: Optional[Dict[str, Any]],
+               metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Reuse stored artifacts of the same upload, or start a job for a video whose upload is in place."""
+        metadata = metadata or {}
+        sha256 = metadata.get('sha256') or (current or {}).get('sha256')
+        if self.artifact_store is not None and sha256:
+            if current and current.get('sha256') not in (None, sha256):
+                self.artifact_store.remove_ref(current['sha256'], video_id)
+            self.artifact_store.add_ref(sha256, video_id)
+            self._share_source(video_id, sha256)
+            cached = self.artifact_store.get_json(sha256, self._artifact_name('result', '.json'))
+            if cached is not None:
+                now = time.time()
+                logger.info(f"Video {video_id} matches stored artifacts {sha256[:12]}; skipping processing")
+                return self._write_status(
+                    video_id, job_id=uuid.uuid4().hex, state='done', stage=None, progress=1.0, error=None,
+                    result=cached, deduplicated=True, submitted_at=now, started_at=None, finished_at=now, **metadata
+                )
+
+        status = self._write_status(
+            video_id,
+            job_id=uuid.uuid4().hex,
+            state='queued',
+            stage=None,
+            progress=0.0,
+            error=None,
+            result=None,
+            deduplicated=False,
+            submitted_at=time.time(),
+            started_at=None,
+            finished_at=None,
+            **metadata
+        )
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="video-job")
+            self._active_jobs += 1
+            self._executor.submit(self._process, video_id, status['job_id'])
+        return status
+
+    def _in_progress(self, status: Dict[str, Any]) -> bool:
+        # A job that has not reported for several step timeouts lost its process
+        return status.get('state') in ('queued', 'running') and \
+            time.time() - status.get('updated_at', 0) < 3 * self.timeout
+
+    def _artifact_name(self, kind: str, extension: str = '') -> str:
+        return f"{kind}-{self._artifact_variant}{extension}"
+
+    def _share_source(self, video_id: str, sha256: str) -> None:
+        """Keep one copy of identical uploads: the store and every video directory hard-link the same file."""
+        source_path = self._source_path(video_id)
+        name = SOURCE_BASENAME + os.path.splitext(source_path)[1]
+        try:
+            stored_path = self.artifact_store.put_artifact(sha256, name, source_path, link=True)
+            if not os.path.samefile(stored_path, source_path):
+                os.link(stored_path, f"{source_path}.link")
+                os.replace(f"{source_path}.link", source_path)
+        except OSError as e:
+            # e.g. the store is on another filesystem; the upload keeps its own copy
+            logger.warning(f"Could not share the upload of {video_id} with the artifact store: {str(e)}")
+
+    def delete(self, video_id: str) -> bool:
+        """
+        Delete a video's upload and status, releasing its stored artifacts.
+
+        Args:
+            video_id (str): Video identifier
+
+        Returns:
+            bool: False if the video is unknown
+
+        Raises:
+            VideoJobError: If the video is being processed
+        """
+        video_dir = self._video_dir(video_id)
+        if not os.path.isdir(video_dir):
+            return False
+        status = self.get_status(video_id) or {}
+        if self._in_progress(status):
+            raise VideoJobError(f"Video {video_id} is {status['state']}")
+        if self.artifact_store is not None and status.get('sha256'):
+            self.artifact_store.remove_ref(status['sha256'], video_id)
+        shutil.rmtree(video_dir, ignore_errors=True)
+        return True
+
+    def _process(self, video_id: str, job_id: str) -> None:
+        self._write_status(video_id, state='running', started_at=time.time())
+        try:
+            source_path = self._source_path(video_id)
+            video_dir = self._video_dir(video_id)
+
+            self._write_status(video_id, stage='probing', progress=STAGE_PROGRESS['probing'][0])
+            duration = self._probe_duration(source_path)
+
+            audio_path = os.path.join(video_dir, AUDIO_FILENAME)
+            audio_duration = min(duration, self.max_audio_length) if duration else self.max_audio_length
+            self._run_ffmpeg(
+                video_id, 'extracting_audio', audio_duration,
+                ['-i', source_path, '-vn', '-ac', '1', '-ar', '16000', '-t', str(self.max_audio_length), audio_path]
+            )
+
+            frames = self._extract_keyframes(video_id, source_path, video_dir, duration)
+
+            result = {
+                "duration_seconds": duration,
+                "audio_path": audio_path if os.path.exists(audio_path) else None,
+                "frames": frames
+            }
+            sha256 = (self.get_status(video_id) or {}).get('sha256')
+            if self.artifact_store is not None and sha256:
+                result = self._store_artifacts(sha256, result)
+
+            self._write_status(
+                video_id,
+                state='done',
+                stage=None,
+                progress=1.0,
+                finished_at=time.time(),
+                result=result
+            )
+            logger.info(f"Processed video {video_id} (job {job_id}): {len(frames)} frames, {duration}s")
+        except Exception as e:
+            logger.error(f"Error processing video {video_id} (job {job_id}): {str(e)}")
+            self._write_status(video_id, state='failed', error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._active_jobs -= 1
+
+    def _store_artifacts(self, sha256: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Move a job's audio and keyframes into the artifact store and record the result there."""
+        if result['audio_path']:
+            result['audio_path'] = self.artifact_store.put_artifact(
+                sha256, self._artifact_name('audio', '.wav'), result['audio_path'])
+        if result['frames']:
+            frames_dir = self.artifact_store.put_artifact(
+                sha256, self._artifact_name('frames'), os.path.dirname(result['frames'][0]))
+            result['frames'] = sorted(os.path.join(frames_dir, filename) for filename in os.listdir(frames_dir))
+        self.artifact_store.put_json(sha256, self._artifact_name('result', '.json'), result)
+        return result
+
+    def _probe_duration(self, source_path: str) -> Optional[float]:
+        """Read the container duration from ffmpeg's input banner."""
+        completed = subprocess.run(
+            [self.ffmpeg_path, '-hide_banner', '-i', source_path],
+            capture_output=True, text=True, timeout=self.timeout
+        )
+        match = DURATION_PATTERN.search(completed.stderr)
+        if match is None:
+            if 'Invalid data' in completed.stderr or 'No such file' in completed.stderr:
+                raise VideoJobError(f"ffmpeg cannot read the upload: {completed.stderr.strip()[-200:]}")
+            return None
+        hours, minutes, seconds = match.groups()
+        return round(int(hours) * 3600 + int(minutes) * 60 + float(seconds), 3)
+
+    def _extract_keyframes(self, video_id: str, source_path: str, video_dir: str,
+                           duration: Optional[float]) -> List[str]:
+        frames_dir = os.path.join(video_dir, FRAMES_DIRNAME)
+        shutil.rmtree(frames_dir, ignore_errors=True)
+        os.makedirs(frames_dir)
+
+        # Decode keyframes only, keeping at most one per interval so frames spread over the video
+        interval = (duration or 0) / self.max_frames
+        self._run_ffmpeg(
+            video_id, 'extracting_keyframes', duration,
+            ['-skip_frame', 'nokey', '-i', source_path, '-an',
+             '-vf', f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{interval:.3f})',scale='min(640,iw)':-2",
+             '-vsync', 'vfr', '-frames:v', str(self.max_frames), '-q:v', '3',
+             os.path.join(frames_dir, 'frame-%03d.jpg')]
+        )
+        return sorted(os.path.join(frames_dir, filename) for filename in os.listdir(frames_dir))
+
+    def _run_ffmpeg(self, video_id: str, stage: str, duration: Optional[float], args: List[str]) -> None:
+        """Run one ffmpeg step, turning its ``-progress`` output into job progress."""
+        start, end = STAGE_PROGRESS[stage]
+        self._write_status(video_id, stage=stage, progress=start)
+
+        process = subprocess.Popen(
+            [self.ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-nostdin', '-y', '-progress', 'pipe:1'] + args,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        timer = threading.Timer(self.timeout, process.kill)
+        timer.start()
+        try:
+            last_reported = start
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if key == 'out_time_us' and duration and value.isdigit():
+                    fraction = min(1.0, int(value) / 1e6 / duration)
+                    progress = round(start + (end - start) * fraction, 3)
+                    # Avoid rewriting the status file for every progress tick
+                    if progress - last_reported >= 0.05:
+                        self._write_status(video_id, progress=progress)
+                        last_reported = progress
+            stderr = process.stderr.read()
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+
+        if returncode != 0:
+            raise VideoJobError(f"ffmpeg {stage} failed ({returncode}): {stderr.strip()[-300:]}")
+        self._write_status(video_id, progress=end)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics for this process.
+
+        Returns:
+            Dict[str, Any]: Pool size and number of jobs queued or running in this process
+        """
+        with self._lock:
+            return {"max_workers": self.max_workers, "max_frames": self.max_frames, "active_jobs": self._active_jobs}
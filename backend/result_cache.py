@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Result Cache Module
+
+This module caches evaluation results so a resubmitted summary, or a client
+retrying the same request, is answered without evaluating it again. Results
+are keyed by a hash of everything that determines them: the submission, the
+reference (or video id and version), the model version and the scorer
+configuration. Entries expire after a TTL.
+
+Identical requests that arrive while the first one is still being evaluated
+wait for its result instead of evaluating too (single flight). Coalescing is
+per process; the Redis backend additionally shares finished results between
+processes and nodes.
+
+The API server and the AI service deploy separately, so each ships its own copy
+of this module (``backend/result_cache.py`` and ``backend/python-ai/result_cache.py``);
+keep the two identical.
+
+Backends:
+    memory                      in-process LRU bounded by entries and bytes
+    redis://host:6379/0         shared cache (requires ``redis``); bound its size
+                                with the server's ``maxmemory`` and an LRU policy
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a cache key from the values that determine a result.
+
+    Args:
+        *parts (Any): JSON-serializable values, e.g. endpoint, texts, model version, scorer settings
+
+    Returns:
+        str: SHA-256 hex digest of the parts
+    """
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class MemoryBackend:
+    """
+    In-process LRU store of serialized results with per-entry expiry.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the store.
+
+        Args:
+            max_entries (int): Maximum number of cached results
+            max_bytes (int): Maximum total size of cached results in bytes
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._current_bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a result and mark it as most recently used.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[bytes]: Serialized result, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._current_bytes -= len(entry[1])
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a result, evicting least recently used entries to respect the limits.
+
+        Args:
+            key (str): Cache key
+            value (bytes): Serialized result
+            ttl (float): Seconds until the entry expires
+        """
+        if self.max_entries == 0 or len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= len(previous[1])
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._current_bytes += len(value)
+            while len(self._entries) > self.max_entries or self._current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store usage.
+
+        Returns:
+            Dict[str, Any]: Backend name, entry and byte usage, limits and evictions
+        """
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions
+            }
+
+
+class RedisBackend:
+    """
+    Redis (or Redis-compatible) store of serialized results, shared between processes.
+    """
+
+    def __init__(self, url: str, prefix: str = 'result-cache:'):
+        """
+        Connect to Redis.
+
+        Args:
+            url (str): Redis URL, e.g. ``redis://localhost:6379/0``
+            prefix (str): Prefix of the cache's keys
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The Redis result cache requires the 'redis' package") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a result.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[bytes]: Serialized result, or None if missing or expired
+        """
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a result with an expiry.
+
+        Args:
+            key (str): Cache key
+            value (bytes): Serialized result
+            ttl (float): Seconds until the entry expires
+        """
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store usage.
+
+        Returns:
+            Dict[str, Any]: Backend name and the server's memory use
+        """
+        try:
+            memory = self.client.info('memory')
+        except Exception as e:
+            return {"backend": "redis", "error": str(e)}
+        return {
+            "backend": "redis",
+            "used_memory": memory.get('used_memory'),
+            "maxmemory": memory.get('maxmemory'),
+            "maxmemory_policy": memory.get('maxmemory_policy')
+        }
+
+
+class ResultCache:
+    """
+    TTL cache of JSON results with single-flight computation of misses.
+    """
+
+    def __init__(self, backend: Any, ttl: float = 3600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            backend (Any): ``MemoryBackend`` or ``RedisBackend``
+            ttl (float): Seconds a result stays cached
+        """
+        self.backend = backend
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        # key -> future of the serialized result being computed by the first caller
+        self._in_flight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.backend_errors = 0
+
+    def _backend_get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            # A cache outage must not fail the request; evaluate instead
+            with self._lock:
+                self.backend_errors += 1
+            logger.warning(f"Result cache lookup failed: {str(e)}")
+            return None
+
+    def _backend_set(self, key: str, value: bytes) -> None:
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            with self._lock:
+                self.backend_errors += 1
+            logger.warning(f"Result cache store failed: {str(e)}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]],
+                       cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Tuple[Dict[str, Any], str]:
+        """
+        Return the cached result for a key, computing it once if it is missing.
+
+        Concurrent callers with the same key share the first caller's
+        computation. If it raises, they all raise and nothing is cached.
+
+        Args:
+            key (str): Cache key from ``make_key``
+            compute (Callable[[], Dict[str, Any]]): Computes the JSON-serializable result
+            cacheable (Optional[Callable[[Dict[str, Any]], bool]]): Decides whether a computed
+                result may be stored (e.g. not a degraded fallback); all results by default
+
+        Returns:
+            Tuple[Dict[str, Any], str]: The result (a private copy) and how it was obtained:
+                ``hit``, ``miss`` or ``coalesced``
+        """
+        cached = self._backend_get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return json.loads(cached), 'hit'
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return json.loads(future.result()), 'coalesced'
+
+        try:
+            result = compute()
+            serialized = json.dumps(result).encode('utf-8')
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        # Release the followers before anything else can fail
+        future.set_result(serialized)
+
+        try:
+            store = cacheable is None or cacheable(result)
+        except Exception as e:
+            logger.warning(f"Result cache could not decide whether to store a result: {str(e)}")
+            store = False
+        if store:
+            self._backend_set(key, serialized)
+        return result, 'miss'
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, coalesced requests, hit ratio (hits and coalesced
+                requests over all lookups), TTL and backend usage
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+                "backend_errors": self.backend_errors,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "ttl": self.ttl
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+def open_result_cache(url: str, ttl: float = 3600.0, max_entries: int = 10000,
+                      max_bytes: int = 64 * 1024 * 1024) -> Optional[ResultCache]:
+    """
+    Open the result cache named by a URL.
+
+    Args:
+        url (str): ``memory``, ``redis://...``, or empty/``off`` to disable caching
+        ttl (float): Seconds a result stays cached
+        max_entries (int): Entry limit of the memory backend
+        max_bytes (int): Byte limit of the memory backend
+
+    Returns:
+        Optional[ResultCache]: The cache, or None if disabled
+    """
+    if not url or url.lower() in ('off', 'none', 'false'):
+        return None
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return ResultCache(RedisBackend(url), ttl)
+    if url.lower() == 'memory':
+        return ResultCache(MemoryBackend(max_entries, max_bytes), ttl)
+    raise ValueError(f"Unknown result cache: {url}. Use 'memory' or a redis:// URL")
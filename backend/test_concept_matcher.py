@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for concept matching.
+
+Usage:
+    python -m pytest test_concept_matcher.py
+"""
+
+import pytest
+
+from concept_matcher import ConceptMatcher, lemma, normalize_concepts
+
+
+@pytest.mark.parametrize("forms", [
+    ("cell", "cells"),
+    ("divide", "divides", "divided", "dividing"),
+    ("react", "reacts", "reacted", "reacting"),
+    ("reaction", "reactions"),
+    ("gas", "gases"),
+    ("process", "processes"),
+    ("energy", "energies"),
+    ("branch", "branches"),
+    ("produce", "produced", "producing"),
+])
+def test_inflections_share_a_lemma(forms):
+    assert len({lemma(form) for form in forms}) == 1
+
+
+def test_derived_words_keep_distinct_lemmas():
+    assert lemma("reaction") != lemma("reacting")
+
+
+@pytest.mark.parametrize("concept, submission, covered", [
+    # Inflections
+    ("cell division", "The cells divide.", False),
+    ("cell division", "Cell divisions happen in mitosis.", True),
+    ("divide", "Each cell divided in two.", True),
+    ("greenhouse gas", "Greenhouse gases trap heat.", True),
+    # Hyphens and punctuation separate words
+    ("light-dependent reactions", "The light dependent reaction splits water.", True),
+    ("light dependent reactions", "Light-dependent reactions need sunlight.", True),
+    ("carbon dioxide", "It absorbs carbon, dioxide and water.", True),
+    # Stop words at the edges of a concept are ignored, inside it they count
+    ("the Calvin cycle", "The Calvin cycle fixes carbon.", True),
+    ("the Calvin cycle", "Calvin cycle", True),
+    ("cycle of life", "The cycle of life", True),
+    ("cycle of life", "The life cycle", False),
+    # Whole words only
+    ("cell", "Cellular respiration", False),
+    ("ATP", "ATP is produced.", True),
+])
+def test_coverage(concept, submission, covered):
+    matcher = ConceptMatcher([concept])
+    assert matcher.coverage(submission)["covered"] == ([concept] if covered else [])
+
+
+def test_synonyms_count_for_their_concept():
+    matcher = ConceptMatcher([{"name": "Calvin cycle", "synonyms": ["dark reactions", "light-independent reactions"]}])
+    assert matcher.coverage("The dark reaction builds sugar.")["covered"] == ["Calvin cycle"]
+    assert matcher.coverage("Light independent reactions fix CO2.")["covered"] == ["Calvin cycle"]
+    assert matcher.coverage("Reactions in the dark.")["covered"] == []
+
+
+def test_overlapping_phrases_are_all_found():
+    matcher = ConceptMatcher(["cycle", "Calvin cycle", "Calvin cycle reactions"])
+    result = matcher.coverage("The Calvin cycle reactions use ATP.")
+    assert result["covered"] == ["cycle", "Calvin cycle", "Calvin cycle reactions"]
+    assert result["coverage"] == 1.0
+
+
+def test_coverage_reports_missing_concepts_in_order():
+    matcher = ConceptMatcher(["chloroplast", "glucose", "oxygen"])
+    result = matcher.coverage("Chloroplasts release oxygen.")
+    assert result == {"covered": ["chloroplast", "oxygen"], "missing": ["glucose"], "coverage": 0.667}
+
+
+@pytest.mark.parametrize("text", ["", None, "the and of"])
+def test_empty_or_stop_word_submissions_cover_nothing(text):
+    assert ConceptMatcher(["photosynthesis"]).coverage(text)["covered"] == []
+
+
+def test_stop_word_only_concept_never_matches():
+    matcher = ConceptMatcher(["the"])
+    assert matcher.coverage("the the the")["covered"] == []
+
+
+def test_normalize_concepts_drops_duplicates_and_blank_synonyms():
+    concepts = normalize_concepts([
+        "Mitosis",
+        {"name": "mitosis"},
+        {"name": "ATP", "synonyms": [" ", "adenosine triphosphate"]}
+    ])
+    assert concepts == [
+        {"name": "Mitosis", "synonyms": []},
+        {"name": "ATP", "synonyms": ["adenosine triphosphate"]}
+    ]
+
+
+def test_normalize_concepts_rejects_unnamed_concepts():
+    with pytest.raises(ValueError):
+        normalize_concepts([{"synonyms": ["x"]}])
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for lexical scoring.
+
+The ``compat`` tokenizer must reproduce the original ``simple_evaluate`` scores
+exactly; ``simple_evaluate`` below is a copy of that function.
+
+Usage:
+    python -m pytest test_lexical_scoring.py
+"""
+
+import pytest
+
+from lexical_scoring import LexicalScorer, tokenize
+
+
+def simple_evaluate(user_text, reference_text):
+    """Simple word-based similarity evaluation"""
+    # Filter out short words and common words
+    stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was',
+                  'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+                  'may', 'might', 'can', 'this', 'that', 'these', 'those', 'a', 'an'}
+
+    user_words = set(word.lower() for word in user_text.split() if len(word) > 2 and word.lower() not in stop_words)
+    ref_words = set(word.lower() for word in reference_text.split() if len(word) > 2 and word.lower() not in stop_words)
+
+    if not user_words or not ref_words:
+        return 0.0
+
+    intersection = user_words.intersection(ref_words)
+    union = user_words.union(ref_words)
+
+    similarity = len(intersection) / len(union) if union else 0.0
+    return similarity
+
+
+REFERENCE = ("Photosynthesis is the process by which plants convert sunlight, water and carbon dioxide "
+             "into glucose and oxygen. It takes place in the chloroplasts.")
+
+SUBMISSIONS = [
+    # Empty and whitespace-only text
+    "",
+    "   \n\t ",
+    # Only stop words and short words
+    "the and of a an is are to",
+    "It is as we go up",
+    # Punctuation attached to words, and case
+    "Plants convert sunlight, water and carbon dioxide into glucose.",
+    "plants PLANTS Plants. plants, (plants)",
+    "The, process... of photosynthesis!",
+    # Stop-word check runs on the lowercased word, the length check on the raw one
+    "THE AND With Those",
+    "the, and. of;",
+    # Repeated words count once
+    "glucose glucose glucose oxygen oxygen",
+    # Unicode and digits
+    "Fotosíntesis — chloroplasts convert CO₂ into glucose 123 4567",
+    # Verbatim reference
+    REFERENCE,
+    # No overlap
+    "Volcanoes erupt molten rock.",
+]
+
+
+@pytest.fixture
+def scorer():
+    return LexicalScorer(mode='compat')
+
+
+@pytest.mark.parametrize("user_text", SUBMISSIONS)
+def test_compat_score_matches_simple_evaluate(scorer, user_text):
+    assert scorer.score(user_text, REFERENCE) == simple_evaluate(user_text, REFERENCE)
+
+
+def test_compat_score_batch_matches_simple_evaluate(scorer):
+    scores = scorer.score_batch(SUBMISSIONS, REFERENCE)
+    assert scores.tolist() == [simple_evaluate(text, REFERENCE) for text in SUBMISSIONS]
+
+
+@pytest.mark.parametrize("reference", ["", "the and of", "a b c"])
+def test_compat_scores_zero_for_empty_reference(scorer, reference):
+    assert scorer.score("Plants convert sunlight.", reference) == simple_evaluate("Plants convert sunlight.", reference)
+    assert scorer.score_batch(["Plants convert sunlight.", ""], reference).tolist() == [0.0, 0.0]
+
+
+def test_compat_score_with_precomputed_reference_words(scorer):
+    reference_words = tokenize(REFERENCE, 'compat')
+    for text in SUBMISSIONS:
+        assert scorer.score(text, REFERENCE, reference_words=reference_words) == simple_evaluate(text, REFERENCE)
+    scores = scorer.score_batch(SUBMISSIONS, REFERENCE, reference_words=reference_words)
+    assert scores.tolist() == [simple_evaluate(text, REFERENCE) for text in SUBMISSIONS]
+
+
+def test_compat_score_batch_of_nothing(scorer):
+    assert scorer.score_batch([], REFERENCE).tolist() == []
+
+
+def test_words_mode_ignores_attached_punctuation():
+    scorer = LexicalScorer(mode='words')
+    assert scorer.score("Sunlight, water.", "sunlight water") == 1.0
+    assert LexicalScorer(mode='compat').score("Sunlight, water.", "sunlight water") == 0.0
+
+
+def test_overlap_metric_divides_by_the_smaller_set(scorer):
+    assert scorer.score("glucose carbon", REFERENCE, metric='overlap') == 1.0
+    assert scorer.score_batch(["glucose carbon", "glucose volcano"], REFERENCE, metric='overlap').tolist() == [1.0, 0.5]
@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+"""
+Video Catalog Module
+
+This module keeps the video catalog in SQLite, indexed by id and by category.
+Per-video features that evaluation needs are computed once, when a video is
+ingested, and stored with it:
+
+    tokens          the reference summary's scored words for the lexical scorer
+    key_concepts    concepts a summary should cover, with synonyms: curated in the
+                    ingested video, or else its repeated phrases and most frequent
+                    content words; compiled per process into a ConceptMatcher
+    summary_sha256  the key under which the AI service's reference store keeps
+                    the summary's embedding
+
+The embedding itself needs the AI service's model, so it is computed by the
+command line rather than by the server: ``ingest`` encodes new and changed
+summaries into the reference store (``--reference-store-dir``, default
+``REFERENCE_STORE_DIR``), and ``embed`` does the same for the whole catalog,
+e.g. after the server seeded an empty one. Both run the AI service's
+``reference_store.py rebuild --merge``, which keeps references other catalogs
+put in the store.
+
+Every write bumps a catalog version, which listings and lookups turn into
+ETags so clients can revalidate with a conditional GET.
+
+Usage:
+    python video_catalog.py ingest --catalog videos.json [--reference-store-dir python-ai/models/reference_store]
+    python video_catalog.py embed --reference-store-dir python-ai/models/reference_store
+    python video_catalog.py list [--category Biology]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from concept_matcher import ConceptMatcher, normalize_concepts
+from lexical_scoring import STOP_WORDS, WORD_PATTERN, tokenize
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_FIELDS = ('id', 'title', 'youtube_id', 'summary', 'category', 'key_concepts')
+MAX_KEY_CONCEPTS = 10
+REFERENCE_STORE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python-ai', 'reference_store.py')
+# Function words too common to be a video's concepts, on top of the scoring stop words
+CONCEPT_STOP_WORDS = STOP_WORDS | {
+    'also', 'about', 'after', 'before', 'both', 'each', 'from', 'into', 'more', 'most', 'only', 'other', 'over',
+    'some', 'such', 'than', 'their', 'them', 'then', 'there', 'they', 'through', 'under', 'very', 'what', 'when',
+    'where', 'which', 'while', 'with', 'your'
+}
+
+
+def summary_digest(summary: str) -> str:
+    """Return the SHA-256 hex digest the AI service's reference store keys summaries by."""
+    return hashlib.sha256(summary.encode('utf-8')).hexdigest()
+
+
+def _is_content_word(word: str) -> bool:
+    return len(word) > 3 and word not in CONCEPT_STOP_WORDS and not word.isdigit()
+
+
+def key_concepts(summary: str, limit: int = MAX_KEY_CONCEPTS) -> List[str]:
+    """
+    Extract a summary's key concepts: its repeated two-word phrases, then its most frequent content words.
+
+    Args:
+        summary (str): Reference summary
+        limit (int): Maximum number of concepts
+
+    Returns:
+        List[str]: Concepts, most frequent first, ties in order of first appearance
+    """
+    words = WORD_PATTERN.findall(summary.lower().replace('’', "'"))
+    phrases = Counter(
+        f"{first} {second}" for first, second in zip(words, words[1:])
+        if _is_content_word(first) and _is_content_word(second)
+    )
+    concepts = [phrase for phrase, count in phrases.most_common() if count > 1]
+    # Words of a chosen phrase are covered by it
+    in_phrases = {word for phrase in concepts for word in phrase.split()}
+    counts = Counter(word for word in words if _is_content_word(word) and word not in in_phrases)
+    concepts.extend(word for word, _ in counts.most_common())
+    return concepts[:limit]
+
+
+class VideoCatalog:
+    """
+    SQLite-backed video catalog with precomputed per-video features.
+    """
+
+    def __init__(self, path: str, tokenizer_mode: str = 'compat', max_cached_matchers: int = 256):
+        """
+        Open (or create) the catalog database.
+
+        Args:
+            path (str): SQLite database file
+            tokenizer_mode (str): Lexical tokenizer whose word sets are precomputed
+            max_cached_matchers (int): Number of compiled concept matchers kept in memory
+        """
+        self.path = path
+        self.tokenizer_mode = tokenizer_mode
+        self.max_cached_matchers = max(1, int(max_cached_matchers))
+        self._local = threading.local()
+        self._matchers_lock = threading.Lock()
+        # video id -> (row version, compiled matcher)
+        self._matchers: "OrderedDict[int, Tuple[int, ConceptMatcher]]" = OrderedDict()
+
+        # SQLite connections must not cross fork(); pre-fork workers open their own
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_connections)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            " id INTEGER PRIMARY KEY, title TEXT NOT NULL, youtube_id TEXT, category TEXT,"
+            " summary TEXT NOT NULL, summary_sha256 TEXT NOT NULL, tokenizer TEXT NOT NULL,"
+            " tokens TEXT NOT NULL, key_concepts TEXT NOT NULL, version INTEGER NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS videos_category ON videos (category, id)")
+        connection.execute("CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        connection.execute("INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('version', 0)")
+        self._refresh_tokens()
+
+    def _reset_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so keep one per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    def _refresh_tokens(self) -> None:
+        # Word sets precomputed with another tokenizer would score differently
+        connection = self._connection()
+        stale = connection.execute(
+            "SELECT id, summary FROM videos WHERE tokenizer != ?", (self.tokenizer_mode,)
+        ).fetchall()
+        if not stale:
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            version = self._bump_version(connection)
+            for row in stale:
+                connection.execute(
+                    "UPDATE videos SET tokenizer = ?, tokens = ?, version = ? WHERE id = ?",
+                    (self.tokenizer_mode, json.dumps(sorted(tokenize(row['summary'], self.tokenizer_mode))),
+                     version, row['id'])
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        logger.info(f"Recomputed word sets of {len(stale)} videos for the {self.tokenizer_mode} tokenizer")
+
+    @staticmethod
+    def _bump_version(connection: sqlite3.Connection) -> int:
+        connection.execute("UPDATE catalog_meta SET value = value + 1 WHERE key = 'version'")
+        return connection.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()[0]
+
+    def version(self) -> int:
+        """
+        Get the catalog version, which changes on every write.
+
+        Returns:
+            int: Catalog version
+        """
+        return self._connection().execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()[0]
+
+    def ingest(self, videos: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Add or update videos, precomputing their features.
+
+        Videos whose fields are unchanged are left alone, so re-ingesting a
+        catalog does not change its version.
+
+        Args:
+            videos (List[Dict[str, Any]]): Videos with ``id``, ``title`` and ``summary``, and
+                optionally ``youtube_id``, ``category`` and curated ``key_concepts`` (names
+                or ``{"name", "synonyms"}`` objects)
+
+        Returns:
+            Dict[str, int]: Number of added, updated and unchanged videos
+        """
+        rows = []
+        for i, video in enumerate(videos):
+            try:
+                video_id = int(video['id'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Video {i} needs an integer id")
+            summary = str(video.get('summary') or '').strip()
+            if not summary or not video.get('title'):
+                raise ValueError(f"Video {video_id} needs a title and a summary")
+            concepts = normalize_concepts(video.get('key_concepts') or key_concepts(summary))
+            rows.append((video_id, str(video['title']), video.get('youtube_id'), video.get('category'), summary,
+                         json.dumps(concepts)))
+
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            version = None
+            for video_id, title, youtube_id, category, summary, concepts in rows:
+                current = connection.execute(
+                    "SELECT title, youtube_id, category, summary_sha256, key_concepts FROM videos WHERE id = ?",
+                    (video_id,)
+                ).fetchone()
+                digest = summary_digest(summary)
+                if current is not None and tuple(current) == (title, youtube_id, category, digest, concepts):
+                    counts["unchanged"] += 1
+                    continue
+                if version is None:
+                    version = self._bump_version(connection)
+                connection.execute(
+                    "INSERT OR REPLACE INTO videos (id, title, youtube_id, category, summary, summary_sha256,"
+                    " tokenizer, tokens, key_concepts, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, title, youtube_id, category, summary, digest, self.tokenizer_mode,
+                     json.dumps(sorted(tokenize(summary, self.tokenizer_mode))),
+                     concepts, version)
+                )
+                counts["updated" if current is not None else "added"] += 1
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return counts
+
+    def delete(self, video_id: int) -> bool:
+        """
+        Remove a video.
+
+        Args:
+            video_id (int): Video identifier
+
+        Returns:
+            bool: False if the video was not in the catalog
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = connection.execute("DELETE FROM videos WHERE id = ?", (video_id,)).rowcount > 0
+            if deleted:
+                self._bump_version(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return deleted
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, features: bool) -> Dict[str, Any]:
+        video = {field: row[field] for field in PUBLIC_FIELDS if field != 'key_concepts'}
+        concepts = normalize_concepts(json.loads(row['key_concepts']))
+        video['key_concepts'] = [concept['name'] for concept in concepts]
+        if features:
+            video['concepts'] = concepts
+            video['tokens'] = json.loads(row['tokens'])
+            video['summary_sha256'] = row['summary_sha256']
+            video['version'] = row['version']
+        return video
+
+    def get(self, video_id: int, features: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get a video.
+
+        Args:
+            video_id (int): Video identifier
+            features (bool): Include the precomputed ``tokens``, ``concepts`` with synonyms,
+                ``summary_sha256`` and row ``version``
+
+        Returns:
+            Optional[Dict[str, Any]]: The video, or None if it is not in the catalog
+        """
+        row = self._connection().execute("SELECT * FROM videos WHERE id = ?", (video_id,)).fetchone()
+        return None if row is None else self._to_dict(row, features)
+
+    def concept_matcher(self, video: Dict[str, Any]) -> ConceptMatcher:
+        """
+        Get a video's compiled concept matcher, compiling it on first use after each change.
+
+        Args:
+            video (Dict[str, Any]): Video as returned by ``get(video_id, features=True)``
+
+        Returns:
+            ConceptMatcher: Matcher for the video's key concepts
+        """
+        with self._matchers_lock:
+            cached = self._matchers.get(video['id'])
+            if cached is not None and cached[0] == video['version']:
+                self._matchers.move_to_end(video['id'])
+                return cached[1]
+
+        matcher = ConceptMatcher(video['concepts'])
+        with self._matchers_lock:
+            self._matchers[video['id']] = (video['version'], matcher)
+            self._matchers.move_to_end(video['id'])
+            while len(self._matchers) > self.max_cached_matchers:
+                self._matchers.popitem(last=False)
+        return matcher
+
+    def get_version(self, video_id: int) -> Optional[int]:
+        """
+        Get the version at which a video last changed, without loading it.
+
+        Args:
+            video_id (int): Video identifier
+
+        Returns:
+            Optional[int]: Row version, or None if the video is not in the catalog
+        """
+        row = self._connection().execute("SELECT version FROM videos WHERE id = ?", (video_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def list(self, category: Optional[str] = None, query: Optional[str] = None, page: int = 1,
+             per_page: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List videos in id order, one page at a time.
+
+        Args:
+            category (Optional[str]): Only videos in this category
+            query (Optional[str]): Only videos whose title contains this text (case-insensitive)
+            page (int): Page number, from 1
+            per_page (int): Videos per page
+
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: Videos on the page and the total number of matches
+        """
+        conditions, params = [], []
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+        if query:
+            conditions.append("title LIKE ? ESCAPE '\\'")
+            params.append('%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        connection = self._connection()
+        total = connection.execute(f"SELECT COUNT(*) FROM videos{where}", params).fetchone()[0]
+        rows = connection.execute(
+            f"SELECT * FROM videos{where} ORDER BY id LIMIT ? OFFSET ?",
+            params + [per_page, (max(1, page) - 1) * per_page]
+        ).fetchall()
+        return [self._to_dict(row, features=False) for row in rows], total
+
+    def summaries(self) -> Dict[str, str]:
+        """
+        Get every reference summary, for rebuilding the AI service's reference store.
+
+        Returns:
+            Dict[str, str]: Reference summary for each video id
+        """
+        rows = self._connection().execute("SELECT id, summary FROM videos ORDER BY id").fetchall()
+        return {str(row['id']): row['summary'] for row in rows}
+
+    def count(self) -> int:
+        """
+        Get the number of videos.
+
+        Returns:
+            int: Number of videos in the catalog
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+
+def embed_references(catalog: VideoCatalog, store_dir: str, model_name: Optional[str] = None) -> Dict[str, int]:
+    """
+    Encode the catalog's new and changed summaries into the AI service's reference store.
+
+    Runs the AI service's own ``reference_store.py rebuild --merge``, so the
+    summaries are encoded with the service's model configuration and references
+    put in the store by other catalogs are kept.
+
+    Args:
+        catalog (VideoCatalog): Video catalog
+        store_dir (str): Reference store directory
+        model_name (Optional[str]): Sentence transformer model name (default: the AI service's ``MODEL_NAME``)
+
+    Returns:
+        Dict[str, int]: Number of added, updated, unchanged and removed references
+
+    Raises:
+        subprocess.CalledProcessError: If the rebuild fails
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False) as f:
+        json.dump(catalog.summaries(), f, ensure_ascii=False)
+    command = [sys.executable, REFERENCE_STORE_SCRIPT, 'rebuild', '--catalog', f.name,
+               '--store-dir', os.path.abspath(store_dir), '--merge']
+    if model_name:
+        command += ['--model', model_name]
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, text=True, check=True)
+    finally:
+        os.remove(f.name)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for catalog maintenance."""
+    parser = argparse.ArgumentParser(description="Manage the video catalog")
+    parser.add_argument('--db', default=os.getenv('VIDEO_CATALOG_DB', 'video_catalog.db'), help="Catalog database")
+    parser.add_argument('--tokenizer', default=os.getenv('LEXICAL_TOKENIZER', 'compat'), choices=['compat', 'words'])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    ingest_parser = subparsers.add_parser('ingest', help="Add or update videos and precompute their features")
+    ingest_parser.add_argument('--catalog', required=True, help="JSON list of videos (GET /api/videos output)")
+    embed_parser = subparsers.add_parser('embed', help="Encode every catalog summary into the reference store")
+    for command_parser in (ingest_parser, embed_parser):
+        command_parser.add_argument('--reference-store-dir', default=os.getenv('REFERENCE_STORE_DIR'),
+                                    help="AI service reference store to encode new and changed summaries into")
+        command_parser.add_argument('--model', default=os.getenv('MODEL_NAME'),
+                                    help="Sentence transformer model name (default: the AI service's MODEL_NAME)")
+    list_parser = subparsers.add_parser('list', help="Print the catalog")
+    list_parser.add_argument('--category')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = VideoCatalog(args.db, args.tokenizer)
+
+    if args.command == 'list':
+        videos, _ = catalog.list(category=args.category, per_page=catalog.count() or 1)
+        print(json.dumps(videos, indent=2, ensure_ascii=False))
+        return 0
+
+    if args.command == 'ingest':
+        with open(args.catalog, 'r', encoding='utf-8') as f:
+            videos = json.load(f)
+        print(json.dumps(catalog.ingest(videos)))
+
+    if args.reference_store_dir:
+        print(json.dumps(embed_references(catalog, args.reference_store_dir, args.model)))
+    elif args.command == 'embed':
+        parser.error("embed needs --reference-store-dir or REFERENCE_STORE_DIR")
+    else:
+        logger.warning("REFERENCE_STORE_DIR is not set; the AI service will encode these summaries on first use")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
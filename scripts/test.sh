@@ -253,7 +253,14 @@ if [ "$TEST_PYTHON" = true ]; then
     # Test 3: Basic evaluation
     run_test "Basic evaluation" "python -c 'from summary_evaluation import SummaryEvaluator; evaluator = SummaryEvaluator(); result = evaluator.evaluate_summary(\"Plants use sunlight\", \"Photosynthesis converts light to energy\"); print(f\"✅ Score: {result[\"similarity_score\"]}\")'"
     
-    # Test 4: API endpoints (if service is running)
+    # Test 4: Unit tests (backend and AI service)
+    if python -c 'import pytest' >/dev/null 2>&1; then
+        run_test "Unit tests" "python -m pytest -q .."
+    else
+        print_warning "pytest not installed, skipping unit tests (pip install pytest)"
+    fi
+    
+    # Test 5: API endpoints (if service is running)
     if check_service 5000 "AI Service"; then
         run_test "API test script" "python test_api.py"
     else